@@ -0,0 +1,193 @@
+"""End-to-end ingest benchmark for MainWindow, run offscreen.
+
+    python benchmarks/bench_ingest.py                      # default sweep
+    python benchmarks/bench_ingest.py --rates 100 1000 --seconds 5 --output ingest.json
+
+For each offered line rate a MainWindow is connected to a simulated port
+(sim://?rate=N) and the Qt event loop runs for --seconds. Reported per rate:
+
+  * throughput: frames that reached the store per second vs. offered
+  * latency: time from a frame becoming available on the port to the plot
+    redraw that first shows it, over every frame (p50/p90/p99/max, ms)
+
+A soak run then pushes --soak-hours of 1 Hz data through as fast as the
+window keeps up and samples RSS, store and serial-monitor sizes once per
+simulated hour. Everything is written as JSON so runs can be diffed.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src")
+sys.path.insert(0, os.path.abspath(SRC))
+
+import numpy as np
+from PyQt5 import QtWidgets
+
+import gui
+
+
+def rss_bytes():
+    """Current resident set size (Linux /proc; falls back to peak RSS)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def _window(app):
+    window = gui.MainWindow()
+    window.show()
+    app.processEvents()
+    return window
+
+
+def _connect(window, rate):
+    url = f"sim://?rate={rate:g}&seed=1"
+    window.port_combo.addItem(url, url)
+    window.port_combo.setCurrentIndex(window.port_combo.count() - 1)
+    window._connect()
+    return window.ser
+
+
+def _close(window, app):
+    window.close()
+    window.deleteLater()
+    app.processEvents()
+
+
+def _percentiles(values_ms):
+    if not values_ms:
+        return None
+    v = np.asarray(values_ms)
+    return {
+        "p50": float(np.percentile(v, 50)),
+        "p90": float(np.percentile(v, 90)),
+        "p99": float(np.percentile(v, 99)),
+        "max": float(v.max()),
+        "samples": int(len(v)),
+    }
+
+
+def run_rate(app, rate, seconds):
+    window = _window(app)
+    port = _connect(window, rate)
+    latencies = []
+    render = window._render_plots
+    shown = [0]  # store.total at the previous redraw
+
+    def timed_render():
+        dirty = window._plots_dirty
+        render()
+        total = window.store.total
+        if dirty and total > shown[0]:
+            # Frame k (1-based) became available at t0 + k / rate; every frame
+            # since the last redraw is first shown by this one
+            due = port._t0 + np.arange(shown[0] + 1, total + 1) / port.rate
+            latencies.extend(((time.monotonic() - due) * 1000.0).tolist())
+            shown[0] = total
+
+    window.render_timer.timeout.disconnect()
+    window.render_timer.timeout.connect(timed_render)
+
+    start = time.monotonic()
+    while time.monotonic() - start < seconds:
+        app.processEvents()
+        time.sleep(0.001)
+    elapsed = time.monotonic() - start
+    offered = port.frames_sent
+    ingested = window.store.total
+    backlog = len(window.reader.lines) if window.reader else 0
+    stages = window.metrics.snapshot()
+    _close(window, app)
+    return {
+        "offered_rate": rate,
+        "seconds": elapsed,
+        "frames_offered": offered,
+        "frames_ingested": ingested,
+        "throughput": ingested / elapsed,
+        # Allow for frames still in flight within the last tick or two
+        "keeps_up": offered - ingested <= max(0.5 * rate, 0.05 * offered),
+        "reader_backlog": backlog,
+        "latency_ms": _percentiles(latencies),
+        "metrics": stages,  # where the time went, per pipeline stage
+    }
+
+
+def run_soak(app, hours, rate):
+    """Pushes `hours` of 1 Hz frames through at `rate` frames/s."""
+    window = _window(app)
+    port = _connect(window, rate)
+    per_hour = 3600
+    samples = [{"hour": 0, "rss": rss_bytes(), "store_rows": 0, "monitor_lines": 0}]
+    start = time.monotonic()
+    for hour in range(1, hours + 1):
+        while window.store.total < hour * per_hour:
+            app.processEvents()
+            time.sleep(0.001)
+        samples.append({
+            "hour": hour,
+            "rss": rss_bytes(),
+            "store_rows": len(window.store),
+            "monitor_lines": len(window.serial_monitor._lines),
+            "monitor_blocks": window.serial_monitor.serial_text.blockCount(),
+        })
+    port.rate = 0  # stop producing before tearing down
+    elapsed = time.monotonic() - start
+    _close(window, app)
+    growth = samples[-1]["rss"] - samples[1]["rss"] if len(samples) > 1 else 0
+    return {
+        "simulated_hours": hours,
+        "wall_seconds": elapsed,
+        "rss_growth_after_first_hour": growth,
+        "rss_growth_per_hour": growth / max(1, hours - 1),
+        "samples": samples,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MainWindow ingest benchmark (offscreen).")
+    parser.add_argument("--rates", type=float, nargs="+", default=[5, 50, 200, 1000, 5000],
+                        help="offered line rates to sweep, frames/s")
+    parser.add_argument("--seconds", type=float, default=3.0, help="duration per rate")
+    parser.add_argument("--soak-hours", type=int, default=6, help="simulated hours for the memory run (0 to skip)")
+    parser.add_argument("--soak-rate", type=float, default=5000, help="frames/s used to fast-forward the soak run")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv[:1])
+    with tempfile.TemporaryDirectory() as log_dir:
+        gui.LOG_DIR = log_dir  # keep logs/recordings out of the source tree
+        # The window echoes every line to stdout; keep it from flooding ours
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            results = {
+                "benchmark": "ingest",
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "rates": [],
+            }
+            for rate in args.rates:
+                results["rates"].append(run_rate(app, rate, args.seconds))
+            if args.soak_hours:
+                results["soak"] = run_soak(app, args.soak_hours, args.soak_rate)
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
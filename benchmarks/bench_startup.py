@@ -0,0 +1,117 @@
+"""Cold-start benchmark: time until the MainWindow is first shown.
+
+    python benchmarks/bench_startup.py                 # 5 runs
+    python benchmarks/bench_startup.py --runs 10 --output startup.json
+
+Every run is a fresh interpreter (offscreen Qt), so module imports are paid
+each time just like on a field laptop. Reported per run, in ms:
+
+  * imports: `import gui` and everything it pulls in
+  * construct: MainWindow() up to the end of __init__
+  * first_show: show() plus the event-loop pass that paints the window
+  * total: interpreter launch to first shown window, measured by the parent
+
+The slowest imported modules of the last run are listed too, which is the
+first place to look when the total creeps up.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src"))
+
+# Runs in the child interpreter; prints one JSON line
+CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, {src!r})
+from PyQt5 import QtWidgets
+app = QtWidgets.QApplication(sys.argv[:1])
+import gui
+gui.LOG_DIR = {log_dir!r}
+t1 = time.perf_counter()
+window = gui.MainWindow()
+t2 = time.perf_counter()
+window.show()
+app.processEvents()
+t3 = time.perf_counter()
+print(json.dumps({{"imports": (t1 - t0) * 1e3, "construct": (t2 - t1) * 1e3,
+                   "first_show": (t3 - t2) * 1e3, "child_done": time.time()}}))
+window.close()
+"""
+
+
+def _slowest_imports(stderr, top):
+    """Parses `python -X importtime` output into the `top` costliest modules."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            rows.append((int(cumulative), name.strip()))
+    rows.sort(reverse=True)
+    # Only top-level packages, otherwise the list is just one import chain
+    seen, out = set(), []
+    for us, name in rows:
+        root = name.split(".")[0]
+        if root not in seen:
+            seen.add(root)
+            out.append({"module": name, "ms": us / 1000.0})
+        if len(out) == top:
+            break
+    return out
+
+
+def run_once(log_dir, importtime=False):
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ["-X", "importtime"]
+    cmd += ["-c", CHILD.format(src=SRC, log_dir=log_dir)]
+    start = time.time()
+    proc = subprocess.run(cmd, env=env, capture_output=True, text=True, check=True)
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["total"] = (result.pop("child_done") - start) * 1e3
+    return result, proc.stderr
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MainWindow cold-start benchmark (offscreen).")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="slowest imports to report")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    runs = []
+    with tempfile.TemporaryDirectory() as log_dir:
+        for _ in range(args.runs):
+            runs.append(run_once(log_dir)[0])
+        _, stderr = run_once(log_dir, importtime=True)
+
+    keys = ("imports", "construct", "first_show", "total")
+    results = {
+        "benchmark": "startup",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "runs": runs,
+        "median_ms": {k: sorted(r[k] for r in runs)[len(runs) // 2] for k in keys},
+        "min_ms": {k: min(r[k] for r in runs) for k in keys},
+        "slowest_imports": _slowest_imports(stderr, args.top),
+    }
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
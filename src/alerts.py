@@ -0,0 +1,113 @@
+import math
+
+# (metric, forecaster field, plant key, side, message)
+RULES = (
+    ("temperature", "temp_avg", "temperature_high", "high", "Temperature will be too high"),
+    ("temperature", "temp_avg", "temperature_low", "low", "Temperature will be too low"),
+    ("humidity", "humidity_avg", "humidity_high", "high", "Humidity will be too high"),
+    ("humidity", "humidity_avg", "humidity_low", "low", "Humidity will be too low"),
+    ("moisture", "moisture_avg", "moisture_high", "high", "Soil will be too wet"),
+    ("moisture", "moisture_avg", "moisture_low", "low", "Soil will be too dry"),
+)
+
+
+class _Alert:
+    __slots__ = ("key", "field", "side", "message", "limit", "active", "eta",
+                 "_since", "_shown_eta")
+
+    def __init__(self, field, key, side, message):
+        self.key = key
+        self.field = field
+        self.side = side
+        self.message = message
+        self.limit = None
+        self.active = False
+        self.eta = None
+        self._since = None  # when the condition started to disagree with `active`
+        self._shown_eta = None
+
+    def text(self):
+        return f"{self.message} in ~{_fmt_eta(self._shown_eta)}"
+
+
+def _fmt_eta(seconds):
+    minutes = seconds / 60.0
+    if minutes < 1.5:
+        return "1 min"
+    if minutes < 10:
+        return f"{round(minutes)} min"
+    if minutes < 90:
+        return f"{5 * round(minutes / 5)} min"
+    return f"{round(minutes / 60)} h"
+
+
+class AlertEngine:
+    """Warns before a reading leaves the plant's range, not after.
+
+    Uses the level/trend of the live forecaster, so each update is a fixed
+    amount of work regardless of history length. An alert is raised when the
+    projected crossing is less than `lead` seconds away and cleared once it
+    is more than `lead * release` away (hysteresis). Both transitions must
+    hold for `debounce` seconds before they show, so a noisy trend can't make
+    the warning flicker. Readings already out of range are left to the
+    Arduino's own flags.
+    """
+
+    def __init__(self, lead=3600.0, release=1.25, debounce=10.0):
+        self.lead = lead
+        self.release = release
+        self.debounce = debounce
+        self.alerts = [_Alert(field, key, side, msg) for _, field, key, side, msg in RULES]
+
+    def set_plant(self, plant):
+        """Takes the ranges from a plant_preferences.json entry (None clears them).
+        Alerts whose limit didn't change keep their state."""
+        for alert in self.alerts:
+            limit = plant.get(alert.key) if plant else None
+            if limit == alert.limit:
+                continue
+            alert.limit = limit
+            alert.active = False
+            alert.eta = alert._since = alert._shown_eta = None
+
+    @staticmethod
+    def _eta(alert, model):
+        if alert.limit is None or model.level is None or not model.ready:
+            return None
+        gap = alert.limit - model.level
+        if alert.side == "high":
+            heading = model.trend > 0 and gap > 0
+        else:
+            heading = model.trend < 0 and gap < 0
+        return gap / model.trend if heading else None
+
+    def update(self, forecaster, t):
+        """Re-evaluates every rule at time `t`; returns the alerts that changed state."""
+        changed = []
+        for alert in self.alerts:
+            eta = self._eta(alert, forecaster.models[alert.field])
+            alert.eta = eta
+            if alert.active:
+                want = eta is not None and eta <= self.lead * self.release
+            else:
+                want = eta is not None and eta <= self.lead
+            if want == alert.active:
+                alert._since = None
+                if want and (alert._shown_eta is None
+                             or abs(eta - alert._shown_eta) > max(60.0, 0.2 * alert._shown_eta)):
+                    alert._shown_eta = eta  # only move the displayed ETA by meaningful steps
+                continue
+            if alert._since is None:
+                alert._since = t
+            if t - alert._since >= self.debounce:
+                alert.active = want
+                alert._since = None
+                alert._shown_eta = eta if want else None
+                changed.append(alert)
+        return changed
+
+    def active_messages(self):
+        """Human readable text for the raised alerts, soonest first."""
+        raised = [a for a in self.alerts if a.active and a._shown_eta is not None]
+        raised.sort(key=lambda a: a._shown_eta if math.isfinite(a._shown_eta) else math.inf)
+        return [a.text() for a in raised]
@@ -0,0 +1,303 @@
+"""SQLite archive of everything the app saw: parsed frames (values + issue
+flags), commands sent to the Arduino and analysis results.
+
+Writes never block the caller: they are queued for one writer thread that
+commits them in batches (WAL mode, so readers are never locked out).
+Frames are indexed by (device, t), so range queries, aggregates and
+violation counts over weeks of history come back in milliseconds:
+
+    python src/archive.py src/telemetry.sqlite --device sim --hours 24
+    python src/archive.py src/telemetry.sqlite --violations
+"""
+import argparse
+import datetime
+import json
+import os
+import pathlib
+import queue
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from recording import RECORD_DTYPE, VALUE_FIELDS, pack_records, unpack_records
+from telemetry import FLAG_FIELDS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS plants (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL
+);
+CREATE TABLE IF NOT EXISTS frames (
+    device TEXT NOT NULL,
+    t REAL NOT NULL,
+    temp REAL, humidity REAL, moisture REAL,
+    temp_avg REAL, humidity_avg REAL, moisture_avg REAL,
+    quality INTEGER,
+    flags INTEGER NOT NULL,
+    plant_id INTEGER REFERENCES plants(id)
+);
+CREATE INDEX IF NOT EXISTS frames_device_t ON frames (device, t);
+CREATE TABLE IF NOT EXISTS commands (
+    device TEXT NOT NULL,
+    t REAL NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS commands_device_t ON commands (device, t);
+CREATE TABLE IF NOT EXISTS analyses (
+    device TEXT NOT NULL,
+    t REAL NOT NULL,
+    plant TEXT,
+    result TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS analyses_device_t ON analyses (device, t);
+"""
+
+_FRAME_COLUMNS = ("t",) + VALUE_FIELDS + ("quality", "flags")
+_INSERT_FRAME = (f"INSERT INTO frames (device, {', '.join(_FRAME_COLUMNS)}, plant_id) "
+                 f"VALUES (?, {', '.join('?' * len(_FRAME_COLUMNS))}, ?)")
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")  # WAL keeps this crash safe
+    return conn
+
+
+class TelemetryArchive:
+    """Batched, thread-backed writer plus the query API for one database.
+
+    Timestamps are UNIX epoch seconds. Queries open their own connection per
+    thread and can run while the writer is busy. With `read_only` nothing is
+    created or written (there is no writer thread) and only the queries work.
+    """
+
+    def __init__(self, path, batch_size=2000, flush_interval=1.0, metrics=None, read_only=False):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.metrics = metrics
+        self.read_only = read_only
+        self.error = None  # last write error, if any
+        self._queue = queue.Queue()
+        self._local = threading.local()
+        self._thread = None
+        if read_only:
+            return
+        # Create the schema up front so a bad path fails here, not on the thread
+        conn = _connect(path)
+        with conn:
+            conn.executescript(SCHEMA)
+        conn.close()
+        self._thread = threading.Thread(target=self._run, name="Archive", daemon=True)
+        self._thread.start()
+
+    # --- writing (any thread) ------------------------------------------------
+
+    def add_frames(self, device, times, records, plant=None):
+        """Queues TELEMETRY_DTYPE `records` stamped with epoch `times`."""
+        if len(records):
+            self._queue.put(("frames", device, pack_records(records, times), plant))
+
+    def add_command(self, device, text, t=None):
+        self._queue.put(("command", device, time.time() if t is None else t, text))
+
+    def add_analysis(self, device, result, plant=None, t=None):
+        """Stores an analysis `result` (anything json.dumps accepts)."""
+        self._queue.put(("analysis", device, time.time() if t is None else t, plant,
+                         json.dumps(result, default=float)))
+
+    def flush(self, timeout=None):
+        """Blocks until everything queued so far is committed."""
+        done = threading.Event()
+        self._queue.put(("flush", done))
+        return done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    # --- writer thread -------------------------------------------------------
+
+    def _run(self):
+        conn = _connect(self.path)
+        plant_ids = {}
+        pending, waiters, rows = [], [], 0
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = "timeout"
+            stop = item is None
+            if isinstance(item, tuple) and item[0] == "flush":
+                waiters.append(item[1])
+            elif isinstance(item, tuple):
+                pending.append(item)
+                rows += len(item[2]) if item[0] == "frames" else 1
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            # Commit when the batch is big enough, old enough, or someone waits
+            if pending and (stop or waiters or item == "timeout" or rows >= self.batch_size):
+                self._commit(conn, pending, plant_ids)
+                pending, rows, deadline = [], 0, None
+            for done in waiters:
+                done.set()
+            waiters = []
+            if stop:
+                break
+        conn.close()
+
+    def _plant_id(self, conn, plant_ids, name):
+        if name is None:
+            return None
+        if name not in plant_ids:
+            conn.execute("INSERT OR IGNORE INTO plants (name) VALUES (?)", (name,))
+            plant_ids[name] = conn.execute("SELECT id FROM plants WHERE name = ?", (name,)).fetchone()[0]
+        return plant_ids[name]
+
+    def _commit(self, conn, pending, plant_ids):
+        t0 = time.perf_counter_ns()
+        frames = 0
+        try:
+            with conn:
+                for item in pending:
+                    kind, device = item[0], item[1]
+                    if kind == "frames":
+                        plant = self._plant_id(conn, plant_ids, item[3])
+                        conn.executemany(_INSERT_FRAME, ((device, *row, plant) for row in item[2].tolist()))
+                        frames += len(item[2])
+                    elif kind == "command":
+                        conn.execute("INSERT INTO commands (device, t, text) VALUES (?, ?, ?)", (device, *item[2:]))
+                    else:
+                        conn.execute("INSERT INTO analyses (device, t, plant, result) VALUES (?, ?, ?, ?)",
+                                     (device, *item[2:]))
+        except sqlite3.Error as e:
+            self.error = e
+            print(f"[ERROR] Archive write failed: {e}")
+            return
+        if self.metrics:
+            self.metrics.histogram("archive_commit").observe(time.perf_counter_ns() - t0)
+            self.metrics.counter("archived_frames").inc(frames)
+
+    # --- queries -------------------------------------------------------------
+
+    def _reader(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if self.read_only:
+                # mode=ro also refuses to create a missing file
+                uri = pathlib.Path(self.path).absolute().as_uri() + "?mode=ro"
+                conn = sqlite3.connect(uri, uri=True, timeout=10)
+            else:
+                conn = sqlite3.connect(self.path, timeout=10)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _range(t0, t1):
+        sql, args = "", []
+        if t0 is not None:
+            sql += " AND t >= ?"
+            args.append(t0)
+        if t1 is not None:
+            sql += " AND t < ?"
+            args.append(t1)
+        return sql, args
+
+    def devices(self):
+        return [row[0] for row in self._reader().execute("SELECT DISTINCT device FROM frames ORDER BY device")]
+
+    def frames(self, device, t0=None, t1=None):
+        """(epoch times, TELEMETRY_DTYPE records) for `device` in [t0, t1)."""
+        sql, args = self._range(t0, t1)
+        cursor = self._reader().execute(
+            f"SELECT {', '.join(_FRAME_COLUMNS)} FROM frames WHERE device = ?{sql} ORDER BY t", [device, *args])
+        rows = np.array(cursor.fetchall(), dtype=np.float64).reshape(-1, len(_FRAME_COLUMNS))
+        packed = np.empty(len(rows), dtype=RECORD_DTYPE)
+        for i, name in enumerate(_FRAME_COLUMNS):
+            packed[name] = rows[:, i]
+        return packed["t"].copy(), unpack_records(packed)
+
+    def aggregate(self, device, field, t0=None, t1=None, bucket=None):
+        """count/mean/min/max of `field` over [t0, t1), overall or per
+        `bucket` seconds. Returns a list of dicts (with the bucket start `t`)."""
+        if field not in VALUE_FIELDS:
+            raise ValueError(f"unknown field {field!r}")
+        sql, args = self._range(t0, t1)
+        group = "NULL" if bucket is None else f"CAST(t / {float(bucket)!r} AS INTEGER) * {float(bucket)!r}"
+        cursor = self._reader().execute(
+            f"SELECT {group} AS b, COUNT({field}), AVG({field}), MIN({field}), MAX({field}) "
+            f"FROM frames WHERE device = ?{sql} GROUP BY b ORDER BY b", [device, *args])
+        return [{"t": b, "count": n, "mean": mean, "min": low, "max": high}
+                for b, n, mean, low, high in cursor]
+
+    def violations(self, t0=None, t1=None, device=None):
+        """Per plant: frames seen and how many raised each issue flag."""
+        sql, args = self._range(t0, t1)
+        if device is not None:
+            sql += " AND device = ?"
+            args.append(device)
+        sums = ", ".join(f"SUM((flags >> {bit}) & 1)" for bit in range(len(FLAG_FIELDS)))
+        cursor = self._reader().execute(
+            f"SELECT plants.name, COUNT(*), {sums} FROM frames LEFT JOIN plants ON plants.id = frames.plant_id "
+            f"WHERE 1{sql} GROUP BY frames.plant_id ORDER BY plants.name", args)
+        return {name: {"frames": n, **dict(zip(FLAG_FIELDS, counts))} for name, n, *counts in cursor}
+
+    def commands(self, device, t0=None, t1=None):
+        sql, args = self._range(t0, t1)
+        return self._reader().execute(
+            f"SELECT t, text FROM commands WHERE device = ?{sql} ORDER BY t", [device, *args]).fetchall()
+
+    def analyses(self, device=None, limit=20):
+        """The newest analysis results, newest first."""
+        sql, args = ("WHERE device = ?", [device]) if device is not None else ("", [])
+        cursor = self._reader().execute(
+            f"SELECT device, t, plant, result FROM analyses {sql} ORDER BY t DESC LIMIT ?", [*args, limit])
+        return [{"device": d, "t": t, "plant": plant, "result": json.loads(result)}
+                for d, t, plant, result in cursor]
+
+
+def _fmt_time(t):
+    return datetime.datetime.fromtimestamp(t).strftime("%Y-%m-%d %H:%M")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the telemetry archive.")
+    parser.add_argument("path", help="archive database (telemetry.sqlite)")
+    parser.add_argument("--device", help="device name (default: every device)")
+    parser.add_argument("--hours", type=float, default=24.0, help="how far back to look")
+    parser.add_argument("--bucket", type=float, default=3600.0, help="seconds per aggregate row")
+    parser.add_argument("--violations", action="store_true", help="issue flag counts per plant instead")
+    args = parser.parse_args(argv)
+
+    if not os.path.isfile(args.path):
+        raise SystemExit(f"No archive at {args.path}")
+    archive = TelemetryArchive(args.path, read_only=True)
+    t0 = time.time() - args.hours * 3600
+    try:
+        if args.violations:
+            for plant, counts in archive.violations(t0, device=args.device).items():
+                flags = ", ".join(f"{k} {v}" for k, v in counts.items() if k != "frames" and v)
+                print(f"{plant or '(no plant)'}: {counts['frames']} frames; {flags or 'no issues'}")
+            return
+        for device in [args.device] if args.device else archive.devices():
+            print(f"== {device}")
+            for field in ("temp_avg", "humidity_avg", "moisture_avg"):
+                for row in archive.aggregate(device, field, t0, bucket=args.bucket):
+                    if row["count"]:
+                        print(f"{_fmt_time(row['t'])}  {field:<13} n={row['count']:<6} mean={row['mean']:.2f} "
+                              f"min={row['min']:.2f} max={row['max']:.2f}")
+    except sqlite3.DatabaseError as e:
+        raise SystemExit(f"Can't read {args.path} as a telemetry archive: {e}")
+    finally:
+        archive.close()
+
+
+if __name__ == "__main__":
+    main()
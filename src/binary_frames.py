@@ -0,0 +1,177 @@
+"""Compact binary telemetry frames for the Arduino -> host link.
+
+The ASCII frame costs ~60 bytes per sample; a binary frame is 18:
+
+    0xA5 | length (14) | payload | CRC-16 (little-endian)
+
+The payload (FRAME_DTYPE, little-endian) holds temperature and humidity
+and their averages as float16, moisture and its average as int16 tenths,
+the air quality score and the seven issue flags packed into one byte (same
+bit order as recording.py). The CRC is CRC-16/CCITT (binascii.crc_hqx,
+start 0xFFFF) over the length byte and the payload.
+
+The host asks for binary mode with the `b` command; firmware that supports
+it answers "Binary mode" and switches, anything else stays on text lines.
+Text (answers to `d`, `r`, ...) can still be interleaved as whole lines
+between frames: it is plain ASCII, so it never contains the sync byte.
+FrameDecoder hands back only complete, printable text lines; anything else
+outside a frame is noise (e.g. a frame whose sync byte got corrupted).
+"""
+import binascii
+
+import numpy as np
+
+from telemetry import FLAG_FIELDS, TELEMETRY_DTYPE
+
+SYNC = 0xA5
+BINARY_COMMAND = "b"
+BINARY_ACK = "Binary mode"
+
+FRAME_DTYPE = np.dtype([
+    ("temp", "<f2"), ("humidity", "<f2"),
+    ("temp_avg", "<f2"), ("humidity_avg", "<f2"),
+    ("moisture", "<i2"), ("moisture_avg", "<i2"),  # tenths
+    ("quality", "u1"), ("flags", "u1"),
+])
+PAYLOAD_SIZE = FRAME_DTYPE.itemsize
+FRAME_SIZE = PAYLOAD_SIZE + 4
+_FLOAT_FIELDS = ("temp", "humidity", "temp_avg", "humidity_avg")
+_TENTHS_FIELDS = ("moisture", "moisture_avg")
+_TEXT_BYTES = bytes(range(0x20, 0x7F)) + b"\t\r"
+MAX_TEXT_LINE = 65536  # like LineBuffer.MAX_PARTIAL
+
+
+def _crc(body):
+    return binascii.crc_hqx(body, 0xFFFF)
+
+
+def encode_frames(records):
+    """TELEMETRY_DTYPE records -> the bytes the firmware would send."""
+    payload = np.empty(len(records), dtype=FRAME_DTYPE)
+    for name in _FLOAT_FIELDS:
+        payload[name] = records[name]
+    for name in _TENTHS_FIELDS:
+        payload[name] = np.clip(np.round(records[name] * 10), -32768, 32767)
+    payload["quality"] = records["quality"]
+    flags = np.zeros(len(records), dtype=np.uint8)
+    for bit, name in enumerate(FLAG_FIELDS):
+        flags |= (records[name].astype(np.uint8) & 1) << bit
+    payload["flags"] = flags
+
+    raw = payload.tobytes()
+    out = bytearray()
+    for i in range(0, len(raw), PAYLOAD_SIZE):
+        body = bytes([PAYLOAD_SIZE]) + raw[i:i + PAYLOAD_SIZE]
+        out += bytes([SYNC]) + body + _crc(body).to_bytes(2, "little")
+    return bytes(out)
+
+
+def decode_payloads(payloads):
+    """Concatenated FRAME_DTYPE payloads -> TELEMETRY_DTYPE records."""
+    rows = np.frombuffer(payloads, dtype=FRAME_DTYPE)
+    records = np.empty(len(rows), dtype=TELEMETRY_DTYPE)
+    for name in _FLOAT_FIELDS:
+        records[name] = rows[name]
+    for name in _TENTHS_FIELDS:
+        records[name] = rows[name] / 10.0
+    records["quality"] = rows["quality"]
+    for bit, name in enumerate(FLAG_FIELDS):
+        records[name] = (rows["flags"] >> bit) & 1
+    return records
+
+
+class FrameDecoder:
+    """Streaming decoder: feed() it raw chunks as they come off the port.
+
+    Frames may be split across chunks. When a sync byte's length or CRC
+    doesn't check out, the bytes after it up to the next sync (at most one
+    frame's worth) are dropped as noise and decoding resumes there, so a
+    corrupted frame costs only itself. Text outside frames is collected
+    into lines; a line with a non-printable byte in it, or one cut off by a
+    frame (the firmware never sends a frame mid-line), is dropped as noise
+    too. Counts are kept in `frames`, `crc_errors`, `bad_lengths`,
+    `garbled` (dropped text runs) and `noise_bytes`.
+    """
+
+    def __init__(self):
+        self.frames = 0
+        self.crc_errors = 0
+        self.bad_lengths = 0
+        self.garbled = 0
+        self.noise_bytes = 0
+        self._pending = b""
+        self._line = b""  # text line still waiting for its newline
+
+    @property
+    def errors(self):
+        return self.crc_errors + self.bad_lengths + self.garbled
+
+    def feed(self, chunk):
+        """Returns (TELEMETRY_DTYPE records, the clean text lines between
+        frames as bytes, each ending in a newline)."""
+        buf = self._pending + chunk
+        text = []
+        payloads = []
+        i, end = 0, len(buf)
+        while i < end:
+            j = buf.find(SYNC, i)
+            if j < 0:
+                self._text(buf[i:], text)
+                i = end
+                break
+            self._text(buf[i:j], text)
+            i = j
+            if end - j < 2:
+                break  # length byte still on its way
+            if buf[j + 1] != PAYLOAD_SIZE:
+                self.bad_lengths += 1
+                i = self._resync(buf, j)
+                continue
+            if end - j < FRAME_SIZE:
+                break  # rest of the frame still on its way
+            body = buf[j + 1:j + 2 + PAYLOAD_SIZE]
+            if _crc(body) != int.from_bytes(buf[j + 2 + PAYLOAD_SIZE:j + FRAME_SIZE], "little"):
+                self.crc_errors += 1
+                i = self._resync(buf, j)
+                continue
+            payloads.append(body[1:])
+            self._drop_line()
+            i = j + FRAME_SIZE
+        self._pending = buf[i:]
+        self.frames += len(payloads)
+        return decode_payloads(b"".join(payloads)), b"".join(text)
+
+    def _text(self, data, out):
+        """Adds bytes found between frames; complete clean lines go to `out`."""
+        if not data:
+            return
+        *lines, self._line = (self._line + data).split(b"\n")
+        for line in lines:
+            if line.translate(None, _TEXT_BYTES):
+                self.garbled += 1
+                self.noise_bytes += len(line) + 1
+            else:
+                out.append(line + b"\n")
+        if len(self._line) > MAX_TEXT_LINE:
+            self._drop_line()
+
+    def remainder(self):
+        """Bytes not handed out yet (a partial line or frame), for whoever
+        reads the port once the decoder is taken off it."""
+        rest, self._line, self._pending = self._line + self._pending, b"", b""
+        return rest
+
+    def _drop_line(self):
+        if self._line:
+            self.garbled += 1
+            self.noise_bytes += len(self._line)
+            self._line = b""
+
+    def _resync(self, buf, j):
+        """Where to carry on after a bad frame starting at `j`."""
+        stop = min(j + FRAME_SIZE, len(buf))
+        k = buf.find(SYNC, j + 1, stop)
+        k = stop if k < 0 else k
+        self.noise_bytes += k - j
+        self._drop_line()  # whatever text came before the noise is suspect
+        return k
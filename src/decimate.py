@@ -0,0 +1,128 @@
+import numpy as np
+
+
+def minmax_decimate(x, y, n_buckets):
+    """Reduce (x, y) to the min and max point of `n_buckets` equal buckets.
+
+    Peaks survive (unlike plain striding), and the result has at most
+    2 * n_buckets points. Trailing samples that don't fill a bucket are kept
+    as-is.
+    """
+    x, y = np.asarray(x), np.asarray(y)
+    size = len(y) // max(1, n_buckets)
+    if size < 2:
+        return x, y
+    full = (len(y) // size) * size
+    yb = y[:full].reshape(-1, size)
+    xb = x[:full].reshape(-1, size)
+    rows = np.arange(len(yb))
+    i_min, i_max = yb.argmin(axis=1), yb.argmax(axis=1)
+    first, second = np.minimum(i_min, i_max), np.maximum(i_min, i_max)
+    xs = np.column_stack([xb[rows, first], xb[rows, second]]).ravel()
+    ys = np.column_stack([yb[rows, first], yb[rows, second]]).ravel()
+    return np.concatenate([xs, x[full:]]), np.concatenate([ys, y[full:]])
+
+
+class MinMaxDecimator:
+    """Incrementally maintained min/max decimation of one TelemetryStore field.
+
+    Completed buckets are kept between updates, so each update only touches
+    the samples that arrived since the last one. When there are more than
+    `max_buckets` buckets, neighbours are merged pairwise and the bucket size
+    doubles, so the cost of a redraw stays bounded however long the run.
+    When the store evicts part of the oldest bucket, that bucket is redone
+    from the samples still held, so no point predates the store's first one.
+    X values are the samples' store timestamps (monotonic seconds).
+    """
+
+    def __init__(self, field, max_buckets=1000):
+        self.field = field
+        self.max_buckets = max_buckets
+        self.reset()
+
+    def reset(self):
+        self.bucket_size = 1
+        self._next = None  # absolute index of the first sample not yet bucketed
+        self._head = None  # absolute index of the first sample in the first bucket
+        self._x_lo = np.empty(0, dtype=np.float64)
+        self._y_lo = np.empty(0, dtype=np.float64)
+        self._x_hi = np.empty(0, dtype=np.float64)
+        self._y_hi = np.empty(0, dtype=np.float64)
+        self._end = np.empty(0, dtype=np.int64)  # last absolute index in each bucket
+
+    def update(self, store):
+        first = store.first_index
+        if self._next is None or self._next < first or self._next > store.total:
+            # First use, or the store wrapped past samples we never saw
+            self.reset()
+            self._next = first
+
+        # Drop buckets whose samples have all been evicted from the store
+        keep = self._end >= first
+        if not keep.all():
+            self._x_lo, self._y_lo = self._x_lo[keep], self._y_lo[keep]
+            self._x_hi, self._y_hi = self._x_hi[keep], self._y_hi[keep]
+            self._head = self._end[~keep][-1] + 1
+            self._end = self._end[keep]
+        if len(self._end) and self._head < first:
+            # The store evicted part of the oldest bucket: redo it from what's left
+            self._rebucket_head(store)
+
+        size = self.bucket_size
+        n_full = (store.total - self._next) // size
+        if n_full:
+            start = self._next - first
+            yb = np.asarray(store.field(self.field)[start:start + n_full * size], dtype=np.float64)
+            yb = yb.reshape(n_full, size)
+            tb = store.times()[start:start + n_full * size].reshape(n_full, size)
+            base = self._next + np.arange(n_full) * size
+            i_min, i_max = yb.argmin(axis=1), yb.argmax(axis=1)
+            lo, hi = np.minimum(i_min, i_max), np.maximum(i_min, i_max)
+            rows = np.arange(n_full)
+            if not len(self._end):
+                self._head = self._next
+            self._x_lo = np.concatenate([self._x_lo, tb[rows, lo]])
+            self._y_lo = np.concatenate([self._y_lo, yb[rows, lo]])
+            self._x_hi = np.concatenate([self._x_hi, tb[rows, hi]])
+            self._y_hi = np.concatenate([self._y_hi, yb[rows, hi]])
+            self._end = np.concatenate([self._end, base + size - 1])
+            self._next += n_full * size
+
+        while len(self._end) > self.max_buckets:
+            self._merge_pairs()
+
+    def _rebucket_head(self, store):
+        first = store.first_index
+        n = self._end[0] - first + 1
+        y = np.asarray(store.field(self.field)[:n], dtype=np.float64)
+        t = store.times()[:n]
+        lo, hi = sorted((y.argmin(), y.argmax()))
+        self._x_lo[0], self._y_lo[0] = t[lo], y[lo]
+        self._x_hi[0], self._y_hi[0] = t[hi], y[hi]
+        self._head = first
+
+    def _merge_pairs(self):
+        n = len(self._end) // 2 * 2
+        x = np.column_stack([self._x_lo[:n], self._x_hi[:n]]).reshape(-1, 4)
+        y = np.column_stack([self._y_lo[:n], self._y_hi[:n]]).reshape(-1, 4)
+        rows = np.arange(len(y))
+        i_min, i_max = y.argmin(axis=1), y.argmax(axis=1)
+        lo, hi = np.minimum(i_min, i_max), np.maximum(i_min, i_max)
+        # Points within a pair are already in x order, so column order = x order
+        self._x_lo = np.concatenate([x[rows, lo], self._x_lo[n:]])
+        self._y_lo = np.concatenate([y[rows, lo], self._y_lo[n:]])
+        self._x_hi = np.concatenate([x[rows, hi], self._x_hi[n:]])
+        self._y_hi = np.concatenate([y[rows, hi], self._y_hi[n:]])
+        self._end = np.concatenate([self._end[1:n:2], self._end[n:]])
+        self.bucket_size *= 2
+
+    def points(self, store):
+        """(x, y) ready for PlotDataItem.setData, including the unbucketed tail."""
+        if self.bucket_size == 1:
+            x, y = self._x_lo, self._y_lo
+        else:
+            x = np.column_stack([self._x_lo, self._x_hi]).ravel()
+            y = np.column_stack([self._y_lo, self._y_hi]).ravel()
+        tail_start = max(self._next or 0, store.first_index) - store.first_index
+        return (np.concatenate([x, store.times()[tail_start:]]),
+                np.concatenate([y, store.field(self.field)[tail_start:]]))
@@ -0,0 +1,126 @@
+import os
+import re
+
+from serial_reader import LineBuffer
+from serial_handler import SerialConnection, SerialEngine, CLOSED, open_port
+from telemetry_store import TelemetryStore, DEFAULT_CAPACITY
+from forecast import TelemetryForecaster
+from alerts import AlertEngine
+from rollups import Rollups
+
+
+class DeviceSession:
+    """Everything that belongs to one Arduino: its connection, incoming lines,
+    sample history, forecasts/alerts, recording and plant assignment.
+
+    Sessions are plain objects; the GUI hangs its per-device widgets (e.g.
+    `monitor`) and log writer on them.
+    """
+
+    def __init__(self, name, capacity=DEFAULT_CAPACITY):
+        self.name = name
+        self.port = None
+        self.baud = None
+        self.connection = None  # serial_handler.SerialConnection while connected
+        self.shown_state = CLOSED  # connection state the GUI last reported
+        self.buffer = LineBuffer()
+        self.store = TelemetryStore(capacity)
+        self.rollups = Rollups()  # long-range history at 1 s .. 1 h resolution
+        self.forecaster = TelemetryForecaster()
+        self.alerts = AlertEngine()
+        self.recording = None
+        self.plant_name = None
+        self.monitor = None
+        self.log = None
+
+    @property
+    def ser(self):
+        return self.connection.ser if self.connection else None
+
+    @property
+    def state(self):
+        return self.connection.state if self.connection else CLOSED
+
+    @property
+    def is_open(self):
+        """Connected, or waiting for the port to come back."""
+        return self.state != CLOSED
+
+    def __repr__(self):
+        return f"<DeviceSession {self.name} {'open' if self.is_open else 'closed'}>"
+
+
+def device_name(port):
+    """Short label for a port: "ttyACM0", "COM3", "sim"."""
+    if port.startswith("sim://"):
+        return "sim"
+    return os.path.basename(port.rstrip("/\\")) or port
+
+
+def slug(name):
+    """`name` made safe for use in a file name."""
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", name).strip("_") or "device"
+
+
+class DeviceManager:
+    """Owns the device sessions and the one SerialEngine (asyncio loop on a
+    background thread) that drives all their connections.
+
+    `opener(port, baud)` returns an open serial-like object; the default
+    handles "sim://" URLs too.
+    """
+
+    def __init__(self, opener=open_port, capacity=DEFAULT_CAPACITY, metrics=None, open_timeout=5.0):
+        self.opener = opener
+        self.capacity = capacity
+        self.metrics = metrics
+        self.open_timeout = open_timeout
+        self.sessions = []
+        self.engine = SerialEngine()
+        self.engine.start()
+
+    def new_session(self, name="device"):
+        session = DeviceSession(self._unique(name), self.capacity)
+        self.sessions.append(session)
+        return session
+
+    def _unique(self, name):
+        taken = {s.name for s in self.sessions}
+        if name not in taken:
+            return name
+        n = 2
+        while f"{name} ({n})" in taken:
+            n += 1
+        return f"{name} ({n})"
+
+    def find_port(self, port):
+        """The open session reading `port`, if any."""
+        for session in self.sessions:
+            if session.is_open and session.port == port:
+                return session
+        return None
+
+    def connect(self, session, port, baud):
+        """Opens `port` for `session` and starts reading it. Raises whatever
+        the opener raises (serial.SerialException, OSError, ValueError)."""
+        connection = SerialConnection(port, baud, opener=self.opener, metrics=self.metrics)
+        self.engine.call(connection.open(), self.open_timeout)
+        session.connection = connection
+        session.port, session.baud = port, baud
+        session.buffer = connection.buffer
+        session.shown_state = connection.state
+
+    def disconnect(self, session):
+        if session.connection is not None:
+            self.engine.call(session.connection.close(), self.open_timeout)
+        session.connection = None
+        session.shown_state = CLOSED
+
+    def remove(self, session):
+        self.disconnect(session)
+        self.sessions.remove(session)
+
+    def stop(self):
+        for session in self.sessions:
+            self.disconnect(session)
+        self.engine.stop()
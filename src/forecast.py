@@ -0,0 +1,118 @@
+import math
+
+FORECAST_FIELDS = ("temp_avg", "humidity_avg", "moisture_avg")
+HORIZONS = (60.0, 600.0, 3600.0)  # seconds ahead: 1, 10 and 60 minutes
+# What the sensors can physically report; a steep trend extrapolated for an
+# hour shouldn't predict 140 % humidity
+FIELD_LIMITS = {
+    "temp_avg": (-40.0, 80.0),
+    "humidity_avg": (0.0, 100.0),
+    "moisture_avg": (0.0, 1023.0),
+}
+
+
+class HoltForecaster:
+    """Holt's linear (level + trend) exponential smoothing for one series.
+
+    update() is O(1) per sample and keeps no history. The trend is stored
+    per second, so samples may arrive at an uneven rate as long as the
+    caller passes the time since the previous one.
+    """
+
+    def __init__(self, alpha=0.1, beta=0.005, warmup=10):
+        self.alpha = alpha
+        self.beta = beta
+        self.warmup = warmup
+        self.reset()
+
+    def reset(self):
+        self.level = None
+        self.trend = 0.0  # units per second
+        self.n = 0
+
+    def update(self, value, dt):
+        if not math.isfinite(value):
+            return  # a failed sensor read shouldn't poison the state
+        self.n += 1
+        if self.level is None:
+            self.level = value
+            return
+        dt = max(dt, 1e-6)
+        predicted = self.level + self.trend * dt
+        level = self.alpha * value + (1.0 - self.alpha) * predicted
+        self.trend = self.beta * (level - self.level) / dt + (1.0 - self.beta) * self.trend
+        self.level = level
+
+    @property
+    def ready(self):
+        return self.n >= self.warmup
+
+    def forecast(self, seconds):
+        """Expected value `seconds` after the last sample (None until warmed up)."""
+        if not self.ready:
+            return None
+        return self.level + self.trend * seconds
+
+
+class TelemetryForecaster:
+    """One HoltForecaster per plotted field, fed straight from ingest batches.
+
+    Frames come in bursts (one batch per timer tick, and frames read in the
+    same chunk share one arrival stamp), so the time between samples is
+    estimated by spreading each batch over the time since the previous one.
+    `period` is that estimate smoothed; it is the step used for a batch
+    with no usable gap before it (the first one, or a clock that didn't
+    move). Horizons and extension() are in seconds, like the plots' time
+    axis.
+    """
+
+    def __init__(self, fields=FORECAST_FIELDS, horizons=HORIZONS, **holt):
+        self.fields = fields
+        self.horizons = horizons
+        self.models = {name: HoltForecaster(**holt) for name in fields}
+        self.period = 1.0  # the Arduino prints about once a second
+        self._measured = False
+        self._last_t = None
+
+    def reset(self):
+        for model in self.models.values():
+            model.reset()
+        self._last_t = None
+
+    def update(self, records, t):
+        """Feeds a batch of TELEMETRY_DTYPE records that arrived at time `t`."""
+        n = len(records)
+        if not n:
+            return
+        if self._last_t is not None and t > self._last_t:
+            dt = (t - self._last_t) / n
+            if self._measured:
+                self.period += 0.1 * (dt - self.period)
+            else:
+                self.period, self._measured = dt, True
+        else:
+            dt = self.period
+        self._last_t = t
+        for name, model in self.models.items():
+            update = model.update
+            for value in records[name].tolist():
+                update(value, dt)
+
+    def forecasts(self, name):
+        """[(seconds ahead, value), ...] for every horizon, or [] while warming up."""
+        model = self.models[name]
+        if not model.ready:
+            return []
+        lo, hi = FIELD_LIMITS.get(name, (-math.inf, math.inf))
+        return [(h, min(hi, max(lo, model.forecast(h)))) for h in self.horizons]
+
+    def extension(self, name, last_t):
+        """x/y of a line from the newest sample (stamped `last_t`) out to each
+        horizon, in seconds like the plots' time axis."""
+        points = self.forecasts(name)
+        if not points or last_t is None:
+            return [], []
+        model = self.models[name]
+        xs = [last_t] + [last_t + h for h, _ in points]
+        ys = [model.level] + [y for _, y in points]
+        return xs, ys
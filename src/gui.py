@@ -1,19 +1,50 @@
 from PyQt5 import QtCore, QtWidgets, QtGui
 import serial
 from serial.tools import list_ports
-from collections import deque
 import numpy as np
 import pyqtgraph as pg
-from widgets import MetricCard, SerialMonitorWidget, MoistureCard
-import json
+from widgets import MetricCard, SerialMonitorWidget, MoistureCard, MetricsPanel
+from device_manager import DeviceManager, device_name, slug
+from telemetry import parse_telemetry_lines, classify_line, active_warnings, format_telemetry_line, HISTORY_INTERVAL_S
+from telemetry_store import WALL_OFFSET, wall_time
+from decimate import MinMaxDecimator, minmax_decimate
+from session_log import SessionLogWriter
+from recording import RecordingWriter
+from serial_handler import open_port, CONNECTED, RECONNECTING
+from binary_frames import BINARY_COMMAND
+from qt_async import AsyncBridge
+from metrics import MetricsRegistry
 import os
-from sklearn.linear_model import LinearRegression
+from suitability import evaluate as evaluate_suitability
+from plant_catalog import PlantCatalog
+from image_cache import PlantImageCache
+from archive import TelemetryArchive
 import datetime # Ensure datetime is imported at the top
+import time
+import asyncio
+import sqlite3
+
+# Raw samples kept per device; older history is drawn from the rollup tiers
+HISTORY_CAPACITY = 6 * 3600
+RENDER_FPS = 20  # upper bound on plot redraws per second
+PLOT_MAX_BUCKETS = 1000  # min/max buckets per curve for the full-history view
+SIMULATOR_URL = "sim://?rate=1"  # see simulator.py for the other options
+LOG_DIR = os.path.dirname(os.path.abspath(__file__))  # serial logs and recordings
+# Scaled plant images are kept here between runs; None turns the disk cache off
+THUMB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".thumbnails")
+# SQLite archive of frames, commands and analyses, kept in LOG_DIR; None turns it off
+ARCHIVE_NAME = "telemetry.sqlite"
+# Ask each Arduino for compact binary frames on connect (binary_frames.py);
+# firmware without binary mode ignores it and keeps sending text lines
+BINARY_FRAMES = False
 
 class AnalysisResultsDialog(QtWidgets.QDialog):
     def __init__(self, avg_temp, avg_hum, avg_moist, avg_aq, 
                  raw_temps, raw_hums, raw_moists, 
-                 suitable_plants, closest_plants_details, parent=None):
+                 suitable_plants, closest_plants_details, parent=None,
+                 end_time=None, interval=HISTORY_INTERVAL_S, host=None):
+        """`end_time` (epoch seconds) is when the history was received;
+        `host` maps a field name to (epoch times, values) recorded live."""
         super().__init__(parent)
         self.setWindowTitle("Detailed Analysis Results")
         self.setMinimumSize(1000, 950)
@@ -31,40 +62,18 @@ class AnalysisResultsDialog(QtWidgets.QDialog):
         summary_layout.addRow("Air Quality Score:", QtWidgets.QLabel(f"{avg_aq}"))
         main_layout.addWidget(summary_group)
 
-        # Time axis for 10-minute intervals
-        time_points = [i * 10 for i in range(len(raw_temps))]
-
-        # Temperature Plot (lines only, no markers)
-        self.raw_temps_plot = pg.PlotWidget()
-        self.raw_temps_plot.setTitle("Temperature Averages (10-minute intervals)")
-        self.raw_temps_plot.setLabel('left', 'Temperature', units='°C')
-        self.raw_temps_plot.setLabel('bottom', 'Time', units='minutes')
-        self.raw_temps_plot.plot(time_points, raw_temps, pen=pg.mkPen('#FF9800', width=2))
-        self.raw_temps_plot.setMinimumHeight(220)
-        self.raw_temps_plot.showGrid(x=True, y=True, alpha=0.3)
-        self.raw_temps_plot.getPlotItem().getAxis('bottom').setStyle(showValues=True, autoExpandTextSpace=True)
+        # The "d," history carries no timestamps: its newest point is "now"
+        # (when the Arduino answered) and the rest step back one firmware
+        # interval each. Host-side samples from the same window are drawn
+        # under it at the times they actually arrived.
+        self.end_time = time.time() if end_time is None else end_time
+        self.interval = interval
+        host = host or {}
+        self.raw_temps_plot = self._history_plot("Temperature", "°C", raw_temps, '#FF9800', host.get('temp_avg'))
         main_layout.addWidget(self.raw_temps_plot)
-
-        # Humidity Plot (lines only, no markers)
-        self.raw_hums_plot = pg.PlotWidget()
-        self.raw_hums_plot.setTitle("Humidity Averages (10-minute intervals)")
-        self.raw_hums_plot.setLabel('left', 'Humidity', units='%')
-        self.raw_hums_plot.setLabel('bottom', 'Time', units='minutes')
-        self.raw_hums_plot.plot(time_points, raw_hums, pen=pg.mkPen('#2196F3', width=2))
-        self.raw_hums_plot.setMinimumHeight(220)
-        self.raw_hums_plot.showGrid(x=True, y=True, alpha=0.3)
-        self.raw_hums_plot.getPlotItem().getAxis('bottom').setStyle(showValues=True, autoExpandTextSpace=True)
+        self.raw_hums_plot = self._history_plot("Humidity", "%", raw_hums, '#2196F3', host.get('humidity_avg'))
         main_layout.addWidget(self.raw_hums_plot)
-
-        # Moisture Plot (lines only, no markers)
-        self.raw_moists_plot = pg.PlotWidget()
-        self.raw_moists_plot.setTitle("Moisture Averages (10-minute intervals)")
-        self.raw_moists_plot.setLabel('left', 'Moisture')
-        self.raw_moists_plot.setLabel('bottom', 'Time', units='minutes')
-        self.raw_moists_plot.plot(time_points, raw_moists, pen=pg.mkPen('#8BC34A', width=2))
-        self.raw_moists_plot.setMinimumHeight(220)
-        self.raw_moists_plot.showGrid(x=True, y=True, alpha=0.3)
-        self.raw_moists_plot.getPlotItem().getAxis('bottom').setStyle(showValues=True, autoExpandTextSpace=True)
+        self.raw_moists_plot = self._history_plot("Moisture", None, raw_moists, '#8BC34A', host.get('moisture_avg'))
         main_layout.addWidget(self.raw_moists_plot)
 
         # Plant Suitability Section
@@ -95,14 +104,17 @@ class AnalysisResultsDialog(QtWidgets.QDialog):
                     elif j == 2:
                         unmet_summary = []
                         if not details['met_temp']:
-                            unmet_summary.append(f"Temp: {avg_temp:.1f}°C (Needs: {details['plant_temp_low']}-{details['plant_temp_high']}°C)")
+                            unmet_summary.append(f"Temp: {avg_temp:.1f}°C (Needs: {details['plant_temp_low']:g}-{details['plant_temp_high']:g}°C)")
                         if not details['met_hum']:
-                            unmet_summary.append(f"Hum: {avg_hum:.1f}% (Needs: {details['plant_hum_low']}-{details['plant_hum_high']}%)")
+                            unmet_summary.append(f"Hum: {avg_hum:.1f}% (Needs: {details['plant_hum_low']:g}-{details['plant_hum_high']:g}%)")
                         if not details['met_moist']:
-                            unmet_summary.append(f"Moist: {avg_moist:.1f} (Needs: {details['plant_moist_low']}-{details['plant_moist_high']})")
+                            unmet_summary.append(f"Moist: {avg_moist:.1f} (Needs: {details['plant_moist_low']:g}-{details['plant_moist_high']:g})")
                         if not details['met_aq']:
-                            unmet_summary.append(f"AQ: {avg_aq} (Needs >= {details['plant_aq_min']})")
-                        item = QtWidgets.QTableWidgetItem("; ".join(unmet_summary) if unmet_summary else "All conditions met")
+                            unmet_summary.append(f"AQ: {avg_aq} (Needs >= {details['plant_aq_min']:g})")
+                        in_range = (f"In range: temp {details['pct_temp']:.0f}%, hum {details['pct_hum']:.0f}%, "
+                                    f"moist {details['pct_moist']:.0f}% of the time")
+                        unmet_summary.append(in_range)
+                        item = QtWidgets.QTableWidgetItem("; ".join(unmet_summary))
                     # Set a consistent background color for all rows
                     item.setBackground(QtGui.QColor("#232834"))
                     item.setForeground(QtGui.QColor("#e0e6ed"))
@@ -119,7 +131,9 @@ class AnalysisResultsDialog(QtWidgets.QDialog):
         main_layout.addWidget(plant_suitability_group)
 
         # Timing info label at the very bottom
-        timing_label = QtWidgets.QLabel("Each point = 10 minutes, leftmost = oldest")
+        timing_label = QtWidgets.QLabel(
+            f"Arduino history: one point per {self.interval / 60:g} minutes, ending when it was received. "
+            "Thin line: samples recorded by this app.")
         timing_label.setAlignment(QtCore.Qt.AlignCenter)
         timing_label.setStyleSheet("color: #888; font-size: 13px; margin-top: 10px;")
         main_layout.addWidget(timing_label)
@@ -151,10 +165,27 @@ class AnalysisResultsDialog(QtWidgets.QDialog):
         dialog_layout.addWidget(scroll_area)
         self.setLayout(dialog_layout)
 
+    def _history_plot(self, name, units, values, colour, host_samples):
+        plot = pg.PlotWidget(axisItems={"bottom": pg.DateAxisItem()})
+        plot.setTitle(f"{name} Averages")
+        plot.setLabel('left', name, units=units)
+        plot.setLabel('bottom', 'Time')
+        values = np.asarray(values, dtype=np.float64)
+        times = self.end_time - self.interval * np.arange(len(values) - 1, -1, -1)
+        if host_samples is not None and len(host_samples[0]):
+            x, y = minmax_decimate(*host_samples, 1000)
+            plot.plot(x, y, pen=pg.mkPen(colour, width=1, style=QtCore.Qt.DotLine))
+        plot.plot(times, values, pen=pg.mkPen(colour, width=2), connect='finite')
+        plot.setMinimumHeight(220)
+        plot.showGrid(x=True, y=True, alpha=0.3)
+        plot.getPlotItem().getAxis('bottom').setStyle(showValues=True, autoExpandTextSpace=True)
+        return plot
+
     def _reset_arduino_data(self):
-        if self.parent_window and hasattr(self.parent_window, '_send_serial_message'):
+        if self.parent_window and hasattr(self.parent_window, '_request_reset'):
             try:
-                self.parent_window._send_serial_message('r', log_to_monitor=True)
+                if not self.parent_window._request_reset():
+                    raise RuntimeError("serial port not open")
                 QtWidgets.QMessageBox.information(self, "Reset Command Sent", 
                     "Reset command 'r' has been sent to Arduino.\nArduino should respond with 'Reset data'.")
             except Exception as e:
@@ -170,12 +201,23 @@ class MainWindow(QtWidgets.QMainWindow):
         self.setWindowTitle("🌿 Arduino Environment Monitor")
         self.resize(1100, 700)
 
-        self.ser = None
-        self.h_data = deque([0.0] * 50, maxlen=50)
-        self.t_data = deque([0.0] * 50, maxlen=50)
-        self.m_data = deque([0.0] * 50, maxlen=50)
+        # Per-stage timings and counters for the read -> parse -> store -> render -> log path
+        self.metrics = MetricsRegistry()
+        # Every Arduino gets a DeviceSession (port, line buffer, sample history,
+        # forecasts, alerts, plant, log); one shared thread reads all the ports.
+        # self.device is the session the window is showing, see the properties below.
+        self.devices = DeviceManager(self._open_serial, HISTORY_CAPACITY, metrics=self.metrics)
+        # Request/response helpers run on the devices' asyncio loop; this
+        # brings their results back to the GUI thread
+        self._bridge = AsyncBridge(self.devices.engine, self)
+        self.archive = self._open_archive()
+        self.device = self.devices.new_session("device")
         self.timer = QtCore.QTimer(self, interval=200) # Main timer for serial reads
         self.timer.timeout.connect(self._timer_tick)
+        # Separate render clock: ingestion only marks the plots dirty
+        self._plots_dirty = False
+        self.render_timer = QtCore.QTimer(self, interval=int(1000 / RENDER_FPS))
+        self.render_timer.timeout.connect(self._render_plots)
 
         self._apply_dark_theme()
 
@@ -185,7 +227,10 @@ class MainWindow(QtWidgets.QMainWindow):
         self.connect_btn = QtWidgets.QPushButton("Connect")
         self.refresh_btn.clicked.connect(self.refresh_ports)
         self.connect_btn.clicked.connect(self.toggle_connection)
-        self.refresh_ports()
+        # Port enumeration can take a while (esp. on Windows); do it once the
+        # window is up instead of before it is shown
+        self.port_combo.addItem("sim:// — Simulated Arduino (no hardware)", SIMULATOR_URL)
+        QtCore.QTimer.singleShot(0, self.refresh_ports)
         self.led = QtWidgets.QLabel()
         self.led.setFixedSize(16, 16)
         self._set_led("red")
@@ -222,55 +267,58 @@ class MainWindow(QtWidgets.QMainWindow):
         metrics_container.setFixedWidth(220)
 
         pg.setConfigOptions(antialias=True)
-        self.env_plot = pg.PlotWidget(title="Environmental Conditions")
-        self.env_plot.setLabel("bottom", "Samples (latest →)")
-        self.env_plot.showGrid(x=True, y=True)
-        self.env_plot.addLegend(offset=(10, 10))
-        self.env_plot.enableAutoRange(axis="y", enable=True)
-
-        self.h_curve = self.env_plot.plot(
-            self.h_data, pen=pg.mkPen("#2196F3", width=2), name="Humidity"
-        )
-        self.t_curve = self.env_plot.plot(
-            self.t_data, pen=pg.mkPen("#FF9800", width=2), name="Temperature"
-        )
 
         # Two separate plots for humidity and temperature
-        self.hum_plot = pg.PlotWidget(title="Humidity")
+        self.hum_plot = pg.PlotWidget(title="Humidity", axisItems={"bottom": pg.DateAxisItem()})
         self.hum_plot.setLabel("left", "Humidity (%)")
-        self.hum_plot.setLabel("bottom", "Samples (latest →)")
+        self.hum_plot.setLabel("bottom", "Time")
         self.hum_plot.showGrid(x=True, y=True)
         self.hum_plot.enableAutoRange(axis="y", enable=True)
         self.hum_plot.getPlotItem().getViewBox().setBackgroundColor(None)
         self.hum_plot.getPlotItem().setTitle("Humidity", size="18pt", color="#4CAF50")
-        self.hum_curve = self.hum_plot.plot(self.h_data, pen=pg.mkPen("#2196F3", width=2), name="Humidity")
+        self.hum_curve = self.hum_plot.plot([], [], pen=pg.mkPen("#2196F3", width=2), name="Humidity")
         # Threshold lines for humidity
         self.hum_thresh_low = self.hum_plot.addLine(y=0, pen=pg.mkPen("#FFC107", width=2, style=QtCore.Qt.DashLine))
         self.hum_thresh_high = self.hum_plot.addLine(y=0, pen=pg.mkPen("#4CAF50", width=2, style=QtCore.Qt.DashLine))
 
-        self.temp_plot = pg.PlotWidget(title="Temperature")
+        self.temp_plot = pg.PlotWidget(title="Temperature", axisItems={"bottom": pg.DateAxisItem()})
         self.temp_plot.setLabel("left", "Temperature (°C)")
-        self.temp_plot.setLabel("bottom", "Samples (latest →)")
+        self.temp_plot.setLabel("bottom", "Time")
         self.temp_plot.showGrid(x=True, y=True)
         self.temp_plot.enableAutoRange(axis="y", enable=True)
         self.temp_plot.getPlotItem().getViewBox().setBackgroundColor(None)
         self.temp_plot.getPlotItem().setTitle("Temperature", size="18pt", color="#FF9800")
-        self.temp_curve = self.temp_plot.plot(self.t_data, pen=pg.mkPen("#FF9800", width=2), name="Temperature")
+        self.temp_curve = self.temp_plot.plot([], [], pen=pg.mkPen("#FF9800", width=2), name="Temperature")
         # Threshold lines for temperature
         self.temp_thresh_low = self.temp_plot.addLine(y=0, pen=pg.mkPen("#FFC107", width=2, style=QtCore.Qt.DashLine))
         self.temp_thresh_high = self.temp_plot.addLine(y=0, pen=pg.mkPen("#4CAF50", width=2, style=QtCore.Qt.DashLine))
 
-        self.moisture_plot = pg.PlotWidget(title="Soil Moisture")
+        self.moisture_plot = pg.PlotWidget(title="Soil Moisture", axisItems={"bottom": pg.DateAxisItem()})
         self.moisture_plot.setLabel("left", "Moisture")
-        self.moisture_plot.setLabel("bottom", "Samples (latest →)")
+        self.moisture_plot.setLabel("bottom", "Time")
         self.moisture_plot.showGrid(x=True, y=True)
         self.moisture_plot.enableAutoRange(axis="y", enable=True)
         self.moisture_plot.getPlotItem().getViewBox().setBackgroundColor(None)
         self.moisture_plot.getPlotItem().setTitle("Soil Moisture", size="18pt", color="#8BC34A")
-        self.moisture_curve = self.moisture_plot.plot(self.m_data, pen=pg.mkPen("#8BC34A", width=2), name="Moisture")
+        self.moisture_curve = self.moisture_plot.plot([], [], pen=pg.mkPen("#8BC34A", width=2), name="Moisture")
         self.moisture_thresh_low = self.moisture_plot.addLine(y=0, pen=pg.mkPen("#FFC107", width=2, style=QtCore.Qt.DashLine))
         self.moisture_thresh_high = self.moisture_plot.addLine(y=0, pen=pg.mkPen("#4CAF50", width=2, style=QtCore.Qt.DashLine))
 
+        # Incremental min/max decimation between the store and each curve
+        self._decimated_curves = [
+            (self.hum_plot, self.hum_curve, MinMaxDecimator('humidity_avg', PLOT_MAX_BUCKETS)),
+            (self.temp_plot, self.temp_curve, MinMaxDecimator('temp_avg', PLOT_MAX_BUCKETS)),
+            (self.moisture_plot, self.moisture_curve, MinMaxDecimator('moisture_avg', PLOT_MAX_BUCKETS)),
+        ]
+        for plot, _, _ in self._decimated_curves:
+            plot.getPlotItem().getViewBox().sigXRangeChanged.connect(self._on_plot_range_changed)
+        # Dashed forecast extensions past the newest sample
+        self._forecast_curves = {}
+        for plot, curve, decimator in self._decimated_curves:
+            pen = pg.mkPen(curve.opts['pen'].color(), width=2, style=QtCore.Qt.DashLine)
+            self._forecast_curves[decimator.field] = plot.plot([], [], pen=pen, symbol='o', symbolSize=5,
+                                                              symbolBrush=pen.color())
+
         # Remove advice/status cards and plant table, add single plant widget
         # Remove advice_row, right_col, right_container, plant_table, and related widgets
         # Instead, add plant_widget and nav_layout to a new layout below main_row
@@ -293,8 +341,11 @@ class MainWindow(QtWidgets.QMainWindow):
         plots_and_btn.addWidget(autoscale_btn, alignment=QtCore.Qt.AlignRight)
 
         # Plant widget and navigation
-        self.current_plant_index = 0
         self._load_plant_data()
+        self.current_plant_index = 0
+        # Pick up edits made to plant_preferences.json outside the app
+        self._catalog_watcher = QtCore.QFileSystemWatcher([self.catalog.path], self)
+        self._catalog_watcher.fileChanged.connect(self._on_catalog_file_changed)
         self.plant_widget = QtWidgets.QGroupBox("Plant Preferences")
         plant_layout = QtWidgets.QGridLayout()
         plant_layout.setContentsMargins(16, 32, 16, 16)
@@ -312,7 +363,18 @@ class MainWindow(QtWidgets.QMainWindow):
         plant_layout.addWidget(self.hum_range_label, 1, 1)
         plant_layout.addWidget(self.aq_label, 2, 0)
         plant_layout.addWidget(self.moisture_label, 2, 1)
+        # Plant photo, decoded and scaled in the background by the image cache
+        self.image_cache = PlantImageCache(thumb_dir=THUMB_DIR, parent=self)
+        self.image_cache.ready.connect(self._on_plant_image_ready)
+        self.image_cache.failed.connect(self._on_plant_image_failed)
+        self._plant_image_path = None
+        self.plant_image_label = QtWidgets.QLabel()
+        self.plant_image_label.setAlignment(QtCore.Qt.AlignCenter)
+        self.plant_image_label.setFixedSize(200, 200)
+        self.plant_image_label.hide()
+        plant_layout.addWidget(self.plant_image_label, 0, 2, 3, 1)
         self._update_plant_widget()
+        self._update_threshold_lines()
         self.plant_widget.setLayout(plant_layout)
         self.plant_widget.setStyleSheet("QGroupBox { font-size: 18px; font-weight: bold; color: #4CAF50; border: 1.5px solid #4CAF50; border-radius: 8px; margin-top: 10px; padding-top: 18px; } QLabel { font-size: 16px; color: #e0e6ed; }")
 
@@ -351,18 +413,21 @@ class MainWindow(QtWidgets.QMainWindow):
         self.warning_label.setStyleSheet("color: #F44336; font-size: 16px; font-weight: bold; margin: 8px 0;")
         self.warning_label.setAlignment(QtCore.Qt.AlignCenter)
 
-        # --- Serial Monitor Panel ---
-        self.serial_monitor = SerialMonitorWidget()
-        self.serial_monitor.serial_send_btn.clicked.connect(self._send_serial_message)
-        self.serial_monitor.serial_input.returnPressed.connect(self._send_serial_message)
-
-        # Central place to store the last read line, processed by _timer_tick
-        self._last_raw_serial_line = None
+        # --- Device tabs + Serial Monitor Panel (one monitor per device) ---
+        self.device_tabs = QtWidgets.QTabBar()
+        self.device_tabs.setTabsClosable(True)
+        self.device_tabs.setExpanding(False)
+        self.device_tabs.setToolTip("Connected devices. Pick a port and press Connect to add another.")
+        self.monitor_stack = QtWidgets.QStackedWidget()
+        self._attach_device_ui(self.device)
+        self.device_tabs.currentChanged.connect(self._on_device_tab_changed)
+        self.device_tabs.tabCloseRequested.connect(self._close_device_tab)
 
         # Compose the main layout
         central = QtWidgets.QWidget()
         outer = QtWidgets.QVBoxLayout(central)
         outer.addLayout(topbar)
+        outer.addWidget(self.device_tabs)
         outer.addSpacing(10)
         outer.addLayout(plots_and_btn, 1)
         outer.addSpacing(10)
@@ -371,7 +436,7 @@ class MainWindow(QtWidgets.QMainWindow):
         outer.addWidget(self.progress_bar)  # Add progress bar to the layout
         outer.addWidget(self.analysis_progress)  # Add analysis progress bar
         outer.addWidget(self.warning_label)  # Add warning label to the layout
-        outer.addWidget(self.serial_monitor)
+        outer.addWidget(self.monitor_stack)
 
         # Wrap the central widget in a scroll area
         scroll_area = QtWidgets.QScrollArea()
@@ -394,10 +459,25 @@ class MainWindow(QtWidgets.QMainWindow):
         # Add a status bar for user feedback
         self.statusBar().showMessage("Ready. Select a port and connect to begin.")
 
+        # Pipeline metrics live in a dock that the status bar button toggles
+        self.metrics_panel = MetricsPanel(self.metrics)
+        self.metrics_panel.dump_requested.connect(self._dump_metrics)
+        self.metrics_dock = QtWidgets.QDockWidget("Metrics", self)
+        self.metrics_dock.setObjectName("metricsDock")
+        self.metrics_dock.setWidget(self.metrics_panel)
+        self.addDockWidget(QtCore.Qt.RightDockWidgetArea, self.metrics_dock)
+        self.metrics_dock.hide()
+        metrics_btn = QtWidgets.QToolButton()
+        metrics_btn.setDefaultAction(self.metrics_dock.toggleViewAction())
+        metrics_btn.setToolTip("Show per-stage timings of the serial pipeline.")
+        self.statusBar().addPermanentWidget(metrics_btn)
+
         self._last_serial_line = None
         self.is_collecting_analysis_data = False
         self.last_known_real_time_aq = None
-        self.raw_analysis_lines = [] # Initialize to store raw d, lines
+        self.analysis_history = None  # HistoryParser from the last 'd'
+        self._analysis_device = None  # session the running analysis reads from
+        self.port_combo.currentIndexChanged.connect(self._update_connection_controls)
 
     def _populate_baud_rates(self):
         for br in (9600, 19200, 38400, 57600, 115200, 250000):
@@ -408,9 +488,139 @@ class MainWindow(QtWidgets.QMainWindow):
         self.port_combo.clear()
         for p in list_ports.comports():
             self.port_combo.addItem(f"{p.device} — {p.description}", p.device)
+        # Always offer the built-in simulator so the app can run without hardware
+        self.port_combo.addItem("sim:// — Simulated Arduino (no hardware)", SIMULATOR_URL)
+
+    # --- Devices -------------------------------------------------------------
+    # The single-device code paths below talk to self.ser, self.store, ...;
+    # these route them to the session selected in the device tabs.
+
+    @property
+    def ser(self):
+        return self.device.ser
+
+    @property
+    def reader(self):
+        """Line buffer of the shown device while it is connected."""
+        return self.device.buffer if self.device.is_open else None
+
+    @property
+    def store(self):
+        return self.device.store
+
+    @property
+    def forecaster(self):
+        return self.device.forecaster
+
+    @property
+    def alerts(self):
+        return self.device.alerts
+
+    @property
+    def recording(self):
+        return self.device.recording
+
+    @property
+    def serial_monitor(self):
+        return self.device.monitor
+
+    @property
+    def session_log(self):
+        return self.device.log
+
+    @property
+    def current_plant_index(self):
+        """Catalog position of the shown device's plant (0 if it has none)."""
+        name = self.device.plant_name
+        index = self.catalog.index_of(name) if name else None
+        return 0 if index is None else index
+
+    @current_plant_index.setter
+    def current_plant_index(self, index):
+        plants = self.plant_data
+        self.device.plant_name = plants[index]['name'] if 0 <= index < len(plants) else None
+
+    def _device_plant(self, device):
+        return self.catalog.get(device.plant_name) if device.plant_name else None
+
+    def _attach_device_ui(self, device, tag=""):
+        """Gives `device` its serial monitor, session log and tab. `tag` goes
+        into its file names so several devices don't write the same log."""
+        device.tag = tag
+        monitor = SerialMonitorWidget()
+        monitor.serial_send_btn.clicked.connect(self._send_serial_message)
+        monitor.serial_input.returnPressed.connect(self._send_serial_message)
+        # Every monitor line is streamed to serial_log<tag>_<timestamp>.txt as it happens
+        device.log = SessionLogWriter(LOG_DIR, prefix=f"serial_log{tag}")
+        device.log.start()
+        monitor.log_sink = device.log.record
+        monitor.metrics = self.metrics
+        device.monitor = monitor
+        self.monitor_stack.addWidget(monitor)
+        self.device_tabs.blockSignals(True)  # the caller decides which tab to show
+        self.device_tabs.addTab(device.name)
+        self.device_tabs.blockSignals(False)
+
+    def _add_device(self, port):
+        """New session (and tab) for `port`, watching the same plant as the shown one."""
+        device = self.devices.new_session(device_name(port))
+        device.plant_name = self.device.plant_name
+        device.alerts.set_plant(self._device_plant(device))
+        self._attach_device_ui(device, tag=f"_{slug(device.name)}")
+        return device
+
+    def _show_device(self, device):
+        self.device_tabs.setCurrentIndex(self.devices.sessions.index(device))
+
+    def _on_device_tab_changed(self, index):
+        if not (0 <= index < len(self.devices.sessions)):
+            return
+        self.device = self.devices.sessions[index]
+        self.monitor_stack.setCurrentWidget(self.device.monitor)
+        # Redraw everything from the newly shown device's history
+        for _, _, decimator in self._decimated_curves:
+            decimator.reset()
+        self._plots_dirty = True
+        self._render_plots()
+        self._show_latest_sample()
+        self.plant_combo.blockSignals(True)
+        self.plant_combo.setCurrentIndex(self.current_plant_index)
+        self.plant_combo.blockSignals(False)
+        self._update_plant_widget()
+        self._update_threshold_lines()
+        self._update_connection_controls()
+
+    def _close_device_tab(self, index):
+        device = self.devices.sessions[index]
+        if device is self._analysis_device:
+            return  # let the analysis finish first
+        self._disconnect(device)
+        if len(self.devices.sessions) == 1:
+            return  # keep the last tab around, just disconnected
+        self.devices.remove(device)
+        device.log.close()
+        self.monitor_stack.removeWidget(device.monitor)
+        device.monitor.deleteLater()
+        self.device_tabs.removeTab(index)  # currentChanged picks the new device
+
+    def _update_connection_controls(self, *_):
+        """LED, Connect/Disconnect text and tab colours for the shown device."""
+        device = self.device
+        self._set_led({CONNECTED: "green", RECONNECTING: "orange"}.get(device.state, "red"))
+        selected = device.is_open and self.port_combo.currentData() == device.port
+        self.connect_btn.setText("Disconnect" if selected else "Connect")
+        for i, session in enumerate(self.devices.sessions):
+            self.device_tabs.setTabTextColor(i, QtGui.QColor("#4CAF50" if session.is_open else "#e0e6ed"))
+            self.device_tabs.setTabToolTip(i, f"{session.port or 'not connected'}"
+                                              f"{'' if session.is_open else ' (closed)'}")
 
     def toggle_connection(self):
-        (self._disconnect if self.ser and self.ser.is_open else self._connect)()
+        # Connect on another port adds a device; Disconnect only applies to
+        # the shown device's own port
+        if self.device.is_open and self.port_combo.currentData() == self.device.port:
+            self._disconnect()
+        else:
+            self._connect()
 
     def _connect(self):
         port = self.port_combo.currentData()
@@ -418,16 +628,67 @@ class MainWindow(QtWidgets.QMainWindow):
         if not port:
             QtWidgets.QMessageBox.warning(self, "No port", "Select a serial port.")
             return
+        existing = self.devices.find_port(port)
+        if existing is not None:
+            self._show_device(existing)
+            return
+        device = self.device
+        if device.port is None:
+            # The startup placeholder: name it after its port
+            device.name = device_name(port)
+            self.device_tabs.setTabText(self.devices.sessions.index(device), device.name)
+        elif device.is_open or device.port != port:
+            # Keep this device's history; the new port gets its own tab
+            device = self._add_device(port)
         try:
-            self.ser = serial.Serial(port, baud, timeout=0.05)
-        except serial.SerialException as e:
+            self.devices.connect(device, port, baud)
+        except (serial.SerialException, ValueError, OSError) as e:
             QtWidgets.QMessageBox.critical(self, "Connection failed", str(e))
+            self._update_connection_controls()
             return
-        self._set_led("green"); self.connect_btn.setText("Disconnect")
-        for w in (self.port_combo, self.baud_combo, self.refresh_btn):
-            w.setEnabled(False)
-        self.timer.start()
+        device.forecaster.reset()  # the trend from a previous session means nothing now
+        # Parsed frames are recorded in the compact binary format as well
+        self._start_recording(device)
+        if device is not self.device:
+            self._show_device(device)
+        self._update_connection_controls()
+        if not self.timer.isActive():
+            self.timer.start()
+            self.render_timer.start()
         # REMOVED: self._send_plant_thresholds_to_arduino() - No longer sending immediately on connect
+        if BINARY_FRAMES:
+            self._request_binary_frames(device)
+
+    def _request_binary_frames(self, device):
+        print(f"[SERIAL_OUT] {BINARY_COMMAND}")
+        self._archive_tx(device, BINARY_COMMAND)
+        device.monitor.append_tx(BINARY_COMMAND)
+        self._bridge.run(device.connection.negotiate_binary(),
+                         lambda ok, error: self._on_binary_negotiated(device, ok, error))
+
+    def _on_binary_negotiated(self, device, ok, error):
+        if ok:
+            device.monitor.append_info("[Serial] Arduino switched to binary frames.")
+        elif error is None:
+            device.monitor.append_info("[Serial] No binary mode on this Arduino; staying on text lines.")
+
+    def _open_archive(self):
+        if not ARCHIVE_NAME:
+            return None
+        path = os.path.join(LOG_DIR, ARCHIVE_NAME)
+        try:
+            return TelemetryArchive(path, metrics=self.metrics)
+        except (sqlite3.Error, OSError) as e:
+            print(f"[ERROR] Could not open the archive {path}: {e}")
+            return None
+
+    def _archive_tx(self, device, text):
+        if self.archive:
+            self.archive.add_command(device.name, text)
+
+    def _open_serial(self, port, baud):
+        """Opens a real port, or the simulator for "sim://..." URLs."""
+        return open_port(port, baud)
 
     def _send_serial_message(self, msg=None, log_to_monitor=True): # Added default for msg
         if msg is None: # Handle case where called by button click without explicit msg
@@ -436,65 +697,141 @@ class MainWindow(QtWidgets.QMainWindow):
                 return # Don't send empty message
             self.serial_monitor.serial_input.clear() # Clear input after getting text
 
-        if self.ser and self.ser.is_open: # Changed from self.serial_port to self.ser
+        if self.device.is_open:
             try:
-                final_msg = msg if msg.endswith('\\n') else msg + '\\n'
-                self.ser.write(final_msg.encode()) # Changed from self.serial_port to self.ser
+                self.device.connection.send(msg)  # adds the terminator; sent from the I/O loop
                 # Consistent logging
-                print(f"[SERIAL_OUT] {final_msg.strip()}")
+                print(f"[SERIAL_OUT] {msg}")
+                self._archive_tx(self.device, msg)
                 if log_to_monitor and self.serial_monitor:
-                    self.serial_monitor.append_tx(f"{final_msg.strip()}")
+                    self.serial_monitor.append_tx(msg)
             except Exception as e:
                 error_msg = f"Failed to send: {e}"
                 print(f"[ERROR] {error_msg}")
                 self.serial_monitor.append_error(error_msg)
 
-    def _disconnect(self):
-        self.timer.stop()
-        if self.ser and self.ser.is_open:
-            self.ser.close()
-        self.ser = None; self._set_led("red"); self.connect_btn.setText("Connect")
-        for w in (self.port_combo, self.baud_combo, self.refresh_btn):
-            w.setEnabled(True)
-
-    def _read_serial_line(self):
-        """Read and decode a line from the serial port."""
-        return self.ser.readline().decode("utf-8", "ignore").strip()
+    def _start_recording(self, device):
+        """(Re)opens `device`'s recording for the plant it is watching now.
+
+        One file per sensor and plant, appended to across sessions (see
+        replay.py to read it): the plant in a file's header is the one every
+        row in it was recorded under, so switching plants switches files.
+        """
+        if device.recording:
+            device.recording.close()
+            device.recording = None
+        plant = f"_{slug(device.plant_name)}" if device.plant_name else ""
+        path = os.path.join(LOG_DIR, f"recording_{slug(device.name)}{plant}.dlrec")
+        try:
+            device.recording = RecordingWriter(path, plant=device.plant_name, baud=device.baud, port=device.port)
+        except (OSError, ValueError) as e:  # ValueError: not a recording we can append to
+            device.monitor.append_error(f"Could not start recording: {e}")
+
+    def _follow_plant(self, device):
+        """Starts a new recording segment if `device`'s plant has changed."""
+        if device.recording and device.recording.plant != device.plant_name:
+            self._start_recording(device)
+
+    def _disconnect(self, device=None):
+        device = device or self.device
+        if device is self.device:
+            self._render_plots()  # flush anything that arrived since the last frame
+        self.devices.disconnect(device)
+        if device.recording:
+            device.recording.close()
+            device.recording = None
+        if not any(session.is_open for session in self.devices.sessions):
+            self.timer.stop()
+            self.render_timer.stop()
+        self._update_connection_controls()
 
     def _timer_tick(self):
-        if not (self.ser and self.ser.is_open):
+        devices = [d for d in self.devices.sessions if d.is_open]
+        if not devices:
             return
-
-        line = self._read_serial_line()
-        if not line:
+        # Process everything the I/O thread collected since the last tick, one
+        # device after the other. Runs of telemetry frames are parsed and
+        # displayed as a single batch.
+        self.metrics.gauge("reader_queue").set(sum(len(d.buffer.lines) for d in devices))
+        with self.metrics.stage("tick"):
+            for device in devices:
+                self._tick_device(device)
+
+    def _tick_device(self, device):
+        buffer = device.buffer
+        if device.state != device.shown_state:
+            self._on_device_state_changed(device)
+        if buffer.error is not None:
+            error_msg = f"Serial read failed on {device.name}: {buffer.error}"
+            print(f"[ERROR] {error_msg}")
+            device.monitor.append_error(error_msg)
+            self.statusBar().showMessage(error_msg)
+            self._disconnect(device)
             return
 
+        batch, stamps = [], []
+        for t, line in buffer.drain_stamped():
+            self._log_rx_line(line, device)
+            if classify_line(line) == "telemetry":
+                batch.append(line)
+                stamps.append(t)
+                continue
+            if batch:
+                self._ingest_telemetry_lines(batch, device, stamps)
+                batch, stamps = [], []
+            self._dispatch_serial_line(line, device)
+        if batch:
+            self._ingest_telemetry_lines(batch, device, stamps)
+        for t, records in buffer.drain_frames():
+            # Binary frames come decoded (and CRC checked) by the connection
+            for record in records:
+                self._log_rx_line(format_telemetry_line(record), device)
+            self._ingest_records(records, device, np.full(len(records), t))
+
+        if buffer.dropped:
+            self.metrics.gauge("lines_dropped").set(buffer.dropped)
+            self.statusBar().showMessage(f"Serial backlog overflow on {device.name}: "
+                                         f"{buffer.dropped} lines dropped.")
+
+    def _on_device_state_changed(self, device):
+        # The I/O loop reopens a dropped port by itself; just tell the user
+        connection = device.connection
+        if device.state == RECONNECTING:
+            msg = f"Lost {device.name} ({connection.last_error}); reconnecting..."
+            device.monitor.append_warning(f"[Serial] {msg}")
+        elif device.state == CONNECTED:
+            msg = f"Reconnected to {device.name}."
+            device.monitor.append_info(f"[Serial] {msg}")
+        self.statusBar().showMessage(msg)
+        device.shown_state = device.state
+        self._update_connection_controls()
+
+    def _log_rx_line(self, line, device=None):
         # Centralized logging for all incoming serial data
-        print(f"[SERIAL_IN] {line}")
-        self.serial_monitor.append_rx(line)
-
-        self._last_raw_serial_line = line # Store the raw line
-
-        # Conditional processing based on application state
-        if self.is_collecting_analysis_data:
-            self._handle_analysis_data_line(line)
-        else:
-            self._handle_normal_data_line(line)
-
-    def _show_forecast_result(self, result):
-        msg = f"Forecasted value for the next period: {result[0]:.2f}"
-        # self.log_message(f"[INFO] {msg}", level='info') # Assuming log_message is defined elsewhere or remove
-        QtWidgets.QMessageBox.information(self, "Forecast Result", msg)
-
-    def _send_plant_thresholds_to_arduino(self):
-        if self.ser and self.ser.is_open:
-            if not self.plant_data or not (0 <= self.current_plant_index < len(self.plant_data)):
+        device = device or self.device
+        with self.metrics.stage("stdout"):
+            print(f"[SERIAL_IN] {line}" if device is self.device else f"[SERIAL_IN {device.name}] {line}")
+        with self.metrics.stage("log"):
+            device.monitor.append_rx(line)
+
+    def _dispatch_serial_line(self, line, device=None):
+        # "d," history lines are picked up by the connection's fetch_history()
+        # request; they have been logged already and need nothing else here
+        if classify_line(line) == "history":
+            return
+        self._handle_normal_data_line(line, device or self.device)
+
+    def _send_plant_thresholds_to_arduino(self, device=None):
+        device = device or self.device
+        monitor = device.monitor
+        if device.is_open:
+            plant = self._device_plant(device)
+            if not plant:
                 print("[INFO] No plant data or invalid index to send thresholds for.")
-                if hasattr(self, 'serial_monitor') and self.serial_monitor:
-                    self.serial_monitor.append_info("[Thresholds] No plant data to send.")
+                if monitor:
+                    monitor.append_info("[Thresholds] No plant data to send.")
                 return
 
-            plant = self.plant_data[self.current_plant_index]
             
             temp_min = plant.get('temperature_low', 0)
             temp_max = plant.get('temperature_high', 100)
@@ -518,105 +855,192 @@ class MainWindow(QtWidgets.QMainWindow):
             msg = ",".join(msg_parts) + "\\\\n" # Ensure newline is correctly escaped for serial
             
             try:
-                self.ser.write(msg.encode())
+                device.connection.write(msg.encode())
                 log_msg = f"Thresholds: {msg.strip()}" # Use .strip() for cleaner log
                 print(f"[SERIAL_OUT] {log_msg}")
-                if self.serial_monitor:
-                    self.serial_monitor.append_tx(log_msg)
+                self._archive_tx(device, ','.join(msg_parts))
+                if monitor:
+                    monitor.append_tx(log_msg)
             except Exception as e:
                 error_msg = f"Failed to send plant thresholds: {e}"
                 print(f"[ERROR] {error_msg}")
-                if self.serial_monitor:
-                    self.serial_monitor.append_error(error_msg)
+                if monitor:
+                    monitor.append_error(error_msg)
         else:
             print("[INFO] Serial port not open. Cannot send thresholds.")
-            if hasattr(self, 'serial_monitor') and self.serial_monitor:
-                 self.serial_monitor.append_warning("[Thresholds] Serial port not open.")
+            if monitor:
+                 monitor.append_warning("[Thresholds] Serial port not open.")
 
     # Removed update_plot method, its logic is now in _handle_normal_data_line
 
-    def _handle_normal_data_line(self, line):
+    def _handle_normal_data_line(self, line, device=None):
         """Processes a serial line for normal data display and actions."""
-        # Logic from former update_plot()
-        # Special handling for Arduino startup messages
+        if self._handle_control_line(line, device):
+            return
+        # Other firmware text ("Plant monitoring!") is only shown in the
+        # monitor; it isn't a corrupted frame, so it isn't counted as rejected
+        if classify_line(line) == "telemetry":
+            self._ingest_telemetry_lines([line], device)
+
+    def _handle_control_line(self, line, device=None):
+        """Handles Arduino status messages. Returns True if the line was consumed."""
+        device = device or self.device
         if line == "Sensor ready.": # Send thresholds ONLY when "Sensor ready." is received
-            self._send_plant_thresholds_to_arduino()
-        elif line == "Reset data": # Handle Arduino reset confirmation
-            self.serial_monitor.append_info("[Arduino] Data reset confirmed by Arduino.")
+            self._send_plant_thresholds_to_arduino(device)
+            return True
+        if line == "Reset data": # confirmation box comes from _request_reset's callback
+            device.monitor.append_info("[Arduino] Data reset confirmed by Arduino.")
+            return True
+        return False
+
+    def _request_reset(self):
+        """Sends 'r' to the shown device; returns False if it isn't connected."""
+        device = self.device
+        if device.state != CONNECTED:
+            return False
+        print("[SERIAL_OUT] r")
+        self._archive_tx(device, 'r')
+        device.monitor.append_tx('r')
+        self._bridge.run(device.connection.reset(timeout=5.0),
+                         lambda _result, error: self._on_reset_done(device, error))
+        return True
+
+    def _on_reset_done(self, device, error):
+        if error is None:
             QtWidgets.QMessageBox.information(self, "Reset Confirmed", 
                 "Arduino has confirmed that all stored data has been reset.")
+        elif not isinstance(error, asyncio.CancelledError):
+            device.monitor.append_error(f"[Arduino] No reset confirmation: {error!r}")
+            QtWidgets.QMessageBox.warning(self, "Reset Failed", 
+                "Arduino did not confirm the reset ('Reset data') in time.")
+
+    def _ingest_telemetry_lines(self, lines, device=None, stamps=None):
+        """Parses a batch of telemetry frames and refreshes the display once.
+        `stamps` are the lines' arrival times (time.monotonic(); now if None)."""
+        device = device or self.device
+        with self.metrics.stage("parse"):
+            records, rejected = parse_telemetry_lines(lines)
+        self.metrics.counter("rejected_frames").inc(int(rejected.sum()))
+        if stamps is not None:
+            stamps = np.asarray(stamps, dtype=np.float64)[~rejected]
+        self._ingest_records(records, device, stamps)
+
+    def _ingest_records(self, records, device, stamps=None):
+        """Stores, rolls up, archives and shows already parsed records."""
+        self.metrics.counter("frames").inc(len(records))
+        if not len(records):
             return
-
-        if line.startswith("[") or "NaN" in line or line.startswith('d,'): # Corrected string literal
+        with self.metrics.stage("store"):
+            device.store.extend(records, stamps)
+        with self.metrics.stage("rollup"):
+            device.rollups.add(device.store.times(len(records)), records)
+        if self.archive:
+            with self.metrics.stage("archive"):  # just queues; the archive thread writes
+                self.archive.add_frames(device.name, wall_time(device.store.times(len(records))),
+                                        records, device.plant_name)
+        now = time.monotonic()
+        with self.metrics.stage("forecast"):
+            device.forecaster.update(records, now)
+            for alert in device.alerts.update(device.forecaster, now):
+                if alert.active:
+                    device.monitor.append_warning(f"[Alert] {alert.text()}")
+        if device.recording:
+            with self.metrics.stage("record"):
+                # same per-frame stamps as the store, as epoch seconds
+                device.recording.append(records, wall_time(device.store.times(len(records))))
+                device.recording.flush()
+
+        if device is self.device:
+            self._show_latest_sample(records[-1])
+
+    def _show_latest_sample(self, latest=None):
+        """Cards and warnings for the shown device; they only care about the newest frame."""
+        if latest is None:
+            if not len(self.store):
+                for card in (self.temp_card, self.hum_card, self.moisture_card, self.aq_card):
+                    card.set_value("–")
+                self.warning_label.setText("")
+                return
+            latest = self.store.latest()
+        self.last_known_real_time_aq = float(latest['quality'])
+
+        self.temp_card.set_value(f"{latest['temp']:.1f}")
+        self.hum_card.set_value(f"{latest['humidity']:.1f}")
+        self.moisture_card.set_value(f"{latest['moisture']:.0f}")
+        self._update_quality(int(latest['quality']))
+        self._plots_dirty = True  # picked up by the render clock
+
+        # Arduino flags (already out of range) first, then the predicted ones
+        lines = active_warnings(latest)
+        lines += [f"<span style='color:#FFC107'>{msg}</span>" for msg in self.alerts.active_messages()]
+        self.warning_label.setText("<br>".join(lines))
+
+    def _render_plots(self):
+        """Render clock tick: redraws the curves only if new samples arrived."""
+        if not self._plots_dirty:
             return
-
+        self._plots_dirty = False
+
+        with self.metrics.stage("render"):
+            for plot, curve, decimator in self._decimated_curves:
+                with self.metrics.stage("decimate"):
+                    x, y = self._curve_points(plot, decimator)
+                with self.metrics.stage("set_data"):
+                    curve.setData(wall_time(x), y)
+                    xs, ys = self.forecaster.extension(decimator.field, self.store.latest_time())
+                    self._forecast_curves[decimator.field].setData(wall_time(np.asarray(xs)), ys)
+
+    def _curve_points(self, plot, decimator):
+        """Min/max decimated points for the whole history or the zoomed-in
+        range: raw samples while the store still holds all of it, the
+        rollup tier that fits otherwise."""
+        store, rollups = self.store, self.device.rollups
+        decimator.update(store)
+        view_box = plot.getPlotItem().getViewBox()
+        raw_complete = store.total == len(store)
+        if view_box.autoRangeEnabled()[0] or not len(store):
+            if raw_complete:
+                return decimator.points(store)
+            return rollups.series(decimator.field, None, None, PLOT_MAX_BUCKETS)
+        # The x axis shows wall-clock time; the store is stamped with monotonic time
+        lo, hi = view_box.viewRange()[0]
+        lo, hi = lo - WALL_OFFSET, hi - WALL_OFFSET
+        if not raw_complete and lo < store.times()[0]:
+            return rollups.series(decimator.field, lo, hi, max(100, plot.width()))
+        start, stop = store.span(lo, hi)
+        # one sample either side so the line runs off the edges of the view
+        start, stop = max(0, start - 1), min(len(store), stop + 1)
+        return minmax_decimate(store.times()[start:stop],
+                               store.field(decimator.field)[start:stop], max(100, plot.width()))
+
+    def _on_plot_range_changed(self, view_box, _range):
+        # Panning/zooming by hand needs a redraw of the now visible samples
+        if not view_box.autoRangeEnabled()[0]:
+            self._plots_dirty = True
+
+    def _dump_metrics(self):
+        stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(LOG_DIR, f"metrics_{stamp}.json")
         try:
-            parts = [p.strip() for p in line.split(",")]
-            if len(parts) < 14:
-                return
-
-            temp = float(parts[0])
-            humidity = float(parts[1])
-            moisture = float(parts[2])
-            quality = int(parts[3])
-            temp_avg = float(parts[4])
-            humidity_avg = float(parts[5])
-            moisture_avg = float(parts[6])
-            temp_too_high = int(parts[7])
-            temp_too_low = int(parts[8])
-            humidity_too_low = int(parts[9])
-            humidity_too_high = int(parts[10])
-            soil_too_dry = int(parts[11])
-            soil_too_wet = int(parts[12])
-            air_quality_issue = int(parts[13])
-
-            self.last_known_real_time_aq = float(quality) 
-
-            self.temp_card.set_value(f"{temp:.1f}")
-            self.hum_card.set_value(f"{humidity:.1f}")
-            self.moisture_card.set_value(f"{moisture:.0f}")
-            self._update_quality(quality)
-
-            self.t_data.append(temp_avg)
-            self.h_data.append(humidity_avg)
-            self.m_data.append(moisture_avg)
-            x_raw = np.arange(len(self.h_data))
-            
-            if len(x_raw) > 1:
-                x_fine = np.linspace(x_raw[0], x_raw[-1], len(self.h_data) * 4)
-                h_interp = np.interp(x_fine, x_raw, list(self.h_data))
-                t_interp = np.interp(x_fine, x_raw, list(self.t_data))
-                m_interp = np.interp(x_fine, x_raw, list(self.m_data))
-                self.hum_curve.setData(x_fine, h_interp)
-                self.temp_curve.setData(x_fine, t_interp)
-                self.moisture_curve.setData(x_fine, m_interp)
-            elif len(x_raw) == 1: 
-                self.hum_curve.setData([x_raw[0]], [self.h_data[-1]])
-                self.temp_curve.setData([x_raw[0]], [self.t_data[-1]])
-                self.moisture_curve.setData([x_raw[0]], [self.m_data[-1]])
-
-
-            plant = self.plant_data[self.current_plant_index] if self.plant_data else None
-            if plant:
-                self.hum_thresh_low.setValue(plant.get('humidity_low', 0))
-                self.hum_thresh_high.setValue(plant.get('humidity_high', 100))
-                self.temp_thresh_low.setValue(plant.get('temperature_low', 0))
-                self.temp_thresh_high.setValue(plant.get('temperature_high', 100))
-                self.moisture_thresh_low.setValue(plant.get('moisture_low', 0))
-                self.moisture_thresh_high.setValue(plant.get('moisture_high', 1000))
-
-            warnings = []
-            if temp_too_high: warnings.append("Temperature is too high!")
-            if temp_too_low: warnings.append("Temperature is too low!")
-            if humidity_too_low: warnings.append("Humidity is too low!")
-            if humidity_too_high: warnings.append("Humidity is too high!")
-            if soil_too_dry: warnings.append("Soil is too dry!")
-            if soil_too_wet: warnings.append("Soil is too wet!")
-            if air_quality_issue: warnings.append("Air quality issue detected!")
-            self.warning_label.setText("<br>".join(warnings) if warnings else "")
-
-        except (ValueError, IndexError, TypeError) as e: 
-            pass 
+            self.metrics.dump(path)
+        except OSError as e:
+            self.serial_monitor.append_error(f"Could not write metrics: {e}")
+            return
+        print(f"[INFO] Metrics written to {path}")
+        self.statusBar().showMessage(f"Metrics written to {os.path.basename(path)}")
+
+    def _update_threshold_lines(self):
+        """Moves the dashed threshold lines (and the predictive alerts) to the
+        current plant's ranges."""
+        plant = self.plant_data[self.current_plant_index] if self.plant_data else None
+        self.alerts.set_plant(plant)
+        if plant:
+            self.hum_thresh_low.setValue(plant.get('humidity_low', 0))
+            self.hum_thresh_high.setValue(plant.get('humidity_high', 100))
+            self.temp_thresh_low.setValue(plant.get('temperature_low', 0))
+            self.temp_thresh_high.setValue(plant.get('temperature_high', 100))
+            self.moisture_thresh_low.setValue(plant.get('moisture_low', 0))
+            self.moisture_thresh_high.setValue(plant.get('moisture_high', 1000))
 
     # Removed _collect_analysis_sample method
 
@@ -655,24 +1079,53 @@ class MainWindow(QtWidgets.QMainWindow):
         pg.setConfigOption("foreground", "#e0e6ed")
 
     def closeEvent(self, ev):
-        # Save serial log with timestamp on close
-        import datetime
-        log_text = self.serial_monitor.serial_text.toPlainText()
-        if log_text.strip():
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            log_path = os.path.join(os.path.dirname(__file__), f"serial_log_{timestamp}.txt")
-            with open(log_path, "w", encoding="utf-8") as f:
-                f.write(log_text)
-        self._disconnect()
+        for device in self.devices.sessions:
+            self._disconnect(device)
+        self.devices.stop()
+        # The serial logs have been streamed to disk all along; just finish them
+        for device in self.devices.sessions:
+            device.log.close()
+        self.image_cache.wait(2000)
+        if self.archive:
+            self.archive.close()  # commits whatever is still queued
         super().closeEvent(ev)
 
+    @property
+    def plant_data(self):
+        """The catalog's plant dicts, in display order."""
+        return self.catalog.plants
+
     def _load_plant_data(self):
-        with open(os.path.join(os.path.dirname(__file__), 'plant_preferences.json'), 'r') as f:
-            self.plant_data = json.load(f)["plants"]
+        self.catalog = PlantCatalog(os.path.join(os.path.dirname(__file__), 'plant_preferences.json'))
 
     def _save_plant_data(self):
-        with open(os.path.join(os.path.dirname(__file__), 'plant_preferences.json'), 'w') as f:
-            json.dump({"plants": self.plant_data}, f, indent=2)
+        try:
+            self.catalog.save()
+        except OSError as e:
+            error_msg = f"Could not save plant preferences: {e}"
+            print(f"[ERROR] {error_msg}")
+            self.serial_monitor.append_error(error_msg)
+
+    def _on_catalog_file_changed(self, path):
+        # An atomic replace (ours or an editor's) drops the file from the watch list
+        if path not in self._catalog_watcher.files() and os.path.exists(path):
+            self._catalog_watcher.addPath(path)
+        current = self.plant_data[self.current_plant_index]['name'] if self.plant_data else None
+        try:
+            if not self.catalog.reload_if_changed():
+                return  # our own save, or nothing that matters
+        except (OSError, ValueError, KeyError) as e:
+            self.serial_monitor.append_error(f"Could not reload plant preferences: {e}")
+            return
+        index = self.catalog.index_of(current) if current else None
+        self.current_plant_index = index if index is not None else 0
+        self.serial_monitor.append_info("[Plants] plant_preferences.json changed on disk; reloaded.")
+        self._populate_plant_combo()
+        self._update_plant_widget()
+        self._update_threshold_lines()
+        for device in self.devices.sessions:
+            device.alerts.set_plant(self._device_plant(device))
+        self._follow_plant(self.device)
 
     def _populate_plant_combo(self):
         self.plant_combo.blockSignals(True)
@@ -685,15 +1138,10 @@ class MainWindow(QtWidgets.QMainWindow):
     def _on_plant_selected(self, idx):
         if 0 <= idx < len(self.plant_data):
             self.current_plant_index = idx
+            self._follow_plant(self.device)
             self._update_plant_widget()
             # Update threshold lines when plant changes
-            plant = self.plant_data[self.current_plant_index]
-            self.hum_thresh_low.setValue(plant.get('humidity_low', 0))
-            self.hum_thresh_high.setValue(plant.get('humidity_high', 100))
-            self.temp_thresh_low.setValue(plant.get('temperature_low', 0))
-            self.temp_thresh_high.setValue(plant.get('temperature_high', 100))
-            self.moisture_thresh_low.setValue(plant.get('moisture_low', 0))
-            self.moisture_thresh_high.setValue(plant.get('moisture_high', 1000))
+            self._update_threshold_lines()
             # Send new plant thresholds to Arduino
             self._send_plant_thresholds_to_arduino()
 
@@ -704,7 +1152,7 @@ class MainWindow(QtWidgets.QMainWindow):
             if hasattr(self, 'aq_label'): self.aq_label.setText("Min Air Quality Score: <b>N/A</b>")
             if hasattr(self, 'moisture_label'): self.moisture_label.setText("Preferred Moisture: <b>N/A</b>")
             # Clear image and other labels if plant data is not available
-            if hasattr(self, 'plant_image_label'): self.plant_image_label.setPixmap(QtGui.QPixmap())
+            if hasattr(self, 'plant_image_label'): self._show_plant_image(None)
             if hasattr(self, 'light_label'): self.light_label.setText("Preferred Light: <b>N/A</b>")
             if hasattr(self, 'plant_info_label'): self.plant_info_label.setText("General Info: <b>N/A</b>")
             self.plant_combo.setCurrentIndex(-1) # No plant selected or available
@@ -718,15 +1166,8 @@ class MainWindow(QtWidgets.QMainWindow):
             if image_path:
                 # Construct absolute path if image_path is relative
                 base_path = os.path.dirname(__file__)
-                abs_image_path = os.path.join(base_path, image_path) if not os.path.isabs(image_path) else image_path
-                pixmap = QtGui.QPixmap(abs_image_path) 
-                if pixmap.isNull():
-                    print(f"Warning: Image not found at {abs_image_path}. Check path.")
-                    self.plant_image_label.setText("Image not found")
-                else:
-                    self.plant_image_label.setPixmap(pixmap.scaled(200, 200, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation))
-            else:
-                self.plant_image_label.setPixmap(QtGui.QPixmap()) # Clear if no image path
+                image_path = os.path.join(base_path, image_path) if not os.path.isabs(image_path) else image_path
+            self._show_plant_image(image_path)
 
         # Update temperature and humidity labels (these are always present)
         self.temp_range_label.setText(f"Preferred Temperature: <b>{plant['temperature_low']}°C - {plant['temperature_high']}°C</b>")
@@ -766,11 +1207,35 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self.plant_combo.setCurrentIndex(self.current_plant_index)
 
+    def _show_plant_image(self, path):
+        """Shows the thumbnail for `path` (None hides the image). Never decodes
+        on the GUI thread: a cache miss shows a placeholder until it's ready."""
+        self._plant_image_path = path
+        if not path:
+            self.plant_image_label.clear()
+            self.plant_image_label.hide()
+            return
+        self.plant_image_label.show()
+        pixmap = self.image_cache.request(path)
+        if pixmap is not None:
+            self.plant_image_label.setPixmap(pixmap)
+        else:
+            self.plant_image_label.setText("Loading…")
+
+    def _on_plant_image_ready(self, path, pixmap):
+        if path == self._plant_image_path:  # the user may have moved on already
+            self.plant_image_label.setPixmap(pixmap)
+
+    def _on_plant_image_failed(self, path):
+        print(f"Warning: Image not found at {path}. Check path.")
+        if path == self._plant_image_path:
+            self.plant_image_label.setText("Image not found")
+
     def _remove_plant(self):
         if not self.plant_data:
             return
         idx = self.current_plant_index
-        removed_plant = self.plant_data.pop(idx)
+        self.catalog.remove(idx)
         self._save_plant_data()
         if self.plant_data:
             self.current_plant_index = min(idx, len(self.plant_data) - 1)
@@ -778,6 +1243,7 @@ class MainWindow(QtWidgets.QMainWindow):
             self.current_plant_index = 0
         self._populate_plant_combo()
         self._update_plant_widget()
+        self._update_threshold_lines()
 
     def _add_plant_dialog(self):
         dialog = QtWidgets.QDialog(self)
@@ -804,7 +1270,8 @@ class MainWindow(QtWidgets.QMainWindow):
             hum_low = hum_low_edit.value()
             hum_high = hum_high_edit.value()
             if name:
-                self.plant_data.append({
+                # Adding an existing name updates that plant instead of duplicating it
+                self.current_plant_index = self.catalog.add({
                     "name": name,
                     "temperature_low": temp_low,
                     "temperature_high": temp_high,
@@ -812,9 +1279,9 @@ class MainWindow(QtWidgets.QMainWindow):
                     "humidity_high": hum_high
                 })
                 self._save_plant_data()
-                self.current_plant_index = len(self.plant_data) - 1
                 self._populate_plant_combo()
                 self._update_plant_widget()
+                self._update_threshold_lines()
 
     def _start_analysis(self):
         if self.is_collecting_analysis_data:
@@ -822,100 +1289,58 @@ class MainWindow(QtWidgets.QMainWindow):
             self.statusBar().showMessage("Analysis collection already in progress.")
             return
 
-        if not (self.ser and self.ser.is_open):
+        if self.device.state != CONNECTED:
             self.serial_monitor.append_error("Cannot start analysis: Serial port not open.")
             self.statusBar().showMessage("Cannot start analysis: Serial port not open.")
             return
 
         try:
             print("[SERIAL_OUT] d")
+            self._archive_tx(self.device, 'd')
             self.serial_monitor.append_tx('d')
-            self.ser.write(b'd\\n')
-            
+            # Sends 'd' and parses the "d," answers on the I/O loop as they
+            # arrive (20 s timeout); _on_history_received gets them back here
+            future = self.device.connection.fetch_history(timeout=20.0)
+            self._bridge.run(future, self._on_history_received)
+
             self.is_collecting_analysis_data = True
-            self.raw_analysis_lines = []
+            # The dialog reads the shown device, so keep it shown until it's done
+            self._analysis_device = self.device
+            self.device_tabs.setEnabled(False)
+            self.analysis_history = None
             self.analysis_data_lists = []
             self.statusBar().showMessage("Waiting for 3 'd,' prefixed analysis data lists from Arduino...") # Changed 4 to 3
             self.serial_monitor.append_info("[Analysis] Sent 'd'. Waiting for 3 'd,' prefixed data lists.") # Changed 4 to 3
 
-            # Removed analysis_collection_timer
-
-            if hasattr(self, 'analysis_overall_timeout_timer') and self.analysis_overall_timeout_timer.isActive():
-                self.analysis_overall_timeout_timer.stop()
-            self.analysis_overall_timeout_timer = QtCore.QTimer(self)
-            self.analysis_overall_timeout_timer.setSingleShot(True)
-            self.analysis_overall_timeout_timer.timeout.connect(self._handle_analysis_collection_timeout)
-            self.analysis_overall_timeout_timer.start(20000) 
-
         except Exception as e:
             error_msg = f"Failed to send analysis command: {e}"
             print(f"[ERROR] {error_msg}")
             self.serial_monitor.append_error(error_msg)
             self.statusBar().showMessage(error_msg)
             self.is_collecting_analysis_data = False
-            if hasattr(self, 'analysis_overall_timeout_timer') and self.analysis_overall_timeout_timer.isActive():
-                self.analysis_overall_timeout_timer.stop()
-
-    # read_serial_data is not directly part of the main _timer_tick flow.
-    # It's kept for potential future use but needs logging consistency if activated.
-    def read_serial_data(self):
-        if self.is_collecting_analysis_data: 
-            return
-
-        if not (self.ser and self.ser.is_open):
-            return
-
-        line = self._read_serial_line()
-        if line:
-            # If this method were actively used, ensure GUI logging matches terminal logging
-            # print(f\"[SERIAL_IN_READ_SERIAL_DATA] {line}\") # Example for terminal
-            self.serial_monitor.append_rx(line) 
-
-            if not line.startswith('d,'): 
-                try:
-                    parts = [p.strip() for p in line.split(",")]
-                    if len(parts) >= 14: 
-                        aq_value = float(parts[3]) 
-                        self.last_known_real_time_aq = aq_value
-                except (ValueError, IndexError):
-                    pass 
-            # self.process_serial_data(line) # This was commented out, keeping it so.
+            self._analysis_device = None
+            self.device_tabs.setEnabled(True)
 
     # Removed _collect_analysis_lists_step method
 
-    def _handle_analysis_data_line(self, line):
-        """Processes a serial line when in analysis data collection mode."""
+    def _on_history_received(self, history, error):
+        """fetch_history() finished (on the I/O loop): the parsed "d," lists, or an error."""
         if not self.is_collecting_analysis_data:
-            return 
-
-        if not (self.ser and self.ser.is_open):
-            self._finalize_analysis_collection(error=True, message="Serial not connected during analysis. Aborted.")
             return
-
-        try:
-            if line.startswith('d,'):
-                self.serial_monitor.append_info(f"[Analysis] Detected raw analysis line: {line}")
-                self.raw_analysis_lines.append(line)
-                self.serial_monitor.append_info(f"[Analysis] Stored raw line #{len(self.raw_analysis_lines)}.")
-            # Non-'d,' lines are already logged by _timer_tick but ignored here for collection purposes.
-
-            if len(self.raw_analysis_lines) == 3: # Changed 4 to 3
-                self.serial_monitor.append_info("[Analysis] Collected 3 raw 'd,' lines.") # Changed 4 to 3
-                self._finalize_analysis_collection(error=False)
-
-        except Exception as e:
-            error_msg = f"[Analysis] Error during analysis line processing: {e}"
-            print(f"[ERROR] {error_msg}") 
-            self.serial_monitor.append_error(error_msg) 
-            self._finalize_analysis_collection(error=True, message=error_msg)
+        if isinstance(error, asyncio.TimeoutError):
+            self._finalize_analysis_collection(error=True, message="Timed out waiting for 3 analysis lists.") # Changed 4 to 3
+            return
+        if error is not None:
+            self._finalize_analysis_collection(error=True, message=f"Analysis aborted: {error!r}")
+            return
+        self.analysis_history = history
+        self._history_received_at = time.monotonic()
+        self._finalize_analysis_collection(error=False)
 
     def _finalize_analysis_collection(self, error=False, message=""):
         self.is_collecting_analysis_data = False # Reset collection flag FIRST
-
-        if hasattr(self, 'analysis_collection_timer') and self.analysis_collection_timer.isActive():
-            self.analysis_collection_timer.stop()
-        if hasattr(self, 'analysis_overall_timeout_timer') and self.analysis_overall_timeout_timer.isActive():
-            self.analysis_overall_timeout_timer.stop()
+        self._analysis_device = None
+        self.device_tabs.setEnabled(True)
 
         if error:
             status_msg = message if message else "Analysis failed or timed out collecting raw lines."
@@ -923,43 +1348,35 @@ class MainWindow(QtWidgets.QMainWindow):
             self.statusBar().showMessage(status_msg)
             return
 
-        # Now parse the collected raw lines
-        self.serial_monitor.append_info("[Analysis] Proceeding to parse collected raw lines.")
-        self.analysis_data_lists = [] # Ensure it's clean before parsing
-        for i, raw_line in enumerate(self.raw_analysis_lines):
-            self.serial_monitor.append_info(f"[Analysis] Parsing raw line #{i+1}: {raw_line}")
-            line_clean = raw_line[2:].strip('[]').strip() # Remove 'd,' and brackets
-            if line_clean.endswith(','):
-                line_clean = line_clean[:-1]
-            
-            parsed_values = []
-            if not line_clean: # Handles cases like "d,[]" or "d," or "d,,,"
-                self.serial_monitor.append_warning(f"[Analysis] Raw line #{i+1} resulted in empty data after cleaning: '{raw_line}'.")
-            else:
-                for x_str in line_clean.split(','):
-                    x_str = x_str.strip()
-                    if x_str.lower() == 'nan':
-                        parsed_values.append(float('nan'))
-                    elif x_str == '':
-                        continue # Skip empty strings resulting from multiple commas e.g. val1,,val2
-                    else:
-                        try:
-                            parsed_values.append(float(x_str))
-                        except ValueError as e_parse:
-                            self.serial_monitor.append_error(f"[Analysis] Skipped non-numeric value '{x_str}' in raw line #{i+1}: {e_parse}")
-            
-            self.analysis_data_lists.append(parsed_values)
-            self.serial_monitor.append_info(f"[Analysis] Parsed list #{len(self.analysis_data_lists)} from raw line: {parsed_values}") 
+        # Already parsed on the I/O loop; one summary line instead of every value
+        history = self.analysis_history
+        print(f"[INFO] History: {history.summary()}")
+        if history.skipped or history.truncated or history.extra:
+            self.serial_monitor.append_warning(f"[Analysis] {history.summary()}")
+        else:
+            self.serial_monitor.append_info(f"[Analysis] {history.summary()}")
+        self.analysis_data_lists = list(history.series)
 
-        if len(self.analysis_data_lists) != 3: # Changed 4 to 3
-            self.serial_monitor.append_error(f"[Analysis] Error: Expected 3 parsed lists, got {len(self.analysis_data_lists)}. Check parsing logic.") # Changed 4 to 3
+        if len(self.analysis_data_lists) < 3:
+            self.serial_monitor.append_error(f"[Analysis] Error: Expected 3 parsed lists, got {len(self.analysis_data_lists)}.")
             self.statusBar().showMessage("Analysis error after parsing: Incorrect number of lists.")
             return
 
-        self.serial_monitor.append_info("[Analysis] Successfully parsed 3 analysis lists.") # Changed 4 to 3
-        
         aq_for_report = self.last_known_real_time_aq
-        if aq_for_report is not None:
+        aq_history = history.get("air_quality")
+        # The frames this app received itself over the same stretch as the history
+        received = self._history_received_at
+        span = HISTORY_INTERVAL_S * max(len(v) for v in history.series)
+        aq_host = self.store.window_stats("quality", received - span, received)
+        if aq_history is not None and np.isfinite(aq_history).any():
+            # Firmware that sends a fourth list gives the week's air quality directly
+            aq_for_report = float(np.nanmean(aq_history))
+            self.serial_monitor.append_info(f"[Analysis] Using Air Quality averaged over the history: {aq_for_report:.2f}")
+        elif aq_host["count"]:
+            aq_for_report = aq_host["mean"]
+            self.serial_monitor.append_info(f"[Analysis] Using Air Quality averaged over {aq_host['count']} "
+                                            f"real-time frames from the same period: {aq_for_report:.2f}")
+        elif aq_for_report is not None:
             self.serial_monitor.append_info(f"[Analysis] Using Air Quality from last real-time normal data: {aq_for_report:.2f}") 
         else:
             self.serial_monitor.append_warning("[Analysis] No real-time Air Quality data available for report.")
@@ -970,40 +1387,6 @@ class MainWindow(QtWidgets.QMainWindow):
         self._show_analysis_result_lists()
         self.statusBar().showMessage("Analysis complete.")
 
-    def _handle_analysis_collection_timeout(self):
-        if self.is_collecting_analysis_data: 
-            self._finalize_analysis_collection(error=True, message="Timed out waiting for 3 analysis lists.") # Changed 4 to 3
-
-    def _calculate_plant_match_details(self, plant, avg_temp, avg_hum, avg_moist, avg_aq):
-        score = 0
-        details = {
-            'name': plant['name'],
-            'score': 0,
-            'met_temp': False, 'plant_temp_low': plant['temperature_low'], 'plant_temp_high': plant['temperature_high'],
-            'met_hum': False, 'plant_hum_low': plant['humidity_low'], 'plant_hum_high': plant['humidity_high'],
-            'met_moist': False, 'plant_moist_low': plant.get('moisture_low', 0), 'plant_moist_high': plant.get('moisture_high', 1000),
-            'met_aq': False, 'plant_aq_min': plant.get('air_quality_score_min', 0)
-        }
-
-        if plant['temperature_low'] <= avg_temp <= plant['temperature_high']:
-            score += 1
-            details['met_temp'] = True
-        
-        if plant['humidity_low'] <= avg_hum <= plant['humidity_high']:
-            score += 1
-            details['met_hum'] = True
-
-        if plant.get('moisture_low', 0) <= avg_moist <= plant.get('moisture_high', 1000):
-            score += 1
-            details['met_moist'] = True
-        
-        if avg_aq >= plant.get('air_quality_score_min', 0):
-            score += 1
-            details['met_aq'] = True
-        
-        details['score'] = score
-        return details
-
     def _show_analysis_result_lists(self):
         if len(self.analysis_data_lists) < 3: 
             QtWidgets.QMessageBox.information(self, "Analysis Result", f"Incomplete data received for report. Expected 3 lists, got {len(self.analysis_data_lists)}.")
@@ -1015,20 +1398,20 @@ class MainWindow(QtWidgets.QMainWindow):
             self.progress_bar.hide()
             return
 
-        temps_raw, hums_raw, moistures_raw = self.analysis_data_lists[0], self.analysis_data_lists[1], self.analysis_data_lists[2]
-        
-        temps = [v for v in temps_raw if isinstance(v, (int, float)) and not np.isnan(v)]
-        hums = [v for v in hums_raw if isinstance(v, (int, float)) and not np.isnan(v)]
-        moistures = [v for v in moistures_raw if isinstance(v, (int, float)) and not np.isnan(v)]
+        temps_raw, hums_raw, moistures_raw = (np.asarray(v, dtype=np.float32) for v in self.analysis_data_lists[:3])
+
+        temps = temps_raw[np.isfinite(temps_raw)]
+        hums = hums_raw[np.isfinite(hums_raw)]
+        moistures = moistures_raw[np.isfinite(moistures_raw)]
 
-        if not temps or not hums or not moistures: 
+        if not len(temps) or not len(hums) or not len(moistures):
             QtWidgets.QMessageBox.information(self, "Analysis Result", "No valid numeric data in the first three lists for analysis report after filtering NaNs and non-numeric values.")
             self.progress_bar.hide()
             return
 
-        avg_temp = sum(temps) / len(temps)
-        avg_hum = sum(hums) / len(hums)
-        avg_moist = sum(moistures) / len(moistures)
+        avg_temp = float(temps.mean(dtype=np.float64))
+        avg_hum = float(hums.mean(dtype=np.float64))
+        avg_moist = float(moistures.mean(dtype=np.float64))
         
         # Ensure avg_aq is a number before rounding, handle if it's None or non-numeric string
         try:
@@ -1038,26 +1421,40 @@ class MainWindow(QtWidgets.QMainWindow):
              self.progress_bar.hide()
              return
 
-        suitable_plants = []
-        all_plant_match_details = []
+        # One vectorized pass over the whole catalog and the full week of
+        # history; plants are ranked by the share of time each metric was in range
+        result = evaluate_suitability(self.catalog.bounds(), temps_raw, hums_raw, moistures_raw, avg_aq)
+        suitable = result.suitable()
+        time_in_range = dict(zip(result.bounds.names, result.time_in_range))
+        suitable_plants = [f"{name}  ({time_in_range[name] * 100:.0f}% of the time in range)"
+                           for name in suitable]
 
-        for plant in self.plant_data:
-            match_details = self._calculate_plant_match_details(plant, avg_temp, avg_hum, avg_moist, avg_aq)
-            all_plant_match_details.append(match_details)
-            if match_details['score'] == 4: # All conditions met
-                suitable_plants.append(plant['name'])
-        
         closest_plants_details_for_dialog = []
-        if not suitable_plants and all_plant_match_details:
-            # Sort by score (descending), then by name (ascending) as a tie-breaker
-            all_plant_match_details.sort(key=lambda x: (-x['score'], x['name']))
-            closest_plants_details_for_dialog = all_plant_match_details[:3]
-
+        if not suitable_plants and len(result.bounds):
+            closest_plants_details_for_dialog = result.ranked(3)
+
+        if self.archive:
+            self.archive.add_analysis(self.device.name, {
+                "averages": {"temp": avg_temp, "humidity": avg_hum, "moisture": avg_moist, "air_quality": avg_aq},
+                "suitable": suitable,
+                "ranked": [{"name": d['name'], "score": d['score'], "time_in_range": d['time_in_range']}
+                           for d in result.ranked(10)],
+            }, plant=self.device.plant_name)
+
+        # What this app recorded itself over the same stretch, for comparison
+        # (from whichever rollup tier fits the span)
+        received = getattr(self, '_history_received_at', None) or time.monotonic()
+        span = HISTORY_INTERVAL_S * max(len(temps_raw), len(hums_raw), len(moistures_raw))
+        host = {}
+        for field in ('temp_avg', 'humidity_avg', 'moisture_avg'):
+            x, y = self.device.rollups.series(field, received - span, received)
+            host[field] = (wall_time(x), y)
         # Show the new detailed results dialog
         dialog = AnalysisResultsDialog(
             avg_temp, avg_hum, avg_moist, avg_aq,
             temps_raw, hums_raw, moistures_raw,
-            suitable_plants, closest_plants_details_for_dialog, self
+            suitable_plants, closest_plants_details_for_dialog, self,
+            end_time=wall_time(received), host=host
         )
         dialog.exec_()
 
@@ -1070,25 +1467,18 @@ class MainWindow(QtWidgets.QMainWindow):
         self.temp_plot.enableAutoRange(axis="x", enable=True)
         self.moisture_plot.enableAutoRange(axis="y", enable=True)
         self.moisture_plot.enableAutoRange(axis="x", enable=True)
-        self.env_plot.enableAutoRange(axis="y", enable=True)
-        self.env_plot.enableAutoRange(axis="x", enable=True)
 
     def _forecast_next(self):
-        # Use last N points for each series
-        N = 20
-        def forecast(data):
-            y = np.array(list(data)[-N:])
-            X = np.arange(len(y)).reshape(-1, 1)
-            if len(y) < 2 or np.all(y == y[0]): # Check if all elements are the same
-                return y[-1] if len(y) > 0 else 0 # Return last element or 0 if empty
-            model = LinearRegression().fit(X, y)
-            next_x = np.array([[len(y)]])
-            return float(model.predict(next_x)[0])
-        temp_pred = forecast(self.t_data)
-        hum_pred = forecast(self.h_data)
-        moist_pred = forecast(self.m_data)
-        msg = (f"Forecasted next values:\n"
-               f"Temperature: {temp_pred:.2f} °C\n"
-               f"Humidity: {hum_pred:.2f} %\n"
-               f"Moisture: {moist_pred:.2f}")
+        # The forecaster is kept up to date as frames arrive; just report it
+        rows = []
+        for name, label, unit in (("temp_avg", "Temperature", " °C"),
+                                  ("humidity_avg", "Humidity", " %"),
+                                  ("moisture_avg", "Moisture", "")):
+            points = self.forecaster.forecasts(name)
+            if not points:
+                rows.append(f"{label}: not enough data yet")
+                continue
+            rows.append(f"{label}: " + ", ".join(f"{value:.2f}{unit} in {seconds / 60:g} min"
+                                                  for seconds, value in points))
+        msg = "Forecasted values:\n" + "\n".join(rows)
         QtWidgets.QMessageBox.information(self, "Forecast Result", msg)
\ No newline at end of file
@@ -0,0 +1,112 @@
+import hashlib
+import os
+
+from PyQt5 import QtCore, QtGui
+
+THUMB_SIZE = 200
+PIXMAP_CACHE_KB = 20 * 1024  # QPixmapCache is process wide; this raises Qt's 10 MB default
+
+
+class _DecodeSignals(QtCore.QObject):
+    done = QtCore.pyqtSignal(str, QtGui.QImage)
+
+
+class _DecodeTask(QtCore.QRunnable):
+    """Loads and scales one image on a pool thread (QImage is thread safe,
+    QPixmap is not, so the conversion happens back on the GUI thread)."""
+
+    def __init__(self, path, size, thumb_path, signals):
+        super().__init__()
+        self.path = path
+        self.size = size
+        self.thumb_path = thumb_path
+        self.signals = signals
+
+    def run(self):
+        image = QtGui.QImage()
+        if self.thumb_path and os.path.exists(self.thumb_path):
+            image.load(self.thumb_path)
+        if image.isNull():
+            reader = QtGui.QImageReader(self.path)
+            reader.setAutoTransform(True)  # honour EXIF rotation of phone photos
+            # Let the decoder downsample (e.g. JPEG DCT scaling) before we do
+            full = reader.size()
+            if full.isValid() and max(full.width(), full.height()) > 2 * self.size:
+                reader.setScaledSize(full.scaled(2 * self.size, 2 * self.size, QtCore.Qt.KeepAspectRatio))
+            image = reader.read()
+            if not image.isNull():
+                image = image.scaled(self.size, self.size, QtCore.Qt.KeepAspectRatio,
+                                     QtCore.Qt.SmoothTransformation)
+                if self.thumb_path:
+                    self._save_thumb(image)
+        self.signals.done.emit(self.path, image)
+
+    def _save_thumb(self, image):
+        # The thumbnail is only a shortcut for the next start; without it the
+        # decoded image is still shown
+        try:
+            os.makedirs(os.path.dirname(self.thumb_path), exist_ok=True)
+            if not image.save(self.thumb_path, "PNG"):
+                raise OSError("QImage.save failed")
+        except OSError as e:
+            print(f"[ERROR] Could not write thumbnail {self.thumb_path}: {e}")
+
+
+class PlantImageCache(QtCore.QObject):
+    """Pre-scaled plant thumbnails, decoded off the GUI thread.
+
+    request() answers from QPixmapCache (LRU, in memory) when it can;
+    otherwise it returns None and emits `ready(path, pixmap)` once a pool
+    thread has decoded the file, or `failed(path)` if it couldn't. With a
+    `thumb_dir` the scaled images are also kept on disk, keyed by the
+    source file's path, size and mtime, so the next start skips the decode.
+    """
+    ready = QtCore.pyqtSignal(str, QtGui.QPixmap)
+    failed = QtCore.pyqtSignal(str)
+
+    def __init__(self, size=THUMB_SIZE, thumb_dir=None, parent=None):
+        super().__init__(parent)
+        self.size = size
+        self.thumb_dir = thumb_dir
+        self.pool = QtCore.QThreadPool(self)
+        self.pool.setMaxThreadCount(2)
+        self._pending = set()
+        self._signals = _DecodeSignals(self)
+        self._signals.done.connect(self._on_decoded)
+        QtGui.QPixmapCache.setCacheLimit(max(QtGui.QPixmapCache.cacheLimit(), PIXMAP_CACHE_KB))
+
+    def _key(self, path):
+        return f"plant-thumb:{self.size}:{path}"
+
+    def _thumb_path(self, path):
+        if not self.thumb_dir:
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        digest = hashlib.sha1(f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}|{self.size}"
+                              .encode()).hexdigest()
+        return os.path.join(self.thumb_dir, digest + ".png")
+
+    def request(self, path):
+        pixmap = QtGui.QPixmapCache.find(self._key(path))
+        if pixmap is not None and not pixmap.isNull():
+            return pixmap
+        if path not in self._pending:
+            self._pending.add(path)
+            self.pool.start(_DecodeTask(path, self.size, self._thumb_path(path), self._signals))
+        return None
+
+    def _on_decoded(self, path, image):
+        self._pending.discard(path)
+        if image.isNull():
+            self.failed.emit(path)
+            return
+        pixmap = QtGui.QPixmap.fromImage(image)
+        QtGui.QPixmapCache.insert(self._key(path), pixmap)
+        self.ready.emit(path, pixmap)
+
+    def wait(self, msecs=-1):
+        """Blocks until queued decodes have finished (used on shutdown)."""
+        return self.pool.waitForDone(msecs)
@@ -0,0 +1,155 @@
+import json
+import threading
+import time
+
+
+class Counter:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, n=1):
+        self.value += n
+
+
+class Gauge:
+    __slots__ = ("value", "max")
+
+    def __init__(self):
+        self.value = 0
+        self.max = 0
+
+    def set(self, value):
+        self.value = value
+        if value > self.max:
+            self.max = value
+
+
+class Histogram:
+    """Durations in nanoseconds, bucketed by powers of two.
+
+    observe() is a handful of integer operations, so it is cheap enough to
+    leave on in the hot path; percentiles are accurate to within 2x.
+    """
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self.buckets = [0] * 64
+
+    def observe(self, ns):
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+        self.buckets[min(63, ns.bit_length())] += 1
+
+    def percentile(self, q):
+        if not self.count:
+            return 0
+        rank = q / 100.0 * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                return min(1 << i, self.max)
+        return self.max
+
+
+class _Stage:
+    """Reusable context manager timing one pipeline stage into a Histogram."""
+    __slots__ = ("hist", "_t0")
+
+    def __init__(self, hist):
+        self.hist = hist
+        self._t0 = 0
+
+    def __enter__(self):
+        self._t0 = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.observe(time.perf_counter_ns() - self._t0)
+        return False
+
+
+class MetricsRegistry:
+    """Named counters, gauges and timing histograms for the ingest pipeline.
+
+    Metrics are created on first use and then only mutated in place, so the
+    hot paths never take a lock (a lost increment under thread contention is
+    an acceptable price for that).
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self._stages = {}
+        self._lock = threading.Lock()  # only guards creation
+
+    def _get(self, table, name, cls):
+        metric = table.get(name)
+        if metric is None:
+            with self._lock:
+                metric = table.setdefault(name, cls())
+        return metric
+
+    def counter(self, name):
+        return self._get(self.counters, name, Counter)
+
+    def gauge(self, name):
+        return self._get(self.gauges, name, Gauge)
+
+    def histogram(self, name):
+        return self._get(self.histograms, name, Histogram)
+
+    def stage(self, name):
+        """`with metrics.stage("parse"): ...` records the block's duration.
+
+        The returned object is cached per name; stages must not be nested
+        with themselves or used from two threads at once.
+        """
+        stage = self._stages.get(name)
+        if stage is None:
+            stage = self._stages[name] = _Stage(self.histogram(name))
+        return stage
+
+    def snapshot(self):
+        def hist(h):
+            return {
+                "count": h.count,
+                "mean_us": h.total / h.count / 1000.0 if h.count else 0.0,
+                "p50_us": h.percentile(50) / 1000.0,
+                "p99_us": h.percentile(99) / 1000.0,
+                "max_us": h.max / 1000.0,
+                "total_ms": h.total / 1e6,
+            }
+        return {
+            "uptime_s": time.time() - self.started,
+            "counters": {k: c.value for k, c in sorted(self.counters.items())},
+            "gauges": {k: {"value": g.value, "max": g.max} for k, g in sorted(self.gauges.items())},
+            "stages": {k: hist(h) for k, h in sorted(self.histograms.items())},
+        }
+
+    def format_text(self):
+        """Plain-text table of the current snapshot for the metrics panel."""
+        snap = self.snapshot()
+        lines = [f"{'stage':<10}{'count':>9}{'mean µs':>10}{'p99 µs':>10}{'max µs':>10}{'total ms':>11}"]
+        for name, h in snap["stages"].items():
+            lines.append(f"{name:<10}{h['count']:>9}{h['mean_us']:>10.1f}{h['p99_us']:>10.1f}"
+                         f"{h['max_us']:>10.1f}{h['total_ms']:>11.1f}")
+        lines.append("")
+        for name, value in snap["counters"].items():
+            lines.append(f"{name:<24}{value:>12}")
+        for name, g in snap["gauges"].items():
+            lines.append(f"{name:<24}{g['value']:>12}  (max {g['max']})")
+        return "\n".join(lines)
+
+    def dump(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
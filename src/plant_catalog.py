@@ -0,0 +1,136 @@
+import json
+import os
+import shutil
+import tempfile
+
+from suitability import PlantBounds
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "plant_preferences.json")
+
+
+class PlantCatalog:
+    """plant_preferences.json held in memory, indexed by plant name.
+
+    Reads hit the in-memory list and a name -> position dict; the file is
+    only read again when its mtime/size changes (reload_if_changed), and is
+    only rewritten when something was actually edited. Writes go to a temp
+    file in the same directory that is then renamed over the original, so a
+    crash mid-save never leaves a truncated catalog behind.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.plants = []
+        self._index = {}
+        self._bounds = None
+        self._stat = None
+        self._dirty = False
+        self.load()
+
+    @staticmethod
+    def _key(name):
+        return name.strip().lower()
+
+    def _file_stat(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def load(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            self.plants = json.load(f)["plants"]
+        self._stat = self._file_stat()
+        self._dirty = False
+        self._changed()
+
+    def reload_if_changed(self):
+        """Re-reads the file if someone else modified it; returns True if it did."""
+        stat = self._file_stat()
+        if stat is None or stat == self._stat:
+            return False
+        self.load()
+        return True
+
+    def _changed(self):
+        self._index = {self._key(p["name"]): i for i, p in enumerate(self.plants)}
+        self._bounds = None  # suitability matrix is rebuilt on next use
+
+    def __len__(self):
+        return len(self.plants)
+
+    def __iter__(self):
+        return iter(self.plants)
+
+    def __getitem__(self, i):
+        return self.plants[i]
+
+    def __contains__(self, name):
+        return self._key(name) in self._index
+
+    def index_of(self, name):
+        """Position of `name` (case-insensitive), or None."""
+        return self._index.get(self._key(name))
+
+    def get(self, name, default=None):
+        i = self.index_of(name)
+        return default if i is None else self.plants[i]
+
+    def bounds(self):
+        """The catalog as a PlantBounds matrix, built once per change."""
+        if self._bounds is None:
+            self._bounds = PlantBounds.from_plants(self.plants)
+        return self._bounds
+
+    def add(self, plant):
+        """Adds `plant`, replacing any plant of the same name; returns its index."""
+        i = self.index_of(plant["name"])
+        if i is None:
+            self.plants.append(plant)
+            i = len(self.plants) - 1
+        else:
+            self.plants[i] = plant
+        self._dirty = True
+        self._changed()
+        return i
+
+    def remove(self, i):
+        """Removes and returns the plant at position `i`."""
+        plant = self.plants.pop(i)
+        self._dirty = True
+        self._changed()
+        return plant
+
+    def save(self):
+        """Writes the catalog if it was edited. Atomic: temp file + rename."""
+        if not self._dirty:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(prefix=".plant_preferences.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"plants": self.plants}, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            _copy_mode(self.path, tmp)  # mkstemp makes it 0600
+            os.replace(tmp, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        self._stat = self._file_stat()
+        self._dirty = False
+
+
+def _copy_mode(src, dst):
+    """Gives `dst` the permissions of `src`, or the usual 0666 minus the
+    umask if `src` doesn't exist yet."""
+    if os.path.exists(src):
+        shutil.copymode(src, dst)
+        return
+    umask = os.umask(0)
+    os.umask(umask)
+    os.chmod(dst, 0o666 & ~umask)
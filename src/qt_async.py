@@ -0,0 +1,34 @@
+from PyQt5 import QtCore
+
+
+class AsyncBridge(QtCore.QObject):
+    """Runs coroutines on a SerialEngine's loop and hands the outcome back
+    to the Qt thread.
+
+    The asyncio loop and Qt's loop each keep their own thread; run() is the
+    one crossing point. `callback(result, error)` is invoked on the thread
+    that owns the bridge (the GUI thread) through a queued signal, with
+    `error` set (and `result` None) if the coroutine raised or timed out.
+    """
+    _finished = QtCore.pyqtSignal(object, object, object)  # callback, result, error
+
+    def __init__(self, engine, parent=None):
+        super().__init__(parent)
+        self.engine = engine
+        self._finished.connect(self._deliver)
+
+    def run(self, coro, callback=None):
+        future = self.engine.submit(coro)
+        if callback is not None:
+            future.add_done_callback(lambda f: self._finished.emit(callback, *self._outcome(f)))
+        return future
+
+    @staticmethod
+    def _outcome(future):
+        try:
+            return future.result(), None
+        except BaseException as e:  # includes CancelledError
+            return None, e
+
+    def _deliver(self, callback, result, error):
+        callback(result, error)
@@ -0,0 +1,151 @@
+"""Compact binary recording of parsed telemetry.
+
+A recording file is an 8-byte magic, a little-endian uint32 header length,
+a JSON header (schema, plant, port, baud, creation time) padded to 8 bytes,
+then fixed-width RECORD_DTYPE rows (34 bytes each vs ~60 for a text line):
+a float64 UNIX timestamp, the six readings as float32, the air quality score
+and the seven issue flags packed into one byte. Rows are only ever appended,
+so a reader can memory-map the file and slice it without parsing anything.
+"""
+import datetime
+import json
+import os
+import struct
+
+import numpy as np
+
+from telemetry import TELEMETRY_DTYPE, FLAG_FIELDS
+
+MAGIC = b"DLREC\x00\x01\x00"
+FORMAT_VERSION = 1
+
+VALUE_FIELDS = ("temp", "humidity", "moisture", "temp_avg", "humidity_avg", "moisture_avg")
+RECORD_DTYPE = np.dtype(
+    [("t", "<f8")]
+    + [(name, "<f4") for name in VALUE_FIELDS]
+    + [("quality", "u1"), ("flags", "u1")]
+)
+
+
+def pack_records(records, t):
+    """TELEMETRY_DTYPE records + timestamps -> RECORD_DTYPE rows."""
+    rows = np.empty(len(records), dtype=RECORD_DTYPE)
+    rows["t"] = t
+    for name in VALUE_FIELDS:
+        rows[name] = records[name]
+    rows["quality"] = records["quality"]
+    flags = np.zeros(len(records), dtype=np.uint8)
+    for bit, name in enumerate(FLAG_FIELDS):
+        flags |= (records[name].astype(np.uint8) & 1) << bit
+    rows["flags"] = flags
+    return rows
+
+
+def unpack_records(rows):
+    """RECORD_DTYPE rows -> TELEMETRY_DTYPE records (timestamps are dropped)."""
+    records = np.empty(len(rows), dtype=TELEMETRY_DTYPE)
+    for name in VALUE_FIELDS:
+        records[name] = rows[name]
+    records["quality"] = rows["quality"]
+    for bit, name in enumerate(FLAG_FIELDS):
+        records[name] = (rows["flags"] >> bit) & 1
+    return records
+
+
+class RecordingWriter:
+    """Append-only writer; reopening an existing file continues it, so one
+    file per sensor can hold months of sessions. The header names a single
+    plant, so a file is only continued for that same plant (ValueError
+    otherwise); a different plant needs a file of its own."""
+
+    def __init__(self, path, plant=None, baud=None, port=None):
+        self.path = path
+        self.plant = plant
+        self._last_t = -np.inf
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        if exists:
+            header, offset = _read_header(path)
+            if header.get("plant") != plant:
+                raise ValueError(f"{path} records plant {header.get('plant')!r}, not {plant!r}")
+            # Drop a torn trailing row left by a crash before appending
+            rows = (os.path.getsize(path) - offset) // RECORD_DTYPE.itemsize
+            with open(path, "r+b") as f:
+                f.truncate(offset + rows * RECORD_DTYPE.itemsize)
+                if rows:
+                    f.seek(offset + (rows - 1) * RECORD_DTYPE.itemsize)
+                    self._last_t = float(np.frombuffer(f.read(RECORD_DTYPE.itemsize), RECORD_DTYPE)["t"][0])
+        self._file = open(path, "ab")
+        if not exists:
+            self._file.write(_encode_header({
+                "format": FORMAT_VERSION,
+                "fields": [[name, RECORD_DTYPE[name].str] for name in RECORD_DTYPE.names],
+                "flag_bits": list(FLAG_FIELDS),
+                "plant": plant,
+                "port": port,
+                "baud": baud,
+                "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            }))
+
+    def append(self, records, t):
+        if len(records):
+            # Readers binary-search on t, so never let it go backwards
+            # (e.g. the clock was set back between two sessions)
+            t = np.maximum.accumulate(np.maximum(np.asarray(t, dtype=np.float64), self._last_t))
+            self._last_t = float(t[-1])
+            self._file.write(pack_records(records, t).tobytes())
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+class RecordingReader:
+    """Memory-mapped view of a recording; nothing is read until it is sliced."""
+
+    def __init__(self, path):
+        self.path = path
+        self.header, offset = _read_header(path)
+        if self.header.get("format") != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported recording format {self.header.get('format')}")
+        rows = (os.path.getsize(path) - offset) // RECORD_DTYPE.itemsize
+        if rows:
+            self.rows = np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=offset, shape=(rows,))
+        else:
+            self.rows = np.empty(0, dtype=RECORD_DTYPE)
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def t(self):
+        return self.rows["t"]
+
+    def time_slice(self, t0=None, t1=None):
+        """Rows with t0 <= t < t1 (binary search; timestamps only grow)."""
+        t = self.rows["t"]
+        lo = 0 if t0 is None else np.searchsorted(t, t0, side="left")
+        hi = len(t) if t1 is None else np.searchsorted(t, t1, side="left")
+        return self.rows[lo:hi]
+
+    def telemetry(self, t0=None, t1=None):
+        rows = self.time_slice(t0, t1)
+        return unpack_records(rows), np.array(rows["t"])
+
+
+def _encode_header(header):
+    body = json.dumps(header).encode("utf-8")
+    prefix = len(MAGIC) + 4
+    body += b" " * (-(prefix + len(body)) % 8)
+    return MAGIC + struct.pack("<I", len(body)) + body
+
+
+def _read_header(path):
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a telemetry recording")
+        (length,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(length).decode("utf-8"))
+    return header, len(MAGIC) + 4 + length
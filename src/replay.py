@@ -0,0 +1,289 @@
+"""Headless replay and batch analysis of serial_log_*.txt files and
+recording_*.dlrec recordings.
+
+    python src/replay.py src/serial_log_*.txt
+    python -m src.replay --jobs 4 --export out/ --json logs/*.txt
+    python src/replay.py src/recording_sim_Basil.dlrec --since 2026-10-01 --until 2026-10-08
+
+Each log is streamed through the same line classification the GUI uses
+(RX/TX/INFO records, control messages, d, history lines, telemetry frames),
+one file per worker process. Threshold violations are counted against the
+thresholds the host last sent in that log ("[TX] Thresholds: ..."), or
+against --plant when given. Recordings are memory-mapped and only the rows
+between --since and --until are read; their violations are judged against
+--plant or the plant named in the recording. No Qt is imported, so this
+runs without a display.
+"""
+import argparse
+import csv
+import datetime
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+# Allow both `python src/replay.py` and `python -m src.replay`
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from plant_catalog import PlantCatalog
+from recording import RecordingReader, unpack_records
+from telemetry import (TELEMETRY_DTYPE, TELEMETRY_FIELDS, FLAG_FIELDS, classify_line,
+                       parse_telemetry_lines, parse_thresholds)
+
+CHUNK_LINES = 20000
+STAT_FIELDS = ("temp", "humidity", "moisture", "temp_avg", "humidity_avg", "moisture_avg")
+# metric -> (field checked, low key, high key)
+LIMITS = {
+    "temperature": ("temp", "temperature_low", "temperature_high"),
+    "humidity": ("humidity", "humidity_low", "humidity_high"),
+    "moisture": ("moisture", "moisture_low", "moisture_high"),
+}
+
+# "2025-06-10 09:17:01.123 [RX] msg" (streamed logs) or "[RX] msg" (older logs)
+_RECORD_RE = re.compile(r"^(?:(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d(?:\.\d+)?) )?\[(\w+)\] ?(.*)$")
+
+
+def parse_log_record(raw):
+    """Splits one log line into (timestamp or None, kind, message).
+
+    Lines without a [KIND] tag are continuations of a previous record and
+    come back as kind None.
+    """
+    m = _RECORD_RE.match(raw.rstrip("\r\n"))
+    if not m:
+        return None, None, raw.strip()
+    stamp, kind, msg = m.groups()
+    t = datetime.datetime.fromisoformat(stamp).timestamp() if stamp else None
+    return t, kind, msg.strip()
+
+
+class _FileStats:
+    def __init__(self, path, plant):
+        self.path = path
+        self.plant = plant
+        self.thresholds = dict(plant) if plant else None
+        self.kinds = {}
+        self.classes = {"telemetry": 0, "history": 0, "control": 0, "other": 0}
+        self.frames = 0
+        self.rejected = 0
+        self.sums = dict.fromkeys(STAT_FIELDS, 0.0)
+        self.counts = dict.fromkeys(STAT_FIELDS, 0)
+        self.mins = dict.fromkeys(STAT_FIELDS, np.inf)
+        self.maxs = dict.fromkeys(STAT_FIELDS, -np.inf)
+        self.quality = np.zeros(4, dtype=np.int64)
+        self.flags = dict.fromkeys(FLAG_FIELDS, 0)
+        self.violations = {f"{metric}_{side}": 0 for metric in LIMITS for side in ("low", "high")}
+        self.violations["air_quality_low"] = 0
+        self.first_t = self.last_t = None
+        self.parts = []  # parsed chunks kept for --export
+
+    def add_chunk(self, lines, keep):
+        if not lines:
+            return
+        records, rejected = parse_telemetry_lines(lines)
+        self.rejected += int(rejected.sum())
+        self.add_records(records, keep)
+
+    def add_records(self, records, keep):
+        self.frames += len(records)
+        if not len(records):
+            return
+        for name in STAT_FIELDS:
+            col = records[name]
+            col = col[np.isfinite(col)]  # "nan" readings from a failed sensor
+            if not len(col):
+                continue
+            self.counts[name] += len(col)
+            self.sums[name] += float(col.sum(dtype=np.float64))
+            self.mins[name] = min(self.mins[name], float(col.min()))
+            self.maxs[name] = max(self.maxs[name], float(col.max()))
+        self.quality += np.bincount(np.clip(records["quality"], 0, 3), minlength=4)
+        for name in FLAG_FIELDS:
+            self.flags[name] += int(records[name].sum())
+        if self.thresholds:
+            th = self.thresholds
+            for metric, (field, low, high) in LIMITS.items():
+                self.violations[f"{metric}_low"] += int((records[field] < th[low]).sum())
+                self.violations[f"{metric}_high"] += int((records[field] > th[high]).sum())
+            self.violations["air_quality_low"] += int((records["quality"] < th["air_quality_score_min"]).sum())
+        if keep:
+            self.parts.append(records)
+
+    def summary(self):
+        return {
+            "file": self.path,
+            "records": self.kinds,
+            "lines": self.classes,
+            "frames": self.frames,
+            "rejected_frames": self.rejected,
+            "span_seconds": (self.last_t - self.first_t) if self.first_t is not None else None,
+            "mean": {k: (v / self.counts[k] if self.counts[k] else None) for k, v in self.sums.items()},
+            "min": {k: (v if self.counts[k] else None) for k, v in self.mins.items()},
+            "max": {k: (v if self.counts[k] else None) for k, v in self.maxs.items()},
+            "quality_counts": self.quality.tolist(),
+            "flag_counts": self.flags,
+            "thresholds": self.thresholds,
+            "violations": self.violations if self.thresholds else None,
+        }
+
+
+def replay_file(path, plant=None, export_dir=None, export_format="csv", t0=None, t1=None):
+    """Streams one log file (or recording) and returns its summary dict.
+    `t0`/`t1` (epoch seconds) only apply to recordings."""
+    if path.endswith(".dlrec"):
+        return replay_recording(path, plant, export_dir, export_format, t0, t1)
+    stats = _FileStats(path, plant)
+    keep = export_dir is not None
+    chunk = []
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        for raw in f:
+            t, kind, msg = parse_log_record(raw)
+            if kind is None:
+                continue
+            stats.kinds[kind] = stats.kinds.get(kind, 0) + 1
+            if t is not None:
+                stats.first_t = t if stats.first_t is None else stats.first_t
+                stats.last_t = t
+            if kind == "TX" and not plant and msg.startswith("Thresholds:"):
+                # Frames after this point are judged against the new limits
+                stats.add_chunk(chunk, keep)
+                chunk = []
+                stats.thresholds = parse_thresholds(msg) or stats.thresholds
+                continue
+            if kind != "RX":
+                continue
+            cls = classify_line(msg)
+            stats.classes[cls] += 1
+            if cls == "telemetry":
+                chunk.append(msg)
+                if len(chunk) >= CHUNK_LINES:
+                    stats.add_chunk(chunk, keep)
+                    chunk = []
+    stats.add_chunk(chunk, keep)
+
+    if keep:
+        records = np.concatenate(stats.parts) if stats.parts else np.empty(0, TELEMETRY_DTYPE)
+        export_records(records, path, export_dir, export_format)
+    return stats.summary()
+
+
+def replay_recording(path, plant=None, export_dir=None, export_format="csv", t0=None, t1=None):
+    """replay_file() for a .dlrec recording: frames with t0 <= t < t1."""
+    reader = RecordingReader(path)
+    if plant is None and reader.header.get("plant"):
+        plant = _plant_limits(PlantCatalog().get(reader.header["plant"]))
+    stats = _FileStats(path, plant)
+    keep = export_dir is not None
+    rows = reader.time_slice(t0, t1)
+    stats.kinds["RX"] = stats.classes["telemetry"] = len(rows)
+    if len(rows):
+        stats.first_t, stats.last_t = float(rows["t"][0]), float(rows["t"][-1])
+    for start in range(0, len(rows), CHUNK_LINES):
+        # Only this chunk of the memory map is actually read from disk
+        stats.add_records(unpack_records(rows[start:start + CHUNK_LINES]), keep)
+
+    if keep:
+        records = np.concatenate(stats.parts) if stats.parts else np.empty(0, TELEMETRY_DTYPE)
+        export_records(records, path, export_dir, export_format)
+    return stats.summary()
+
+
+def export_records(records, source, export_dir, fmt):
+    os.makedirs(export_dir, exist_ok=True)
+    base = os.path.join(export_dir, os.path.splitext(os.path.basename(source))[0])
+    if fmt == "npy":
+        np.save(base + ".npy", records)
+        return
+    with open(base + ".csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(TELEMETRY_FIELDS)
+        writer.writerows(records.tolist())
+
+
+def load_plant(name, path=None):
+    catalog = PlantCatalog(path) if path else PlantCatalog()
+    plant = catalog.get(name)
+    if plant is None:
+        raise SystemExit(f"Plant '{name}' not found in {catalog.path}")
+    return _plant_limits(plant)
+
+
+def _plant_limits(plant):
+    """Threshold dict (THRESHOLD_KEYS) for a catalog entry; None for None."""
+    if plant is None:
+        return None
+    return {
+        "temperature_low": plant["temperature_low"],
+        "temperature_high": plant["temperature_high"],
+        "humidity_low": plant["humidity_low"],
+        "humidity_high": plant["humidity_high"],
+        "air_quality_score_min": plant.get("air_quality_score_min", 0),
+        "moisture_low": plant.get("moisture_low", 0),
+        "moisture_high": plant.get("moisture_high", 1000),
+    }
+
+
+def _fmt(value, spec=".2f"):
+    return "-" if value is None else format(value, spec)
+
+
+def print_summary(s):
+    print(f"== {s['file']}")
+    print(f"   frames: {s['frames']}  rejected: {s['rejected_frames']}  "
+          f"records: {', '.join(f'{k}={v}' for k, v in sorted(s['records'].items()))}")
+    for name in STAT_FIELDS:
+        print(f"   {name:<13} mean {_fmt(s['mean'][name]):>8}  "
+              f"min {_fmt(s['min'][name]):>8}  max {_fmt(s['max'][name]):>8}")
+    print(f"   quality 0/1/2/3: {'/'.join(str(c) for c in s['quality_counts'])}")
+    raised = {k: v for k, v in s["flag_counts"].items() if v}
+    print(f"   arduino flags: {', '.join(f'{k}={v}' for k, v in raised.items()) or 'none'}")
+    if s["violations"] is not None:
+        hits = {k: v for k, v in s["violations"].items() if v}
+        print(f"   threshold violations: {', '.join(f'{k}={v}' for k, v in hits.items()) or 'none'}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay serial logs without the GUI.")
+    parser.add_argument("logs", nargs="+", help="serial_log_*.txt files or recording_*.dlrec recordings")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--plant", help="judge violations against this plant instead of the logged thresholds")
+    parser.add_argument("--export", metavar="DIR", help="write the parsed frames of each log to DIR")
+    parser.add_argument("--format", choices=("csv", "npy"), default="csv", help="export format")
+    parser.add_argument("--json", action="store_true", help="print summaries as JSON")
+    parser.add_argument("--since", type=_parse_time, help="recordings: start time (ISO date/time or epoch seconds)")
+    parser.add_argument("--until", type=_parse_time, help="recordings: end time (exclusive)")
+    args = parser.parse_args(argv)
+
+    plant = load_plant(args.plant) if args.plant else None
+    jobs = args.jobs or min(len(args.logs), os.cpu_count() or 1)
+    work = [(path, plant, args.export, args.format, args.since, args.until) for path in args.logs]
+    if jobs > 1 and len(work) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            summaries = list(pool.map(_replay_args, work))
+    else:
+        summaries = [_replay_args(w) for w in work]
+
+    if args.json:
+        json.dump(summaries, sys.stdout, indent=2, default=float)
+        print()
+    else:
+        for s in summaries:
+            print_summary(s)
+
+
+def _parse_time(text):
+    try:
+        return float(text)
+    except ValueError:
+        return datetime.datetime.fromisoformat(text).timestamp()
+
+
+def _replay_args(args):
+    return replay_file(*args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import numpy as np
+
+from telemetry_store import TelemetryStore
+
+# Fields that get rolled up (the ones the plots and the analysis look at)
+ROLLUP_FIELDS = ("temp_avg", "humidity_avg", "moisture_avg")
+# (bucket seconds, buckets kept): 6 h of seconds, a week of minutes,
+# a month of 10 minutes and a year of hours
+TIERS = (
+    (1, 6 * 3600),
+    (60, 7 * 24 * 60),
+    (600, 30 * 24 * 6),
+    (3600, 365 * 24),
+)
+
+
+def rollup_dtype(fields=ROLLUP_FIELDS):
+    columns = []
+    for name in fields:
+        columns += [(f"{name}_min", np.float32), (f"{name}_max", np.float32),
+                    (f"{name}_sum", np.float64), (f"{name}_n", np.uint32)]
+    return np.dtype(columns)
+
+
+def prepare(records, fields=ROLLUP_FIELDS):
+    """Per field: (finite count, value or 0, value or +inf, value or -inf),
+    ready for reduceat; NaNs then drop out of every aggregate."""
+    columns = {}
+    for name in fields:
+        values = np.asarray(records[name], dtype=np.float64)
+        finite = np.isfinite(values)
+        columns[name] = (finite.astype(np.uint32), np.where(finite, values, 0.0),
+                         np.where(finite, values, np.inf), np.where(finite, values, -np.inf))
+    return columns
+
+
+class RollupTier:
+    """Fixed-size buckets of `seconds` with min/max/sum/count per field.
+
+    Buckets live in a TelemetryStore (stamped with their start time), so the
+    oldest fall off once `retention` is reached and time-range lookups are
+    the store's binary search. The newest bucket stays open and is merged
+    into until a sample for a later bucket arrives.
+    """
+
+    def __init__(self, seconds, retention, fields=ROLLUP_FIELDS):
+        self.seconds = seconds
+        self.fields = fields
+        self.buckets = TelemetryStore(retention, rollup_dtype(fields))
+        self._open = None  # id (start // seconds) of the newest bucket
+
+    def clear(self):
+        self.buckets.clear()
+        self._open = None
+
+    def add(self, times, records):
+        """Folds samples (sorted `times`, TELEMETRY_DTYPE `records`) into the buckets."""
+        if len(records):
+            self.add_columns(times, prepare(records, self.fields))
+
+    def add_columns(self, times, columns):
+        """add() for columns already split up by prepare() (shared by all tiers)."""
+        ids = np.floor(np.asarray(times, dtype=np.float64) / self.seconds)
+        # Samples arrive in time order, so each bucket is one contiguous run
+        starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+        rows = np.zeros(len(starts), dtype=self.buckets.dtype)
+        for name, (count, total, low, high) in columns.items():
+            n = np.add.reduceat(count, starts)
+            rows[f"{name}_n"] = n
+            rows[f"{name}_sum"] = np.add.reduceat(total, starts)
+            rows[f"{name}_min"] = np.where(n > 0, np.minimum.reduceat(low, starts), np.nan)
+            rows[f"{name}_max"] = np.where(n > 0, np.maximum.reduceat(high, starts), np.nan)
+        bucket_ids = ids[starts]
+
+        if self._open is not None and bucket_ids[0] == self._open and len(self.buckets):
+            self._merge(self.buckets.view(1), rows[:1])
+            rows, bucket_ids = rows[1:], bucket_ids[1:]
+        if len(rows):
+            self.buckets.extend(rows, bucket_ids * self.seconds)
+            self._open = bucket_ids[-1]
+
+    def _merge(self, into, rows):
+        for name in self.fields:
+            into[f"{name}_n"] += rows[f"{name}_n"]
+            into[f"{name}_sum"] += rows[f"{name}_sum"]
+            into[f"{name}_min"] = np.fmin(into[f"{name}_min"], rows[f"{name}_min"])
+            into[f"{name}_max"] = np.fmax(into[f"{name}_max"], rows[f"{name}_max"])
+
+    def covers(self, t):
+        """True if no bucket at or after `t` has been dropped yet."""
+        b = self.buckets
+        if len(b) == b.total:
+            return True
+        return t is not None and len(b) > 0 and b.times()[0] <= t
+
+    def count(self, t0, t1):
+        start, stop = self.buckets.span(self._floor(t0), t1)
+        return stop - start
+
+    def _floor(self, t):
+        return None if t is None else np.floor(t / self.seconds) * self.seconds
+
+    def between(self, t0=None, t1=None):
+        """(bucket start times, bucket rows) overlapping [t0, t1]."""
+        return self.buckets.between(self._floor(t0), t1)
+
+
+class Rollups:
+    """The 1 s / 1 min / 10 min / 1 h tiers for one device, fed as samples
+    are ingested. Queries use the finest tier that still holds the whole
+    range without exceeding the requested number of points, so drawing a
+    month costs about the same as drawing a minute."""
+
+    def __init__(self, tiers=TIERS, fields=ROLLUP_FIELDS):
+        self.fields = fields
+        self.tiers = [RollupTier(seconds, retention, fields) for seconds, retention in tiers]
+
+    def add(self, times, records):
+        if not len(records):
+            return
+        columns = prepare(records, self.fields)
+        for tier in self.tiers:
+            tier.add_columns(times, columns)
+
+    def clear(self):
+        for tier in self.tiers:
+            tier.clear()
+
+    def oldest_time(self):
+        """Start of the oldest bucket still held (the coarsest tier goes furthest back)."""
+        times = [tier.buckets.times()[0] for tier in self.tiers if len(tier.buckets)]
+        return float(min(times)) if times else None
+
+    def pick(self, t0, t1, max_points=None):
+        """The tier to answer [t0, t1] from."""
+        for tier in self.tiers:
+            if tier.covers(t0) and (max_points is None or tier.count(t0, t1) <= max_points):
+                return tier
+        return self.tiers[-1]
+
+    def series(self, name, t0=None, t1=None, max_points=1000):
+        """(x, y) of `name` over [t0, t1] for plotting: each bucket's min and
+        max at its midpoint, from at most `max_points` buckets."""
+        tier = self.pick(t0, t1, max_points)
+        starts, rows = tier.between(t0, t1)
+        x = np.repeat(starts + tier.seconds / 2, 2)
+        y = np.column_stack([rows[f"{name}_min"], rows[f"{name}_max"]]).ravel().astype(np.float64)
+        return x, y
+
+    def stats(self, name, t0=None, t1=None):
+        """count/mean/min/max of `name` over [t0, t1] from the finest tier
+        covering it (edges are rounded out to that tier's buckets)."""
+        _, rows = self.pick(t0, t1).between(t0, t1)
+        n = int(rows[f"{name}_n"].sum())
+        if not n:
+            return {"count": 0, "mean": np.nan, "min": np.nan, "max": np.nan}
+        return {"count": n, "mean": float(rows[f"{name}_sum"].sum() / n),
+                "min": float(np.nanmin(rows[f"{name}_min"])), "max": float(np.nanmax(rows[f"{name}_max"]))}
@@ -0,0 +1,403 @@
+"""Asyncio serial I/O, shared by the GUI and the command line tools.
+
+A SerialConnection drives one port from an asyncio event loop: reads are
+non-blocking (the loop waits on the port's file descriptor, or polls
+in_waiting where there is none, e.g. on Windows or for the simulator),
+writes go through a queue, and a dropped port is reopened with backoff.
+Complete lines land in a LineBuffer for whoever consumes them, and the
+request helpers wait for the Arduino's answers:
+
+    history = await conn.fetch_history()   # 'd' -> the "d," lists, parsed
+    await conn.reset()                     # 'r' -> "Reset data"
+    await conn.negotiate_binary()          # 'b' -> "Binary mode", if supported
+
+The GUI runs every connection on one SerialEngine (a loop on a background
+thread, see qt_async.py for getting results back onto the Qt thread);
+headless tools can use asyncio.run() directly:
+
+    python src/serial_handler.py /dev/ttyACM0 --history
+"""
+import argparse
+import asyncio
+import threading
+import time
+
+import serial
+
+from binary_frames import BINARY_ACK, BINARY_COMMAND, FrameDecoder
+from serial_reader import LineBuffer
+from telemetry import HISTORY_SERIES, HistoryParser, format_telemetry_line
+
+HISTORY_LINES = 3  # 'd' answers with the temperature, humidity and moisture lists
+HISTORY_EXTRA_WAIT = 0.3  # how long to listen for a fourth list after those
+
+CLOSED = "closed"
+CONNECTED = "connected"
+RECONNECTING = "reconnecting"
+
+
+def open_port(port, baud):
+    """Opens a real port, or the simulator for "sim://..." URLs."""
+    if port.startswith("sim://"):
+        from simulator import SimulatedSerial
+        return SimulatedSerial.from_url(port, baudrate=baud, timeout=0.05)
+    return serial.Serial(port, baud, timeout=0.05)
+
+
+def encode_command(msg):
+    # The sketch expects a literal backslash-n terminator, like the monitor sends
+    return (msg if msg.endswith('\\n') else msg + '\\n').encode()
+
+
+class _Waiter:
+    def __init__(self, match, count, future, collect=None):
+        self.match = match
+        self.count = count
+        self.future = future
+        self.collect = collect  # called per line instead of keeping them
+        self.seen = 0
+        self.lines = []
+
+
+class SerialConnection:
+    """One Arduino port driven by the running asyncio loop.
+
+    open() and close() must be awaited on that loop; send()/write() may be
+    called from any thread. `state` is CLOSED, CONNECTED or RECONNECTING.
+    """
+
+    def __init__(self, port, baud, opener=open_port, buffer=None, metrics=None,
+                 reconnect=True, poll_interval=0.01, max_backoff=10.0):
+        self.port = port
+        self.baud = baud
+        self.opener = opener
+        self.buffer = buffer if buffer is not None else LineBuffer()
+        self.metrics = metrics
+        self.reconnect = reconnect
+        self.poll_interval = poll_interval
+        self.max_backoff = max_backoff
+        self.ser = None
+        self.state = CLOSED
+        self.last_error = None
+        self.reconnects = 0
+        self.binary = False   # wants binary frames (renegotiated after a reconnect)
+        self.decoder = None   # FrameDecoder while binary frames may arrive
+        self.loop = None
+        self._writes = None
+        self._waiters = []
+        self._fd = None
+        self._poll_handle = None
+        self._writer_task = None
+        self._reconnect_task = None
+
+    # --- lifecycle -----------------------------------------------------------
+
+    async def open(self):
+        """Opens the port and starts reading it. Raises whatever the opener
+        raises (serial.SerialException, OSError, ValueError)."""
+        self.loop = asyncio.get_running_loop()
+        self._writes = asyncio.Queue()
+        self._open_port()
+        self._writer_task = self.loop.create_task(self._writer())
+
+    async def close(self):
+        """Stops reading, writing and reconnecting, and closes the port."""
+        self.state = CLOSED
+        for task in (self._writer_task, self._reconnect_task):
+            if task is not None:
+                task.cancel()
+        self._writer_task = self._reconnect_task = None
+        self._drop_port()
+        for waiter in self._waiters:
+            waiter.future.cancel()
+        self._waiters.clear()
+
+    def _open_port(self):
+        self.ser = self.opener(self.port, self.baud)
+        self.state = CONNECTED
+        try:
+            self._fd = self.ser.fileno()
+            self.loop.add_reader(self._fd, self._on_readable)
+        except (AttributeError, OSError, ValueError, NotImplementedError):
+            # No selectable fd (Windows, simulator, proactor loop): poll instead
+            self._fd = None
+            self._poll_handle = self.loop.call_later(self.poll_interval, self._poll)
+
+    def _drop_port(self):
+        if self._fd is not None:
+            self.loop.remove_reader(self._fd)
+            self._fd = None
+        if self._poll_handle is not None:
+            self._poll_handle.cancel()
+            self._poll_handle = None
+        if self.ser is not None:
+            try:
+                self.ser.close()
+            except Exception:
+                pass
+            self.ser = None
+
+    def _lost(self, error):
+        """The port failed: reopen it in the background, or give up."""
+        print(f"[ERROR] {self.port}: {error}")
+        self.last_error = error
+        self._drop_port()
+        if self.state == CLOSED:
+            return
+        if self.reconnect:
+            self.state = RECONNECTING
+            self._reconnect_task = self.loop.create_task(self._reconnect())
+        else:
+            self.state = CLOSED
+            self.buffer.error = error
+
+    async def _reconnect(self):
+        delay = 0.5
+        while self.state == RECONNECTING:
+            await asyncio.sleep(delay)
+            try:
+                self._open_port()
+            except (serial.SerialException, OSError, ValueError) as e:
+                self.last_error = e
+                delay = min(delay * 2, self.max_backoff)
+                continue
+            self.reconnects += 1
+            print(f"[INFO] {self.port}: reconnected")
+            if self.binary:
+                # The board restarts in text mode when the port is reopened
+                self.loop.create_task(self._renegotiate())
+
+    async def _renegotiate(self):
+        try:
+            await self.negotiate_binary()
+        except (asyncio.TimeoutError, asyncio.CancelledError, serial.SerialException):
+            pass
+
+    # --- reading -------------------------------------------------------------
+
+    def _on_readable(self):
+        try:
+            t0 = time.perf_counter_ns()
+            # A readable fd with nothing waiting means the device went away;
+            # read() raises for that, which is what we want
+            chunk = self.ser.read(self.ser.in_waiting or 1)
+        except Exception as e:  # port unplugged, closed under us, ...
+            self._lost(e)
+            return
+        self._feed(chunk, t0)
+
+    def _poll(self):
+        self._poll_handle = None
+        try:
+            waiting = self.ser.in_waiting
+            t0 = time.perf_counter_ns()
+            chunk = self.ser.read(waiting) if waiting else b""
+        except Exception as e:
+            self._lost(e)
+            return
+        self._feed(chunk, t0)
+        if self.ser is not None:
+            self._poll_handle = self.loop.call_later(self.poll_interval, self._poll)
+
+    def _feed(self, chunk, t0):
+        if not chunk:
+            return
+        size = len(chunk)
+        if self.decoder is not None:
+            decoder = self.decoder
+            errors, noise = decoder.errors, decoder.noise_bytes
+            records, chunk = decoder.feed(chunk)  # frames out, clean text lines left
+            self.buffer.feed_frames(records)
+            if self.metrics:
+                self.metrics.counter("binary_frames").inc(len(records))
+                self.metrics.counter("frame_errors").inc(decoder.errors - errors)
+                self.metrics.counter("noise_bytes").inc(decoder.noise_bytes - noise)
+        lines = self.buffer.feed(chunk)
+        if self.metrics:
+            self.metrics.histogram("read").observe(time.perf_counter_ns() - t0)
+            self.metrics.counter("read_bytes").inc(size)
+            self.metrics.counter("read_lines").inc(len(lines))
+        if self._waiters:
+            self._match(lines)
+
+    def _match(self, lines):
+        for waiter in list(self._waiters):
+            for line in lines:
+                if waiter.future.done() or not waiter.match(line):
+                    continue
+                waiter.seen += 1
+                if waiter.collect is not None:
+                    waiter.collect(line)
+                else:
+                    waiter.lines.append(line)
+                if waiter.seen == waiter.count:
+                    waiter.future.set_result(waiter.lines)
+            if waiter.future.done():
+                self._waiters.remove(waiter)
+
+    # --- writing -------------------------------------------------------------
+
+    def write(self, data):
+        """Queues raw bytes for the port. Thread safe; raises if it isn't open."""
+        if self.state != CONNECTED:
+            raise serial.SerialException(f"{self.port} is {self.state}")
+        self.loop.call_soon_threadsafe(self._writes.put_nowait, data)
+
+    def send(self, msg):
+        """Queues a text command, adding the terminator the sketch expects."""
+        self.write(encode_command(msg))
+
+    async def _writer(self):
+        while True:
+            data = await self._writes.get()
+            if self.ser is None:
+                continue  # port went down after this was queued
+            try:
+                self.ser.write(data)
+            except Exception as e:
+                self._lost(e)
+
+    # --- request/response ----------------------------------------------------
+
+    async def request(self, command, match, count=1, timeout=5.0, collect=None):
+        """Sends `command` and returns the next `count` lines accepted by
+        `match` (or hands each to `collect` as it arrives, returning []).
+        Raises asyncio.TimeoutError if they don't arrive in time."""
+        waiter = _Waiter(match, count, self.loop.create_future(), collect)
+        self._waiters.append(waiter)
+        try:
+            self.send(command)
+            return await asyncio.wait_for(waiter.future, timeout)
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    async def fetch_history(self, timeout=20.0, extra_wait=HISTORY_EXTRA_WAIT):
+        """The Arduino's stored history as a telemetry.HistoryParser.
+
+        Each "d," line is parsed on the loop as it comes in, so no raw lines
+        pile up. Once the three lists are in, a fourth one is picked up if
+        it follows within `extra_wait` seconds.
+        """
+        history = HistoryParser()
+        ready = self.loop.create_future()
+
+        def collect(line):
+            history.feed(line)
+            if len(history) == HISTORY_LINES and not ready.done():
+                ready.set_result(None)
+
+        waiter = _Waiter(lambda line: line.startswith("d,"), len(HISTORY_SERIES),
+                         self.loop.create_future(), collect)
+        waiter.future.add_done_callback(lambda f: f.cancelled() and ready.cancel())  # close()
+        self._waiters.append(waiter)
+        try:
+            self.send("d")
+            await asyncio.wait_for(ready, timeout)
+            await asyncio.wait([waiter.future], timeout=extra_wait)
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        return history
+
+    async def reset(self, timeout=5.0):
+        """Clears the Arduino's stored history and waits for the confirmation."""
+        await self.request("r", lambda line: line == "Reset data", 1, timeout)
+
+    async def negotiate_binary(self, timeout=2.0):
+        """Asks the Arduino for binary frames (binary_frames.py). Returns
+        True if it agreed; firmware without binary mode doesn't answer, and
+        after `timeout` the link just stays on text lines."""
+        self.binary = True
+        # Decode from before the request: the first frames can follow the ack
+        # in the same read, and text passes through the decoder untouched
+        if self.decoder is None:
+            self.decoder = FrameDecoder()
+        try:
+            await self.request(BINARY_COMMAND, lambda line: line == BINARY_ACK, 1, timeout)
+        except asyncio.TimeoutError:
+            self.binary = False
+            if self.decoder is not None:
+                self.buffer.feed(self.decoder.remainder())
+                self.decoder = None
+            return False
+        return True
+
+
+class SerialEngine:
+    """An asyncio loop on one background thread that drives every
+    SerialConnection of a process, however many ports are open."""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name="SerialIO", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+        self.loop.close()
+
+    def submit(self, coro):
+        """Schedules `coro` on the loop; returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call(self, coro, timeout=None):
+        """Runs `coro` on the loop and blocks for its result."""
+        return self.submit(coro).result(timeout)
+
+    def stop(self, timeout=1.0):
+        if self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        if self._thread.is_alive() and threading.current_thread() is not self._thread:
+            self._thread.join(timeout)
+
+
+async def _run_cli(args):
+    conn = SerialConnection(args.port, args.baud, reconnect=not args.history)
+    await conn.open()
+    try:
+        if args.history:
+            history = await conn.fetch_history(args.timeout)
+            for name, values in zip(HISTORY_SERIES, history.series):
+                print(f"{name}: " + ",".join(f"{v:.2f}" for v in values))
+            print(history.summary())
+            return
+        if args.reset:
+            await conn.reset(args.timeout)
+            print("Reset data")
+            return
+        if args.binary and not await conn.negotiate_binary():
+            print("[INFO] No binary mode on this firmware; staying on text lines.")
+        while True:  # tail the port
+            for line in conn.buffer.drain():
+                print(line)
+            for _, records in conn.buffer.drain_frames():
+                for record in records:
+                    print(format_telemetry_line(record))
+            await asyncio.sleep(0.1)
+    finally:
+        await conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Talk to the Arduino without the GUI.")
+    parser.add_argument("port", help="serial port, or a sim:// URL")
+    parser.add_argument("--baud", type=int, default=9600)
+    parser.add_argument("--history", action="store_true", help="print the stored 'd,' history lists and exit")
+    parser.add_argument("--reset", action="store_true", help="clear the Arduino's stored history and exit")
+    parser.add_argument("--binary", action="store_true", help="ask for binary frames while tailing")
+    parser.add_argument("--timeout", type=float, default=20.0, help="seconds to wait for an answer")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_run_cli(args))
+    except asyncio.TimeoutError:
+        parser.exit(1, "[ERROR] No answer from the Arduino.\n")
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import time
+from collections import deque
+
+
+class LineBuffer:
+    """Splits a byte stream into lines and queues them for the GUI.
+
+    The serial I/O loop (serial_handler.py) feeds raw chunks in; the GUI
+    pulls complete lines with drain() once per timer tick, so the display
+    never falls behind the port no matter how fast the Arduino talks.
+    """
+
+    MAX_PARTIAL = 65536  # give up on a "line" that never sees a newline (a long "d," list still fits)
+
+    def __init__(self, max_lines=20000):
+        # deque.append/popleft are atomic in CPython, so producer and consumer
+        # don't need a lock. maxlen keeps it bounded if the GUI stalls.
+        # Entries are (arrival time.monotonic(), line).
+        self.lines = deque(maxlen=max_lines)
+        # Binary-mode frames (see binary_frames.py): (arrival time, records) batches
+        self.frames = deque(maxlen=max_lines)
+        self.dropped = 0
+        self.error = None
+        self._partial = b""
+
+    def feed(self, chunk):
+        """Queues the complete lines in `chunk` and returns them."""
+        now = time.monotonic()
+        parts = (self._partial + chunk).split(b"\n")
+        self._partial = parts.pop()
+        if len(self._partial) > self.MAX_PARTIAL:
+            self._partial = b""
+        new = []
+        for raw in parts:
+            line = raw.decode("utf-8", "ignore").strip()
+            if not line:
+                continue
+            if len(self.lines) == self.lines.maxlen:
+                self.dropped += 1
+            self.lines.append((now, line))
+            new.append(line)
+        return new
+
+    def drain(self, limit=None):
+        """Return (and remove) up to `limit` queued lines, oldest first."""
+        return [line for _, line in self.drain_stamped(limit)]
+
+    def drain_stamped(self, limit=None):
+        """Like drain(), but as (arrival time, line) pairs."""
+        out = []
+        popleft = self.lines.popleft
+        try:
+            while limit is None or len(out) < limit:
+                out.append(popleft())
+        except IndexError:
+            pass
+        return out
+
+    def feed_frames(self, records):
+        """Queues a batch of already decoded TELEMETRY_DTYPE records."""
+        if len(records):
+            if len(self.frames) == self.frames.maxlen:
+                self.dropped += len(self.frames[0][1])
+            self.frames.append((time.monotonic(), records))
+
+    def drain_frames(self):
+        """Return (and remove) the queued (arrival time, records) batches."""
+        out = []
+        try:
+            while True:
+                out.append(self.frames.popleft())
+        except IndexError:
+            pass
+        return out
@@ -0,0 +1,116 @@
+import datetime
+import os
+import queue
+import threading
+import time
+
+
+class SessionLogWriter(threading.Thread):
+    """Streams serial monitor records to disk from a background thread.
+
+    record() only enqueues, so the GUI thread never waits on the disk. Lines
+    are written through a buffered file, flushed every `flush_interval` and
+    fsync'ed every `fsync_interval` seconds, so a crash loses at most a few
+    seconds. Files rotate once they exceed `max_bytes` or `max_age` seconds.
+    Each line looks like:
+
+        2025-06-10 09:17:01.123 [RX] 24.40,56.00,0.00,3,...
+    """
+
+    def __init__(self, directory, prefix="serial_log", max_bytes=10 * 1024 * 1024,
+                 max_age=24 * 3600, flush_interval=1.0, fsync_interval=10.0):
+        super().__init__(name="SessionLogWriter", daemon=True)
+        self.directory = directory
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.path = None
+        self.error = None
+        self._queue = queue.SimpleQueue()
+        self._file = None
+        self._opened_at = 0.0
+        self._written = 0  # bytes written to the current file (tell() would flush)
+        self._closed = False
+
+    def record(self, kind, msg):
+        """Queue one line for writing. Safe to call from any thread."""
+        if not self._closed:
+            self._queue.put((time.time(), kind, msg))
+
+    def close(self, timeout=5.0):
+        """Write out everything queued so far and close the file."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        if self.is_alive():
+            self.join(timeout)
+
+    def _open(self, now):
+        stamp = datetime.datetime.fromtimestamp(now).strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(self.directory, f"{self.prefix}_{stamp}.txt")
+        n = 1
+        while os.path.exists(path):  # two rotations within one second
+            path = os.path.join(self.directory, f"{self.prefix}_{stamp}_{n}.txt")
+            n += 1
+        self._file = open(path, "a", encoding="utf-8", buffering=64 * 1024)
+        self._opened_at = now
+        self._written = 0
+        self.path = path
+
+    def _close_file(self):
+        if self._file:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+    def _write(self, item):
+        ts, kind, msg = item
+        if self._file is None:
+            self._open(ts)  # lazily, so an idle session leaves no empty file
+        elif self._written >= self.max_bytes or ts - self._opened_at >= self.max_age:
+            self._close_file()
+            self._open(ts)
+        stamp = datetime.datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        line = f"{stamp} [{kind}] {msg}\n"
+        self._file.write(line)
+        self._written += len(line) if line.isascii() else len(line.encode("utf-8"))
+
+    def run(self):
+        last_flush = last_fsync = time.monotonic()
+        done = False
+        while not done:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = ()
+            try:
+                # Drain whatever else is queued before touching the disk again
+                while item is not None:
+                    if item:
+                        self._write(item)
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                done = item is None
+
+                now = time.monotonic()
+                if self._file and (done or now - last_flush >= self.flush_interval):
+                    self._file.flush()
+                    last_flush = now
+                if self._file and (done or now - last_fsync >= self.fsync_interval):
+                    os.fsync(self._file.fileno())
+                    last_fsync = now
+            except OSError as e:
+                # Keep draining so record() never backs up; report once
+                if self.error is None:
+                    self.error = e
+                    print(f"[ERROR] Session log write failed: {e}")
+        try:
+            self._close_file()
+        except OSError:
+            pass
@@ -0,0 +1,336 @@
+"""Stand-in for the Arduino, for load testing without hardware.
+
+In-process: SimulatedSerial behaves like the subset of serial.Serial the app
+uses, and MainWindow opens one for the "sim://" port, e.g.
+
+    sim://?rate=200                       200 synthetic frames per second
+    sim://?rate=50&replay=src/serial_log_20250610_091701.txt
+    sim://?rate=200&noise=0.0001          flip about one byte in 10000
+
+Out of process: `python src/simulator.py --pty --rate 100` opens a pseudo
+terminal and prints its device path for any serial client to attach to.
+
+Either way the fake device prints the 14-field telemetry frame at the given
+rate, answers `d` with three `d,` history lines, `r` with `Reset data`, and
+applies threshold messages to the flags it reports. After `b` it answers
+`Binary mode` and sends binary frames (binary_frames.py) instead.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import deque
+from urllib.parse import urlparse, parse_qs
+
+# Allow both `python src/simulator.py` and `python -m src.simulator`
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import serial
+
+from binary_frames import BINARY_ACK, BINARY_COMMAND, encode_frames
+from telemetry import HISTORY_POINTS, classify_line, parse_telemetry_lines, parse_thresholds
+
+DEFAULT_THRESHOLDS = {
+    "temperature_low": 18, "temperature_high": 27,
+    "humidity_low": 60, "humidity_high": 70,
+    "air_quality_score_min": 2,
+    "moisture_low": 400, "moisture_high": 600,
+}
+
+
+class SimulatedArduino:
+    """Produces telemetry lines and answers host commands like the firmware.
+
+    With `replay` (a list of serial_log_*.txt paths) the recorded frames are
+    played back in a loop; otherwise readings follow a slow random walk.
+    `history_every` is the number of frames per `d` history point (600 =
+    10 minutes at 1 Hz).
+    """
+
+    def __init__(self, replay=None, seed=None, history_every=600):
+        self.rng = np.random.default_rng(seed)
+        self.thresholds = dict(DEFAULT_THRESHOLDS)
+        self.history_every = history_every
+        self.binary = False
+        self._replay = self._load_replay(replay) if replay else None
+        self._replay_pos = 0
+        self._state = np.array([24.0, 58.0, 500.0])
+        self._avg = self._state.copy()
+        self.reset()
+
+    @staticmethod
+    def _load_replay(paths):
+        from replay import parse_log_record
+        frames = []
+        for path in paths:
+            with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                for raw in f:
+                    _, kind, msg = parse_log_record(raw)
+                    if kind == "RX" and classify_line(msg) == "telemetry":
+                        frames.append(msg)
+        if not frames:
+            raise ValueError(f"No telemetry frames found in {', '.join(paths)}")
+        return frames
+
+    def reset(self):
+        self._history = [deque(maxlen=HISTORY_POINTS) for _ in range(3)]
+        self._bucket = np.zeros(3)
+        self._bucket_n = 0
+
+    def startup_lines(self):
+        return ["Plant monitoring!", "Sensor ready."]
+
+    def next_frame(self):
+        if self._replay:
+            line = self._replay[self._replay_pos % len(self._replay)]
+            self._replay_pos += 1
+            try:
+                values = np.array(line.split(",")[4:7], dtype=float)
+            except ValueError:
+                values = np.zeros(3)
+        else:
+            line, values = self._synthetic_frame()
+        # Feed the 10-minute history used to answer `d`
+        self._bucket += np.nan_to_num(values)
+        self._bucket_n += 1
+        if self._bucket_n >= self.history_every:
+            for series, value in zip(self._history, self._bucket / self._bucket_n):
+                series.append(value)
+            self._bucket[:] = 0
+            self._bucket_n = 0
+        return line
+
+    def _synthetic_frame(self):
+        step = self.rng.normal(0.0, [0.05, 0.2, 1.0])
+        self._state = np.clip(self._state + step, [-10.0, 0.0, 0.0], [50.0, 100.0, 1023.0])
+        self._avg += 0.1 * (self._state - self._avg)
+        temp, hum, moist = self._state
+        quality = 3 if self.rng.random() > 0.02 else 2
+        th = self.thresholds
+        flags = (
+            temp > th["temperature_high"], temp < th["temperature_low"],
+            hum < th["humidity_low"], hum > th["humidity_high"],
+            moist < th["moisture_low"], moist > th["moisture_high"],
+            quality < th["air_quality_score_min"],
+        )
+        ta, ha, ma = self._avg
+        line = (f"{temp:.2f},{hum:.2f},{moist:.2f},{quality},{ta:.2f},{ha:.2f},{ma:.2f},"
+                + ",".join(str(int(f)) for f in flags))
+        return line, self._avg.copy()
+
+    def history_lines(self):
+        lines = []
+        for series in self._history:
+            # The firmware pads the not-yet-filled part of the week with nan
+            values = ["nan"] * (HISTORY_POINTS - len(series)) + [f"{v:.2f}" for v in series]
+            lines.append("d," + ",".join(values))
+        return lines
+
+    def handle_command(self, command):
+        """Returns the lines the firmware would print in reply to `command`."""
+        command = command.strip().strip("\\").strip()
+        if command == "d":
+            return self.history_lines()
+        if command == "r":
+            self.reset()
+            return ["Reset data"]
+        if command == BINARY_COMMAND:
+            self.binary = True
+            return [BINARY_ACK]
+        thresholds = parse_thresholds(command)
+        if thresholds:
+            self.thresholds = thresholds
+        return []
+
+    def encode(self, frames):
+        """Telemetry frames as they go over the wire: text lines, or binary after `b`."""
+        if self.binary:
+            return encode_frames(parse_telemetry_lines(frames)[0])
+        return b"".join(line.encode() + b"\r\n" for line in frames)
+
+
+class SimulatedSerial:
+    """Loopback object with the serial.Serial API surface the app uses.
+
+    Frames become available at `rate` per second of wall time and are
+    generated lazily whenever the port is polled, so no thread is needed.
+    """
+
+    MAX_BACKLOG = 100000  # frames; a stalled reader shouldn't eat all memory
+
+    def __init__(self, port="sim://", baudrate=9600, timeout=None, rate=1.0,
+                 replay=None, seed=None, device=None, noise=0.0):
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.rate = float(rate)
+        self.device = device or SimulatedArduino(replay=replay, seed=seed)
+        self.is_open = True
+        self.frames_sent = 0
+        self.noise = float(noise)  # chance of corrupting each telemetry byte
+        self._rng = np.random.default_rng(seed)
+        self._out = bytearray()
+        self._in = b""
+        self._lock = threading.Lock()
+        self._t0 = time.monotonic()
+        self._queue(self.device.startup_lines())
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        """Builds a port from "sim://?rate=N&replay=path[,path]&seed=N"."""
+        query = parse_qs(urlparse(url).query)
+        if "rate" in query:
+            kwargs["rate"] = float(query["rate"][0])
+        if "seed" in query:
+            kwargs["seed"] = int(query["seed"][0])
+        if "noise" in query:
+            kwargs["noise"] = float(query["noise"][0])
+        if "replay" in query:
+            kwargs["replay"] = query["replay"][0].split(",")
+        return cls(url, **kwargs)
+
+    def _queue(self, lines):
+        for line in lines:
+            self._out += line.encode() + b"\r\n"
+
+    def _pump(self):
+        due = int((time.monotonic() - self._t0) * self.rate) - self.frames_sent
+        if due <= 0:
+            return
+        if due > self.MAX_BACKLOG:
+            self.frames_sent += due - self.MAX_BACKLOG
+            due = self.MAX_BACKLOG
+        data = self.device.encode([self.device.next_frame() for _ in range(due)])
+        if self.noise:
+            data = bytearray(data)
+            hits = np.flatnonzero(self._rng.random(len(data)) < self.noise)
+            for i in hits:
+                data[i] ^= 1 << int(self._rng.integers(8))
+        self._out += data
+        self.frames_sent += due
+
+    def _check_open(self):
+        if not self.is_open:
+            raise serial.PortNotOpenError()
+
+    @property
+    def in_waiting(self):
+        self._check_open()
+        with self._lock:
+            self._pump()
+            return len(self._out)
+
+    def read(self, size=1):
+        self._check_open()
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        data = bytearray()
+        while True:
+            with self._lock:
+                self._pump()
+                take = min(size - len(data), len(self._out))
+                data += self._out[:take]
+                del self._out[:take]
+            if len(data) >= size or not self.is_open:
+                return bytes(data)
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                return bytes(data)
+            wait = 1.0 / self.rate if self.rate > 0 else 0.05
+            if deadline is not None:
+                wait = min(wait, deadline - now)
+            time.sleep(max(0.0, min(wait, 0.05)))
+
+    def readline(self):
+        line = bytearray()
+        while not line.endswith(b"\n"):
+            chunk = self.read(1)
+            if not chunk:
+                break
+            line += chunk
+        return bytes(line)
+
+    def write(self, data):
+        self._check_open()
+        # The host terminates commands with a literal "\n" (backslash, n)
+        text = data.decode("utf-8", "ignore").replace("\\\\n", "\n").replace("\\n", "\n")
+        with self._lock:
+            text = self._in.decode() + text if self._in else text
+            *commands, rest = text.split("\n")
+            self._in = rest.encode()
+            for command in commands:
+                self._queue(self.device.handle_command(command))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def reset_input_buffer(self):
+        with self._lock:
+            self._out.clear()
+
+    def close(self):
+        self.is_open = False
+
+
+def run_pty(device, rate):
+    """Serves `device` on a pseudo terminal until interrupted (POSIX only)."""
+    import select
+    import tty
+
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    print(f"Simulated Arduino on {os.ttyname(slave)} ({rate:g} frames/s). Ctrl+C to stop.")
+    pending = ""
+    interval = 1.0 / rate
+    next_frame = time.monotonic()
+
+    def send(lines):
+        for line in lines:
+            os.write(master, line.encode() + b"\r\n")
+
+    send(device.startup_lines())
+    try:
+        while True:
+            ready, _, _ = select.select([master], [], [], max(0.0, next_frame - time.monotonic()))
+            if ready:
+                pending += os.read(master, 4096).decode("utf-8", "ignore")
+                pending = pending.replace("\\\\n", "\n").replace("\\n", "\n")
+                *commands, pending = pending.split("\n")
+                for command in commands:
+                    send(device.handle_command(command))
+            now = time.monotonic()
+            while next_frame <= now:
+                os.write(master, device.encode([device.next_frame()]))
+                next_frame += interval
+    except KeyboardInterrupt:
+        pass
+    finally:
+        os.close(master)
+        os.close(slave)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulated Arduino for load testing.")
+    parser.add_argument("--rate", type=float, default=1.0, help="telemetry frames per second")
+    parser.add_argument("--replay", nargs="+", metavar="LOG", help="play back frames from serial_log_*.txt")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--pty", action="store_true", help="serve on a pseudo terminal")
+    args = parser.parse_args(argv)
+
+    device = SimulatedArduino(replay=args.replay, seed=args.seed)
+    if args.pty:
+        run_pty(device, args.rate)
+        return
+    # Without --pty just print the stream, which is handy for eyeballing it
+    try:
+        while True:
+            print(device.next_frame(), flush=True)
+            time.sleep(1.0 / args.rate)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
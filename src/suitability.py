@@ -0,0 +1,115 @@
+import numpy as np
+
+METRICS = ("temp", "hum", "moist")
+# plant key and default for the low/high bound of each metric, in METRICS order
+_BOUND_KEYS = (
+    ("temperature_low", 0, "temperature_high", 100),
+    ("humidity_low", 0, "humidity_high", 100),
+    ("moisture_low", 0, "moisture_high", 1000),
+)
+
+
+class PlantBounds:
+    """The plant catalog as arrays: one row per plant, one column per metric.
+
+    Built once per catalog change; every suitability query afterwards is a
+    handful of vectorized operations no matter how many plants there are.
+    """
+
+    def __init__(self, names, low, high, aq_min):
+        self.names = names
+        self.low = low  # (n_plants, 3) float64
+        self.high = high
+        self.aq_min = aq_min  # (n_plants,)
+
+    @classmethod
+    def from_plants(cls, plants):
+        n = len(plants)
+        low = np.empty((n, len(METRICS)))
+        high = np.empty((n, len(METRICS)))
+        aq_min = np.empty(n)
+        for i, plant in enumerate(plants):
+            for j, (lo_key, lo_default, hi_key, hi_default) in enumerate(_BOUND_KEYS):
+                low[i, j] = plant.get(lo_key, lo_default)
+                high[i, j] = plant.get(hi_key, hi_default)
+            aq_min[i] = plant.get("air_quality_score_min", 0)
+        return cls([p["name"] for p in plants], low, high, aq_min)
+
+    def __len__(self):
+        return len(self.names)
+
+
+def _fraction_in_range(values, low, high):
+    """Fraction of finite `values` inside [low, high], for every (low, high) pair.
+
+    Sorting the series once and binary-searching each bound makes this
+    O(n log n + plants * log n) instead of O(n * plants).
+    """
+    values = np.sort(values[np.isfinite(values)])
+    if not len(values):
+        return np.full(len(low), np.nan), np.nan
+    inside = np.searchsorted(values, high, side="right") - np.searchsorted(values, low, side="left")
+    return np.clip(inside, 0, None) / len(values), float(values.mean())
+
+
+class SuitabilityResult:
+    """Per-plant scores from one evaluate() call, ranked best first by `order`."""
+
+    def __init__(self, bounds, fraction, means, aq, met, aq_ok):
+        self.bounds = bounds
+        self.fraction = fraction  # (n_plants, 3) share of time in range, nan if no data
+        self.means = means  # averages of the three series
+        self.aq = aq
+        self.met = met  # (n_plants, 3) whether the average is in range
+        self.aq_ok = aq_ok
+        # Old style 0-4 score: average in range for each metric, plus air quality
+        self.score = met.sum(axis=1) + aq_ok
+        # Mean over the metrics that had data (nanmean would warn on empty rows)
+        counted = np.isfinite(fraction).sum(axis=1)
+        self.time_in_range = np.nansum(fraction, axis=1) / np.maximum(counted, 1)
+        # Best first: more time in range, then the average-based score, then name
+        names = np.asarray(bounds.names, dtype=object)
+        self.order = np.lexsort((names, -self.score, -np.nan_to_num(self.time_in_range)))
+
+    def suitable(self):
+        """Names of the plants whose every average is in range, best first."""
+        return [self.bounds.names[i] for i in self.order if self.score[i] == len(METRICS) + 1]
+
+    def details(self, i):
+        """The dict the analysis dialog shows for plant `i`."""
+        b = self.bounds
+        return {
+            "name": b.names[i],
+            "score": int(self.score[i]),
+            "time_in_range": float(self.time_in_range[i]),
+            "pct_temp": float(self.fraction[i, 0]) * 100,
+            "pct_hum": float(self.fraction[i, 1]) * 100,
+            "pct_moist": float(self.fraction[i, 2]) * 100,
+            "met_temp": bool(self.met[i, 0]), "plant_temp_low": b.low[i, 0], "plant_temp_high": b.high[i, 0],
+            "met_hum": bool(self.met[i, 1]), "plant_hum_low": b.low[i, 1], "plant_hum_high": b.high[i, 1],
+            "met_moist": bool(self.met[i, 2]), "plant_moist_low": b.low[i, 2], "plant_moist_high": b.high[i, 2],
+            "met_aq": bool(self.aq_ok[i]), "plant_aq_min": b.aq_min[i],
+        }
+
+    def ranked(self, top=None):
+        """details() of the best `top` plants (all by default)."""
+        order = self.order if top is None else self.order[:top]
+        return [self.details(i) for i in order]
+
+
+def evaluate(bounds, temps, hums, moists, aq):
+    """Scores every plant in `bounds` against the three series and an air
+    quality score. NaN samples (e.g. the unfilled part of the Arduino's
+    weekly history) are ignored."""
+    fractions, means = [], []
+    for j, series in enumerate((temps, hums, moists)):
+        fraction, mean = _fraction_in_range(np.asarray(series, dtype=np.float64),
+                                            bounds.low[:, j], bounds.high[:, j])
+        fractions.append(fraction)
+        means.append(mean)
+    fraction = np.column_stack(fractions) if len(bounds) else np.empty((0, len(METRICS)))
+    means = np.array(means)
+    with np.errstate(invalid="ignore"):
+        met = (bounds.low <= means) & (means <= bounds.high)
+    aq_ok = aq >= bounds.aq_min
+    return SuitabilityResult(bounds, fraction, means, aq, met, aq_ok)
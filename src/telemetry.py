@@ -0,0 +1,231 @@
+import numpy as np
+
+# Column layout of the real-time frame the Arduino prints every 1-2 s
+# (see README): 7 readings followed by 7 issue flags.
+TELEMETRY_DTYPE = np.dtype([
+    ("temp", np.float32),
+    ("humidity", np.float32),
+    ("moisture", np.float32),
+    ("quality", np.int8),
+    ("temp_avg", np.float32),
+    ("humidity_avg", np.float32),
+    ("moisture_avg", np.float32),
+    ("temp_too_high", np.uint8),
+    ("temp_too_low", np.uint8),
+    ("humidity_too_low", np.uint8),
+    ("humidity_too_high", np.uint8),
+    ("soil_too_dry", np.uint8),
+    ("soil_too_wet", np.uint8),
+    ("air_quality_issue", np.uint8),
+])
+TELEMETRY_FIELDS = TELEMETRY_DTYPE.names
+FLAG_FIELDS = TELEMETRY_FIELDS[7:]
+N_FIELDS = len(TELEMETRY_FIELDS)
+# Columns that must hold whole numbers (quality and the flags)
+_INT_COLUMNS = [i for i, name in enumerate(TELEMETRY_FIELDS) if TELEMETRY_DTYPE[name].kind in "iu"]
+# Valid values of those columns: the 0-3 air quality score and 0/1 flags.
+# Anything else is corruption (recordings and binary frames store them as
+# unsigned bytes, so e.g. quality -1 would come back as 255)
+QUALITY_MAX = 3
+_INT_MIN = np.zeros(len(_INT_COLUMNS))
+_INT_MAX = np.array([QUALITY_MAX if TELEMETRY_FIELDS[i] == "quality" else 1 for i in _INT_COLUMNS])
+
+FLAG_WARNINGS = {
+    "temp_too_high": "Temperature is too high!",
+    "temp_too_low": "Temperature is too low!",
+    "humidity_too_low": "Humidity is too low!",
+    "humidity_too_high": "Humidity is too high!",
+    "soil_too_dry": "Soil is too dry!",
+    "soil_too_wet": "Soil is too wet!",
+    "air_quality_issue": "Air quality issue detected!",
+}
+
+
+CONTROL_LINES = ("Sensor ready.", "Reset data")
+# Spacing of the points in the Arduino's "d," history (its averaging period)
+HISTORY_INTERVAL_S = 600
+HISTORY_POINTS = 84  # one week of 10-minute averages
+# What each "d," line holds, in the order they arrive; the firmware sends the
+# first three, a fourth (air quality) is accepted if it ever shows up
+HISTORY_SERIES = ("temperature", "humidity", "moisture", "air_quality")
+
+# Order of the values in the host -> Arduino threshold message
+THRESHOLD_KEYS = (
+    "temperature_low", "temperature_high",
+    "humidity_low", "humidity_high",
+    "air_quality_score_min",
+    "moisture_low", "moisture_high",
+)
+
+
+def classify_line(line):
+    """'control', 'history' (d, lines), 'telemetry' or 'other' for one RX line."""
+    if line in CONTROL_LINES:
+        return "control"
+    if line.startswith("d,"):
+        return "history"
+    if is_telemetry_candidate(line):
+        return "telemetry"
+    return "other"
+
+
+def parse_thresholds(text):
+    """Parses a threshold message ("18,27,60,70,2,400,600\\n", optionally
+    prefixed with "Thresholds:") into a dict keyed by THRESHOLD_KEYS."""
+    text = text.split(":", 1)[-1].strip().replace("\\n", "").strip("\\ \n")
+    parts = text.split(",")
+    if len(parts) != len(THRESHOLD_KEYS):
+        return None
+    try:
+        return dict(zip(THRESHOLD_KEYS, (float(p) for p in parts)))
+    except ValueError:
+        return None
+
+
+def is_telemetry_candidate(line):
+    """Cheap string-level check for something shaped like a telemetry frame."""
+    if line.startswith("[") or line.startswith("d,") or "NaN" in line:
+        return False
+    return line.count(",") >= N_FIELDS - 1
+
+
+def _loadtxt(block):
+    """Parse equally shaped lines; bisect around corrupt ones.
+
+    Returns (values, ok) with `ok` a bool mask over `block`. One bad token only
+    costs O(log n) extra parses instead of dropping to a per-line loop.
+    """
+    try:
+        values = np.loadtxt(block, delimiter=",", dtype=np.float64, comments=None, ndmin=2)
+        if values.shape == (len(block), N_FIELDS):
+            return values, np.ones(len(block), dtype=bool)
+    except ValueError:
+        pass
+    if len(block) == 1:
+        return np.empty((0, N_FIELDS)), np.zeros(1, dtype=bool)
+    mid = len(block) // 2
+    left, left_ok = _loadtxt(block[:mid])
+    right, right_ok = _loadtxt(block[mid:])
+    return np.vstack([left, right]), np.concatenate([left_ok, right_ok])
+
+
+def _to_records(values):
+    records = np.empty(len(values), dtype=TELEMETRY_DTYPE)
+    for i, name in enumerate(TELEMETRY_FIELDS):
+        records[name] = values[:, i]
+    return records
+
+
+def parse_telemetry_lines(lines):
+    """Parse a batch of raw serial lines into a TELEMETRY_DTYPE array.
+
+    Returns (records, rejected) where `rejected` is a bool mask over `lines`
+    marking everything that was not a well-formed 14-field frame.
+    """
+    rejected = np.ones(len(lines), dtype=bool)
+    index, block = [], []
+    for i, line in enumerate(lines):
+        if is_telemetry_candidate(line):
+            index.append(i)
+            # Lines carrying trailing fields use the first 14, as before
+            if line.count(",") > N_FIELDS - 1:
+                line = ",".join(line.split(",", N_FIELDS)[:N_FIELDS])
+            block.append(line)
+    if not block:
+        return np.empty(0, dtype=TELEMETRY_DTYPE), rejected
+
+    # One C-level parse over the whole batch
+    values, ok = _loadtxt(block)
+    # int() used to reject e.g. "nan" or "2.5" in the quality/flag columns;
+    # out-of-range values (quality 300 or -1, flag 2) are rejected too
+    ints = values[:, _INT_COLUMNS]
+    whole = np.all(np.isfinite(ints) & (ints == np.floor(ints)) & (ints >= _INT_MIN) & (ints <= _INT_MAX), axis=1)
+    if not whole.all():
+        ok[np.flatnonzero(ok)[~whole]] = False
+        values = values[whole]
+    rejected[np.asarray(index)[ok]] = False
+    return _to_records(values), rejected
+
+
+def format_telemetry_line(record):
+    """The text frame the firmware would print for `record` (for the monitor
+    and the serial log when frames arrive in binary)."""
+    values = record.tolist()
+    return ",".join(f"{v:.2f}" if TELEMETRY_DTYPE[i].kind == "f" else str(v) for i, v in enumerate(values))
+
+
+def active_warnings(record):
+    """Human readable warnings for the flags raised in one record."""
+    return [msg for name, msg in FLAG_WARNINGS.items() if record[name]]
+
+
+class HistoryParser:
+    """Parses the Arduino's "d," history lines one at a time, as they
+    arrive, into float32 arrays (oldest first, NaN where the firmware hasn't
+    filled the week yet).
+
+    Memory stays bounded however big a dump gets: at most `max_lines` lists
+    are kept, each cut to its newest `max_points` values. Tokens that aren't
+    numbers become NaN (so the points after them keep their time slot) and
+    are counted in `skipped`.
+    """
+
+    def __init__(self, max_points=HISTORY_POINTS * 12, max_lines=len(HISTORY_SERIES)):
+        self.max_points = max_points
+        self.max_lines = max_lines
+        self.series = []
+        self.skipped = 0    # non-numeric tokens
+        self.truncated = 0  # values cut off the front of oversized lists
+        self.extra = 0      # lines past max_lines
+
+    def __len__(self):
+        return len(self.series)
+
+    def feed(self, line):
+        """Parses one "d,..." line; returns its array (None if it was ignored)."""
+        if len(self.series) >= self.max_lines:
+            self.extra += 1
+            return None
+        payload = line[2:] if line.startswith("d,") else line
+        payload = payload.strip().strip("[]").strip().rstrip(",")
+        # Only the newest max_points tokens are ever split out
+        tokens = payload.rsplit(",", self.max_points)
+        if len(tokens) > self.max_points:
+            self.truncated += tokens[0].count(",") + 1
+            tokens = tokens[1:]
+        tokens = [t for t in tokens if t.strip()]  # "a,,b" and trailing commas
+        try:
+            values = np.array(tokens, dtype=np.float32)
+        except ValueError:
+            parsed = [_to_float(t) for t in tokens]
+            self.skipped += parsed.count(None)
+            values = np.array([np.nan if v is None else v for v in parsed], dtype=np.float32)
+        self.series.append(values)
+        return values
+
+    def get(self, name):
+        """The list for one of HISTORY_SERIES, or None if it wasn't sent."""
+        i = HISTORY_SERIES.index(name)
+        return self.series[i] if i < len(self.series) else None
+
+    def summary(self):
+        """One line for the serial monitor instead of every value."""
+        parts = []
+        for name, values in zip(HISTORY_SERIES, self.series):
+            valid = np.isfinite(values)
+            text = f"{name} {valid.sum()}/{len(values)}"
+            if valid.any():
+                text += f" ({values[valid].min():.1f}..{values[valid].max():.1f})"
+            parts.append(text)
+        text = f"{len(self.series)} lists: " + ", ".join(parts)
+        problems = [f"{n} {what}" for n, what in ((self.skipped, "bad values skipped"),
+                                                  (self.truncated, "old values dropped"),
+                                                  (self.extra, "extra lines ignored")) if n]
+        return text + ("; " + ", ".join(problems) if problems else "")
+
+
+def _to_float(token):
+    try:
+        return float(token)
+    except ValueError:
+        return None
@@ -0,0 +1,141 @@
+import time
+
+import numpy as np
+
+from telemetry import TELEMETRY_DTYPE
+
+# A week of 1 Hz samples
+DEFAULT_CAPACITY = 7 * 24 * 3600
+# Timestamps are time.monotonic() seconds (immune to clock changes); add this
+# to show them as wall-clock (epoch) time
+WALL_OFFSET = time.time() - time.monotonic()
+
+
+def wall_time(t):
+    """Epoch seconds for a monotonic timestamp from the store."""
+    return t + WALL_OFFSET
+
+
+class TelemetryStore:
+    """Fixed-capacity history of telemetry records in one preallocated array.
+
+    The backing array is twice the capacity: records are written at the end
+    and, once it is full, the live window is moved back to the front in one
+    copy. That keeps appends amortised O(1) and the live window contiguous,
+    so view() never has to copy or stitch two halves of a ring together.
+
+    Every record carries a host timestamp (monotonic seconds) in a parallel
+    array. Timestamps never decrease, so time-range queries are a binary
+    search plus a zero-copy slice: O(log n + k) however long the history.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, dtype=TELEMETRY_DTYPE):
+        self.capacity = int(capacity)
+        self.dtype = np.dtype(dtype)
+        self._buf = np.zeros(2 * self.capacity, dtype=self.dtype)
+        self._t = np.zeros(2 * self.capacity, dtype=np.float64)
+        self._start = 0
+        self._end = 0
+        self.total = 0  # records ever appended, i.e. absolute index of the next one
+
+    def __len__(self):
+        return self._end - self._start
+
+    @property
+    def first_index(self):
+        """Absolute index of the oldest record still held."""
+        return self.total - len(self)
+
+    def _make_room(self, n):
+        if self._end + n > len(self._buf):
+            live = len(self)
+            self._buf[:live] = self._buf[self._start:self._end]
+            self._t[:live] = self._t[self._start:self._end]
+            self._start, self._end = 0, live
+
+    def _stamps(self, t, n):
+        """`n` timestamps from `t` (None = now, a scalar, or one per record),
+        clamped so they never go backwards."""
+        t = np.broadcast_to(np.asarray(time.monotonic() if t is None else t, dtype=np.float64), (n,))
+        floor = self._t[self._end - 1] if len(self) else -np.inf
+        return np.maximum.accumulate(np.maximum(t, floor))
+
+    def append(self, record, t=None):
+        self._make_room(1)
+        self._t[self._end] = self._stamps(t, 1)[0]
+        self._buf[self._end] = record
+        self._end += 1
+        if len(self) > self.capacity:
+            self._start += 1
+        self.total += 1
+
+    def extend(self, records, t=None):
+        """Appends `records`, stamped with `t`: None (now), one time for the
+        whole batch, or one per record."""
+        n = len(records)
+        if not n:
+            return
+        t = self._stamps(t, n)
+        if n > self.capacity:
+            records, t = records[-self.capacity:], t[-self.capacity:]
+        self._make_room(len(records))
+        self._t[self._end:self._end + len(records)] = t
+        self._buf[self._end:self._end + len(records)] = records
+        self._end += len(records)
+        self._start = max(self._start, self._end - self.capacity)
+        self.total += n
+
+    def view(self, last=None):
+        """Zero-copy view of the newest `last` records (all by default).
+
+        Views are only valid until the next append/extend call.
+        """
+        start = self._start if last is None else max(self._start, self._end - last)
+        return self._buf[start:self._end]
+
+    def field(self, name, last=None):
+        return self.view(last)[name]
+
+    def latest(self):
+        return self._buf[self._end - 1] if len(self) else None
+
+    def times(self, last=None):
+        """Timestamps matching view(last); same zero-copy caveat."""
+        start = self._start if last is None else max(self._start, self._end - last)
+        return self._t[start:self._end]
+
+    def latest_time(self):
+        return float(self._t[self._end - 1]) if len(self) else None
+
+    def span(self, t0=None, t1=None):
+        """(start, stop) positions in view() of the records with t0 <= t <= t1.
+        Either bound may be None for "from the oldest" / "up to the newest"."""
+        times = self.times()
+        start = 0 if t0 is None else int(np.searchsorted(times, t0, side="left"))
+        stop = len(times) if t1 is None else int(np.searchsorted(times, t1, side="right"))
+        return start, max(start, stop)
+
+    def between(self, t0=None, t1=None):
+        """(times, records) views of everything stamped in [t0, t1]."""
+        start, stop = self.span(t0, t1)
+        return self.times()[start:stop], self.view()[start:stop]
+
+    def last_seconds(self, seconds):
+        """(times, records) of the newest `seconds` worth of history, e.g. 6 * 3600."""
+        if not len(self):
+            return self.between()
+        return self.between(self.latest_time() - seconds)
+
+    def window_stats(self, name, t0=None, t1=None):
+        """count/mean/min/max of field `name` over [t0, t1], ignoring NaNs."""
+        _, records = self.between(t0, t1)
+        values = np.asarray(records[name], dtype=np.float64)
+        values = values[np.isfinite(values)]
+        if not len(values):
+            return {"count": 0, "mean": np.nan, "min": np.nan, "max": np.nan}
+        return {"count": len(values), "mean": float(values.mean()),
+                "min": float(values.min()), "max": float(values.max())}
+
+    def clear(self):
+        self._start = self._end = 0
+        self.total = 0
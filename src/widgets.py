@@ -1,4 +1,6 @@
-from PyQt5 import QtWidgets, QtCore
+from collections import deque
+
+from PyQt5 import QtWidgets, QtCore, QtGui
 
 class MetricCard(QtWidgets.QFrame):
     def __init__(self, title: str, accent: str, unit: str = ""):
@@ -93,39 +95,146 @@ class StatusCard(QtWidgets.QFrame):
 
 
 class SerialMonitorWidget(QtWidgets.QGroupBox):
-    """A widget for displaying and sending serial data."""
-    def __init__(self, parent=None):
+    """A widget for displaying and sending serial data.
+
+    Lines go into a fixed-size ring and are written to the view in one batch
+    on the next event-loop pass, so a burst of RX lines costs one layout.
+    """
+    FILTERS = ("RX", "TX", "INFO")  # WARNING/ERROR lines are always shown
+
+    def __init__(self, parent=None, max_lines=5000, history_lines=50000):
         super().__init__("Serial Monitor", parent)
         layout = QtWidgets.QVBoxLayout(self)
-        self.serial_text = QtWidgets.QTextEdit()
+        self.serial_text = QtWidgets.QPlainTextEdit()
         self.serial_text.setReadOnly(True)
+        self.serial_text.setUndoRedoEnabled(False)
+        self.serial_text.setMaximumBlockCount(max_lines)
         self.serial_text.setFixedHeight(120)
+        self._max_lines = max_lines
+        self._lines = deque(maxlen=history_lines)  # (kind, text), newest last
+        self._pending = deque(maxlen=max_lines)
+        self._flush_timer = QtCore.QTimer(self, singleShot=True, interval=0)
+        self._flush_timer.timeout.connect(self.flush)
+        self.log_sink = None  # optional callable(kind, msg) that persists every line
+        self.metrics = None  # optional MetricsRegistry timing the view updates
+
+        filter_layout = QtWidgets.QHBoxLayout()
+        self.filter_boxes = {}
+        for kind in self.FILTERS:
+            box = QtWidgets.QCheckBox(kind)
+            box.setChecked(True)
+            box.toggled.connect(self._rebuild)
+            filter_layout.addWidget(box)
+            self.filter_boxes[kind] = box
+        filter_layout.addStretch(1)
+        self.pause_box = QtWidgets.QCheckBox("Pause")
+        self.pause_box.setToolTip("Freeze the view; lines are still recorded.")
+        self.pause_box.toggled.connect(self._rebuild)
+        filter_layout.addWidget(self.pause_box)
+
         input_layout = QtWidgets.QHBoxLayout()
         self.serial_input = QtWidgets.QLineEdit()
         self.serial_input.setPlaceholderText("Type message to send to Arduino...")
         self.serial_send_btn = QtWidgets.QPushButton("Send")
         input_layout.addWidget(self.serial_input)
         input_layout.addWidget(self.serial_send_btn)
+        layout.addLayout(filter_layout)
         layout.addWidget(self.serial_text)
         layout.addLayout(input_layout)
         self.setLayout(layout)
 
+    def _shown(self, kind):
+        box = self.filter_boxes.get(kind)
+        return box is None or box.isChecked()
+
+    def _append(self, kind, msg):
+        line = f"[{kind}] {msg}"
+        self._lines.append((kind, line))
+        if self.log_sink:
+            self.log_sink(kind, msg)
+        if self._shown(kind) and not self.pause_box.isChecked():
+            self._pending.append(line)
+            if not self._flush_timer.isActive():
+                self._flush_timer.start()
+
+    def flush(self):
+        """Writes all buffered lines to the view in a single append."""
+        if not self._pending:
+            return
+        if self.metrics:
+            with self.metrics.stage("monitor"):
+                self.serial_text.appendPlainText("\n".join(self._pending))
+        else:
+            self.serial_text.appendPlainText("\n".join(self._pending))
+        self._pending.clear()
+
+    def _rebuild(self):
+        self._pending.clear()
+        if self.pause_box.isChecked():
+            return
+        shown = []
+        for kind, line in reversed(self._lines):
+            if self._shown(kind):
+                shown.append(line)
+                if len(shown) == self._max_lines:
+                    break
+        self.serial_text.setPlainText("\n".join(reversed(shown)))
+        self.serial_text.moveCursor(QtGui.QTextCursor.End)
+
     def append_rx(self, msg):
-        self.serial_text.append(f"[RX] {msg}")
+        self._append("RX", msg)
 
     def append_tx(self, msg):
-        self.serial_text.append(f"[TX] {msg}")
+        self._append("TX", msg)
 
     def append_info(self, msg):
-        self.serial_text.append(f"[INFO] {msg}")
+        self._append("INFO", msg)
+
+    def append_warning(self, msg):
+        self._append("WARNING", msg)
 
     def append_error(self, msg):
-        self.serial_text.append(f"[ERROR] {msg}")
+        self._append("ERROR", msg)
 
     def clear(self):
+        self._lines.clear()
+        self._pending.clear()
         self.serial_text.clear()
 
 
+class MetricsPanel(QtWidgets.QWidget):
+    """Live view of a MetricsRegistry, refreshed once a second while shown."""
+    dump_requested = QtCore.pyqtSignal()
+
+    def __init__(self, metrics, parent=None):
+        super().__init__(parent)
+        self.metrics = metrics
+        self.text = QtWidgets.QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setFont(QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont))
+        self.dump_btn = QtWidgets.QPushButton("Dump to file")
+        self.dump_btn.clicked.connect(self.dump_requested)
+
+        lay = QtWidgets.QVBoxLayout(self)
+        lay.addWidget(self.text)
+        lay.addWidget(self.dump_btn)
+
+        self._timer = QtCore.QTimer(self, interval=1000)
+        self._timer.timeout.connect(self.refresh)
+
+    def refresh(self):
+        self.text.setPlainText(self.metrics.format_text())
+
+    def showEvent(self, ev):
+        self.refresh()
+        self._timer.start()
+        super().showEvent(ev)
+
+    def hideEvent(self, ev):
+        self._timer.stop()  # no point formatting text nobody sees
+        super().hideEvent(ev)
+
+
 class MoistureCard(MetricCard):
     def __init__(self):
         super().__init__("Soil Moisture", "#8BC34A", "")
@@ -0,0 +1,23 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# The modules in src/ import each other by bare name, like main.py runs them
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+
+@pytest.fixture
+def make_records():
+    """make_records(n, **columns): n TELEMETRY_DTYPE rows, zero except the
+    given columns (scalars or arrays) and quality 3."""
+    from telemetry import TELEMETRY_DTYPE
+
+    def make(n, **columns):
+        records = np.zeros(n, dtype=TELEMETRY_DTYPE)
+        records["quality"] = 3
+        for name, values in columns.items():
+            records[name] = values
+        return records
+    return make
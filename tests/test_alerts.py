@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+
+from alerts import AlertEngine
+from forecast import FORECAST_FIELDS
+
+PLANT = {"moisture_low": 300, "moisture_high": 800, "humidity_low": 40, "humidity_high": 90}
+
+
+def _forecaster(moisture, trend):
+    """Stand-in for TelemetryForecaster: only the level/trend the engine reads."""
+    models = {name: SimpleNamespace(level=None, trend=0.0, ready=False) for name in FORECAST_FIELDS}
+    models["moisture_avg"] = SimpleNamespace(level=moisture, trend=trend, ready=True)
+    return SimpleNamespace(models=models)
+
+
+def test_raise_is_debounced_and_clear_has_hysteresis():
+    engine = AlertEngine(lead=3600, release=1.25, debounce=10)
+    engine.set_plant(PLANT)
+    drying = _forecaster(400, -100 / 3000)  # reaches 300 in 50 min
+
+    assert engine.update(drying, 0) == []
+    assert engine.update(drying, 9) == []  # not held for the debounce yet
+    (alert,) = engine.update(drying, 10)
+    assert alert.active and alert.key == "moisture_low"
+    assert engine.active_messages() == ["Soil will be too dry in ~50 min"]
+
+    # 70 min away: past the 60 min lead but inside the 75 min release, so it stays
+    assert engine.update(_forecaster(400, -100 / 4200), 20) == []
+    # A blip of a different trend shorter than the debounce changes nothing
+    slower = _forecaster(400, -100 / 6000)
+    engine.update(slower, 30)
+    engine.update(drying, 35)
+    assert engine.update(slower, 50) == [] and alert.active
+    (cleared,) = engine.update(slower, 60)
+    assert cleared is alert and not alert.active
+    assert engine.active_messages() == []
+
+
+def test_no_alert_while_heading_away_or_without_a_plant():
+    engine = AlertEngine(debounce=0)
+    assert engine.update(_forecaster(400, -1.0), 0) == []  # no plant, no limits
+    engine.set_plant(PLANT)
+    assert engine.update(_forecaster(400, +0.01), 0) == []  # wetter, but 8 h from too wet
+    assert engine.update(_forecaster(250, -1.0), 0) == []  # already too dry: the Arduino flags that
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+import archive
+from archive import TelemetryArchive
+
+
+def test_frames_round_trip_and_aggregate(tmp_path, make_records):
+    path = str(tmp_path / "telemetry.sqlite")
+    records = make_records(6, temp_avg=np.arange(6) + 20.0, humidity=[50, np.nan, 52, 53, 54, 55],
+                           soil_too_dry=[0, 1, 1, 0, 0, 0])
+    times = 1000.0 + 30 * np.arange(6)
+    db = TelemetryArchive(path)
+    db.add_frames("sim", times, records, plant="Basil")
+    db.add_command("sim", "r", t=1001.0)
+    db.flush()
+
+    t, back = db.frames("sim", 1030.0, 1120.0)
+    np.testing.assert_array_equal(t, times[1:4])
+    np.testing.assert_array_equal(back["humidity"], [np.nan, 52, 53])
+    np.testing.assert_array_equal(back["soil_too_dry"], [1, 1, 0])
+    assert back["quality"].tolist() == [3, 3, 3]
+    rows = db.aggregate("sim", "temp_avg", bucket=60)
+    assert [(r["t"], r["count"], r["mean"]) for r in rows] == [(960.0, 1, 20.0), (1020.0, 2, 21.5),
+                                                               (1080.0, 2, 23.5), (1140.0, 1, 25.0)]
+    assert db.violations()["Basil"]["soil_too_dry"] == 2
+    assert db.commands("sim") == [(1001.0, "r")]
+    db.close()
+
+    reader = TelemetryArchive(path, read_only=True)
+    assert reader.devices() == ["sim"]
+    reader.close()
+
+
+def test_cli_refuses_a_missing_archive_without_creating_it(tmp_path):
+    path = tmp_path / "typo.sqlite"
+    with pytest.raises(SystemExit, match="No archive"):
+        archive.main([str(path)])
+    assert not path.exists()
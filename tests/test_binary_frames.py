@@ -0,0 +1,45 @@
+import numpy as np
+
+from binary_frames import FRAME_SIZE, SYNC, FrameDecoder, encode_frames
+from telemetry import parse_telemetry_lines
+
+FRAME = "24.71,82.85,453.29,3,24.63,82.89,455.09,0,0,0,1,0,0,0"
+
+
+def _frames(n):
+    records, _ = parse_telemetry_lines([FRAME] * n)
+    return encode_frames(records)
+
+
+def test_frames_and_text_survive_any_chunking():
+    stream = b"Binary mode\r\n" + _frames(3) + b"Reset data\r\n" + _frames(2)
+    decoder = FrameDecoder()
+    records, text = [], b""
+    for i in range(len(stream)):
+        r, t = decoder.feed(stream[i:i + 1])
+        records += list(r)
+        text += t
+    assert len(records) == 5
+    assert text == b"Binary mode\r\nReset data\r\n"
+    assert np.isclose(records[0]["moisture"], 453.3)
+    assert decoder.errors == 0 and decoder.noise_bytes == 0
+
+
+def test_corrupted_sync_byte_is_counted_not_passed_as_text():
+    data = bytearray(_frames(3))
+    data[FRAME_SIZE] ^= 0xFF  # the second frame's sync byte
+    assert data[FRAME_SIZE] != SYNC
+    decoder = FrameDecoder()
+    records, text = decoder.feed(bytes(data) + b"Reset data\r\n")
+    assert len(records) == 2
+    assert text == b"Reset data\r\n"
+    assert decoder.errors >= 1
+    assert decoder.noise_bytes >= FRAME_SIZE - 1
+
+
+def test_crc_error_costs_one_frame():
+    data = bytearray(_frames(3))
+    data[FRAME_SIZE + 5] ^= 0x01
+    decoder = FrameDecoder()
+    records, _ = decoder.feed(bytes(data))
+    assert len(records) == 2 and decoder.crc_errors == 1
@@ -0,0 +1,38 @@
+import numpy as np
+
+from decimate import MinMaxDecimator
+from telemetry_store import TelemetryStore
+
+
+def test_partly_evicted_bucket_does_not_show_evicted_points(make_records):
+    store = TelemetryStore(capacity=40)
+    dec = MinMaxDecimator("temp", max_buckets=4)
+    temps = np.arange(64, dtype=np.float64)
+    temps[0], temps[1] = 100, -100  # extremes that get evicted first
+    store.extend(make_records(40, temp=temps[:40]), t=np.arange(40.0))
+    dec.update(store)
+    assert dec.bucket_size == 16
+
+    store.extend(make_records(4, temp=temps[40:44]), t=np.arange(40.0, 44.0))
+    dec.update(store)
+    x, y = dec.points(store)
+    assert store.first_index == 4
+    assert x.min() >= store.times()[0]
+    assert y.max() < 100 and y.min() > -100
+    # The redone head bucket holds the extremes of what is left of it
+    assert (x[0], x[1]) == (4.0, 15.0)
+
+
+def test_matches_one_shot_decimation_without_eviction(make_records):
+    store = TelemetryStore(capacity=1000)
+    dec = MinMaxDecimator("temp", max_buckets=8)
+    temps = np.sin(np.arange(64) / 3.0) * 10
+    for i in range(0, 64, 5):
+        chunk = temps[i:i + 5]
+        store.extend(make_records(len(chunk), temp=chunk), t=i + np.arange(len(chunk), dtype=np.float64))
+        dec.update(store)
+    x, y = dec.points(store)
+    assert len(x) == 16 and dec.bucket_size == 8
+    for k in range(8):
+        chunk = temps[k * 8:(k + 1) * 8].astype(np.float32)
+        assert sorted(y[2 * k:2 * k + 2]) == [chunk.min(), chunk.max()]
@@ -0,0 +1,35 @@
+import math
+
+import numpy as np
+
+from forecast import HoltForecaster, TelemetryForecaster
+
+
+def test_holt_follows_a_linear_trend_and_ignores_nan():
+    model = HoltForecaster(alpha=0.5, beta=0.3, warmup=5)
+    assert model.forecast(60) is None
+    for i in range(400):
+        model.update(20.0 + 0.01 * i, 1.0)  # +0.01 per second
+        if i == 200:
+            model.update(math.nan, 1.0)
+    assert model.ready
+    assert math.isclose(model.trend, 0.01, rel_tol=1e-3)
+    assert math.isclose(model.forecast(600), 20.0 + 0.01 * (399 + 600), rel_tol=1e-3)
+
+
+def test_batches_are_spread_over_the_time_since_the_last_one(make_records):
+    forecaster = TelemetryForecaster(alpha=0.5, beta=0.3, warmup=5)
+    t = 0.0
+    for batch in range(100):
+        # 4 frames per 2 s tick, rising 0.01 % humidity per second
+        values = 90.0 + 0.01 * (2 * batch + 0.5 * np.arange(1, 5))
+        t += 2.0
+        forecaster.update(make_records(4, humidity_avg=values, moisture_avg=500), t)
+    assert math.isclose(forecaster.period, 0.5)
+    points = dict(forecaster.forecasts("humidity_avg"))
+    assert math.isclose(points[600.0], 90.0 + 0.01 * (200 + 600), rel_tol=1e-3)
+    # An hour of that trend would pass 100 %; forecasts stay physical
+    assert points[3600.0] == 100.0
+    xs, ys = forecaster.extension("moisture_avg", t)
+    assert xs == [t, t + 60, t + 600, t + 3600]
+    assert np.allclose(ys, 500.0)
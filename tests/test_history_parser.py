@@ -0,0 +1,24 @@
+import numpy as np
+
+from telemetry import HistoryParser
+
+
+def test_bad_token_keeps_its_slot():
+    parser = HistoryParser()
+    values = parser.feed("d,1, 2 ,x,4,nan,")
+    np.testing.assert_array_equal(values, np.array([1, 2, np.nan, 4, np.nan], dtype=np.float32))
+    assert parser.skipped == 1
+
+
+def test_oversized_list_keeps_newest_points():
+    parser = HistoryParser(max_points=3)
+    values = parser.feed("d," + ",".join(str(v) for v in range(10)))
+    np.testing.assert_array_equal(values, [7, 8, 9])
+    assert parser.truncated == 7
+
+
+def test_lines_past_max_lines_are_ignored():
+    parser = HistoryParser(max_lines=3)
+    for _ in range(4):
+        parser.feed("d,1,2")
+    assert len(parser) == 3 and parser.extra == 1
@@ -0,0 +1,29 @@
+from PyQt5 import QtGui
+
+from image_cache import _DecodeSignals, _DecodeTask
+
+
+def _decode(path, thumb_path):
+    signals = _DecodeSignals()
+    got = []
+    signals.done.connect(lambda p, image: got.append((p, image)))
+    _DecodeTask(path, 50, thumb_path, signals).run()
+    return got
+
+
+def test_decoded_image_is_delivered_even_if_the_thumbnail_cant_be_written(tmp_path, capsys):
+    src = tmp_path / "plant.png"
+    image = QtGui.QImage(400, 200, QtGui.QImage.Format_RGB32)
+    image.fill(0x336633)
+    assert image.save(str(src), "PNG")
+    blocker = tmp_path / "thumbs"
+    blocker.write_text("not a directory")
+
+    got = _decode(str(src), str(blocker / "x.png"))
+    assert [p for p, _ in got] == [str(src)]
+    assert (got[0][1].width(), got[0][1].height()) == (50, 25)
+    assert "Could not write thumbnail" in capsys.readouterr().out
+
+    thumb = tmp_path / "ok" / "x.png"
+    got = _decode(str(src), str(thumb))
+    assert thumb.exists() and got[0][1].width() == 50
@@ -0,0 +1,16 @@
+import json
+import os
+import stat
+
+from plant_catalog import PlantCatalog
+
+
+def test_save_keeps_file_mode(tmp_path):
+    path = tmp_path / "plant_preferences.json"
+    path.write_text(json.dumps({"plants": [{"name": "Basil"}]}))
+    os.chmod(path, 0o644)
+    catalog = PlantCatalog(str(path))
+    catalog.remove(0)
+    catalog.save()
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o644
+    assert json.loads(path.read_text()) == {"plants": []}
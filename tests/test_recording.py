@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from recording import RecordingReader, RecordingWriter
+from replay import replay_file
+
+
+def test_reopened_recording_is_appended_and_sliced_by_time(tmp_path, make_records):
+    path = str(tmp_path / "recording_sim.dlrec")
+    writer = RecordingWriter(path, plant="Basil")
+    writer.append(make_records(10, temp=np.arange(10)), 1000.0 + np.arange(10))
+    writer.close()
+    # A later session keeps appending; a clock set back can't reorder rows
+    writer = RecordingWriter(path, plant="Basil")
+    writer.append(make_records(10, temp=np.arange(10, 20)), 1005.0 + np.arange(10))
+    writer.close()
+
+    reader = RecordingReader(path)
+    assert len(reader) == 20
+    assert np.all(np.diff(reader.t) >= 0)
+    records, t = reader.telemetry(1003.0, 1007.0)
+    np.testing.assert_array_equal(t, [1003, 1004, 1005, 1006])
+    np.testing.assert_array_equal(records["temp"], [3, 4, 5, 6])
+
+
+def test_a_recording_is_only_continued_for_its_own_plant(tmp_path, make_records):
+    path = str(tmp_path / "recording_sim_Basil.dlrec")
+    RecordingWriter(path, plant="Basil").close()
+    with pytest.raises(ValueError, match="Basil"):
+        RecordingWriter(path, plant="Cactus")
+    with pytest.raises(ValueError):
+        RecordingWriter(path)
+
+
+def test_replay_reads_a_time_range_of_a_recording(tmp_path, make_records):
+    path = str(tmp_path / "recording_sim.dlrec")
+    writer = RecordingWriter(path)
+    writer.append(make_records(100, temp=np.arange(100)), 1000.0 + np.arange(100))
+    writer.close()
+    summary = replay_file(path, t0=1010.0, t1=1020.0)
+    assert summary["frames"] == 10
+    assert summary["min"]["temp"] == 10 and summary["max"]["temp"] == 19
+    assert summary["span_seconds"] == 9
@@ -0,0 +1,58 @@
+import numpy as np
+
+from rollups import Rollups
+
+TIERS = ((1, 100), (60, 1000), (600, 1000))
+
+
+def _feed(make_records, n=20000, seed=0):
+    rng = np.random.default_rng(seed)
+    t = 1000.0 + np.cumsum(rng.uniform(0.05, 0.6, n))
+    temps = rng.normal(22, 3, n)
+    temps[rng.random(n) < 0.05] = np.nan  # failed sensor readings
+    records = make_records(n, temp_avg=temps, humidity_avg=50, moisture_avg=400)
+    rollups = Rollups(TIERS)
+    for chunk in np.array_split(np.arange(n), 137):  # uneven batches, like ticks
+        rollups.add(t[chunk], records[chunk])
+    return rollups, t, records["temp_avg"].astype(np.float64)
+
+
+def _brute(t, values, seconds):
+    ids = np.floor(t / seconds)
+    out = {}
+    for bucket in np.unique(ids):
+        v = values[ids == bucket]
+        v = v[np.isfinite(v)]
+        out[bucket * seconds] = (len(v), v.sum(), v.min() if len(v) else np.nan, v.max() if len(v) else np.nan)
+    return out
+
+
+def test_every_tier_matches_a_brute_force_reduction(make_records):
+    rollups, t, values = _feed(make_records)
+    for tier, (seconds, retention) in zip(rollups.tiers, TIERS):
+        expected = _brute(t, values, seconds)
+        starts, rows = tier.between()
+        assert len(starts) == min(retention, len(expected))
+        for start, row in zip(starts, rows):
+            n, total, low, high = expected[start]
+            assert row["temp_avg_n"] == n
+            np.testing.assert_allclose(row["temp_avg_sum"], total)
+            np.testing.assert_allclose([row["temp_avg_min"], row["temp_avg_max"]], [low, high],
+                                       rtol=1e-6)
+    assert rollups.oldest_time() == np.floor(t[0] / 600) * 600
+
+
+def test_stats_use_the_finest_tier_still_covering_the_range(make_records):
+    rollups, t, values = _feed(make_records)
+    # Only the last 100 s are left at 1 s resolution; older ranges fall back
+    # to the minute tier, rounded out to whole minutes
+    for t0, t1, seconds in ((t[-1] - 50, t[-1], 1), (1200.0, 3000.0, 60)):
+        assert rollups.pick(t0, t1).seconds == seconds
+        lo = np.floor(t0 / seconds) * seconds
+        v = values[(t >= lo) & (t < np.floor(t1 / seconds) * seconds + seconds)]
+        v = v[np.isfinite(v)]
+        stats = rollups.stats("temp_avg", t0, t1)
+        assert stats["count"] == len(v)
+        np.testing.assert_allclose([stats["mean"], stats["min"], stats["max"]],
+                                   [v.mean(), v.min(), v.max()], rtol=1e-6)
+    assert rollups.stats("temp_avg", 0, 10)["count"] == 0
@@ -0,0 +1,126 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from binary_frames import encode_frames
+from serial_handler import CONNECTED, RECONNECTING, SerialConnection
+
+GOOD = b"24.71,82.85,453.29,3,24.63,82.89,455.09,0,0,0,1,0,0,0\n"
+
+
+class FakePort:
+    """A port with no fileno() (so the connection polls it) that answers
+    commands from `replies` and can be made to fail."""
+
+    def __init__(self, replies=None):
+        self.replies = replies or {}
+        self.written = []
+        self.incoming = bytearray()
+        self.broken = False
+
+    @property
+    def in_waiting(self):
+        if self.broken:
+            raise OSError("device unplugged")
+        return len(self.incoming)
+
+    def read(self, size):
+        data, self.incoming[:size] = bytes(self.incoming[:size]), b""
+        return data
+
+    def write(self, data):
+        self.written.append(data)
+        self.incoming += self.replies.get(data, b"")
+
+    def close(self):
+        pass
+
+
+def _connect(ports):
+    opened = iter(ports)
+    return SerialConnection("fake", 9600, opener=lambda port, baud: next(opened), poll_interval=0.001)
+
+
+async def _wait_for(condition, timeout=2.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        assert loop.time() < deadline
+        await asyncio.sleep(0.001)
+
+
+def test_lines_requests_and_history():
+    port = FakePort({
+        b"r\\n": b"Reset data\n",
+        b"d\\n": b"d,1,2,x\nd,3,4,5\nd,6,7,8\n" + GOOD,
+    })
+
+    async def run():
+        conn = _connect([port])
+        await conn.open()
+        port.incoming += b"Sensor ready.\n" + GOOD[:20]
+        await _wait_for(lambda: conn.buffer.lines)
+        port.incoming += GOOD[20:]
+        await conn.reset(timeout=1)
+        history = await conn.fetch_history(timeout=1, extra_wait=0.01)
+        conn.send("18,27,60,70,2,400,600")
+        await _wait_for(lambda: len(port.written) == 3)
+        await conn.close()
+        return conn, history
+
+    conn, history = asyncio.run(run())
+    assert port.written == [b"r\\n", b"d\\n", b"18,27,60,70,2,400,600\\n"]
+    assert conn.buffer.drain()[:3] == ["Sensor ready.", GOOD.decode().strip(), "Reset data"]
+    assert len(history) == 3 and history.skipped == 1
+    np.testing.assert_array_equal(history.get("temperature"), [1, 2, np.nan])
+
+
+def test_request_times_out_without_an_answer():
+    async def run():
+        conn = _connect([FakePort()])
+        await conn.open()
+        try:
+            await conn.reset(timeout=0.05)
+        finally:
+            await conn.close()
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(run())
+
+
+def test_binary_frames_after_the_ack(make_records):
+    frames = encode_frames(make_records(3, temp=[20, 21, 22]))
+    port = FakePort({b"b\\n": b"Binary mode\n" + frames})
+
+    async def run():
+        conn = _connect([port])
+        await conn.open()
+        agreed = await conn.negotiate_binary(timeout=1)
+        await _wait_for(lambda: conn.buffer.frames)
+        await conn.close()
+        return agreed, conn
+
+    agreed, conn = asyncio.run(run())
+    assert agreed
+    (_, records), = conn.buffer.drain_frames()
+    np.testing.assert_array_equal(records["temp"], [20, 21, 22])
+
+
+def test_reconnects_after_the_port_drops():
+    first, second = FakePort(), FakePort()
+
+    async def run():
+        conn = _connect([first, second])
+        await conn.open()
+        first.broken = True
+        await _wait_for(lambda: conn.state == RECONNECTING)
+        await _wait_for(lambda: conn.state == CONNECTED)  # first retry after 0.5 s
+        second.incoming += GOOD
+        await _wait_for(lambda: conn.buffer.lines)
+        await conn.close()
+        return conn
+
+    conn = asyncio.run(run())
+    assert conn.reconnects == 1 and isinstance(conn.last_error, OSError)
+    assert conn.buffer.drain() == [GOOD.decode().strip()]
@@ -0,0 +1,30 @@
+import os
+
+from session_log import SessionLogWriter
+
+
+def test_rotates_on_bytes_written_and_keeps_every_line(tmp_path):
+    log = SessionLogWriter(str(tmp_path), max_bytes=300, flush_interval=60, fsync_interval=60)
+    log.start()
+    for i in range(30):
+        log.record("RX", f"line {i:02d} µ")
+    log.close()
+
+    paths = sorted(tmp_path.iterdir())  # stamp, then _1, _2... within a second
+    assert len(paths) > 1
+    lines = []
+    for path in sorted(paths):
+        data = path.read_bytes()
+        # A file rotates once it has reached max_bytes, so at most one line over
+        assert len(data) < 300 + 50
+        lines += data.decode("utf-8").splitlines()
+    assert [line.split("] ", 1)[1] for line in lines] == [f"line {i:02d} µ" for i in range(30)]
+
+
+def test_lines_stay_buffered_until_the_periodic_flush(tmp_path):
+    log = SessionLogWriter(str(tmp_path))
+    for i in range(100):
+        log._write((1000.0 + i, "RX", f"line {i}"))
+    assert os.path.getsize(log.path) == 0  # nothing forced out line by line
+    log._close_file()
+    assert os.path.getsize(log.path) > 0
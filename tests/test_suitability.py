@@ -0,0 +1,48 @@
+import numpy as np
+
+from suitability import PlantBounds, evaluate
+
+
+def _catalog(rng, n):
+    plants = []
+    for i in range(n):
+        t, h, m = rng.uniform(10, 25), rng.uniform(30, 70), rng.uniform(200, 600)
+        plants.append({"name": f"plant{i:02d}",
+                       "temperature_low": t, "temperature_high": t + rng.uniform(2, 12),
+                       "humidity_low": h, "humidity_high": h + rng.uniform(5, 30),
+                       "moisture_low": m, "moisture_high": m + rng.uniform(50, 400),
+                       "air_quality_score_min": int(rng.integers(0, 4))})
+    plants.append({"name": "defaults"})  # every bound missing
+    return plants
+
+
+def test_matches_a_per_plant_loop():
+    rng = np.random.default_rng(7)
+    plants = _catalog(rng, 40)
+    series = [rng.normal(20, 4, 84), rng.normal(55, 10, 84), rng.normal(450, 120, 84)]
+    for s in series:
+        s[rng.random(84) < 0.2] = np.nan  # unfilled history slots
+    result = evaluate(PlantBounds.from_plants(plants), *series, 2)
+
+    keys = (("temperature", 0, 100), ("humidity", 0, 100), ("moisture", 0, 1000))
+    for i, plant in enumerate(plants):
+        score = int(2 >= plant.get("air_quality_score_min", 0))
+        for j, (key, lo_default, hi_default) in enumerate(keys):
+            lo, hi = plant.get(f"{key}_low", lo_default), plant.get(f"{key}_high", hi_default)
+            values = series[j][np.isfinite(series[j])]
+            assert np.isclose(result.fraction[i, j], np.mean((values >= lo) & (values <= hi)))
+            score += int(lo <= values.mean() <= hi)
+        assert result.score[i] == score
+    assert result.details(len(plants) - 1)["time_in_range"] == 1.0
+    # Ranked by time in range, then score, then name
+    ranked = [(-d["time_in_range"], -d["score"], d["name"]) for d in result.ranked()]
+    assert ranked == sorted(ranked)
+    assert result.suitable() == [d["name"] for d in result.ranked() if d["score"] == 4]
+
+
+def test_series_without_data_count_as_unknown():
+    bounds = PlantBounds.from_plants([{"name": "a", "temperature_low": 15, "temperature_high": 25}])
+    result = evaluate(bounds, [20.0, np.nan], [np.nan], [np.nan, np.nan], 3)
+    assert np.isnan(result.fraction[0, 1:]).all()
+    assert result.time_in_range[0] == 1.0
+    assert result.suitable() == []  # the missing averages can't be in range
@@ -0,0 +1,11 @@
+from telemetry import parse_telemetry_lines
+
+GOOD = "24.71,82.85,453.29,3,24.63,82.89,455.09,0,0,0,1,0,0,0"
+
+
+def test_out_of_range_integers_are_rejected_not_wrapped():
+    lines = [GOOD, GOOD.replace(",3,", ",300,"), GOOD[:-1] + "256", GOOD.replace(",3,", ",-1,"),
+             GOOD.replace(",3,", ",4,"), GOOD[:-1] + "2", GOOD.replace(",3,", ",0,")]
+    records, rejected = parse_telemetry_lines(lines)
+    assert rejected.tolist() == [False, True, True, True, True, True, False]
+    assert records["quality"].tolist() == [3, 0]
@@ -0,0 +1,51 @@
+import numpy as np
+
+from telemetry_store import TelemetryStore
+
+
+def test_wraps_without_losing_order_and_keeps_absolute_indexes(make_records):
+    store = TelemetryStore(capacity=5)
+    for i in range(3):
+        store.append(make_records(1, temp=i)[0], t=float(i))
+    store.extend(make_records(4, temp=np.arange(3, 7)), t=np.arange(3.0, 7.0))
+    assert len(store) == 5 and store.total == 7 and store.first_index == 2
+    np.testing.assert_array_equal(store.field("temp"), [2, 3, 4, 5, 6])
+    np.testing.assert_array_equal(store.times(2), [5, 6])
+    assert store.latest()["temp"] == 6 and store.latest_time() == 6.0
+
+
+def test_stamps_never_go_backwards(make_records):
+    store = TelemetryStore(capacity=10)
+    store.extend(make_records(3), t=[10.0, 12.0, 11.0])
+    store.append(make_records(1)[0], t=5.0)
+    np.testing.assert_array_equal(store.times(), [10, 12, 12, 12])
+
+
+def test_time_range_queries(make_records):
+    store = TelemetryStore(capacity=100)
+    temps = np.arange(20, dtype=np.float64)
+    temps[4] = np.nan  # a failed sensor reading
+    store.extend(make_records(20, temp=temps), t=100.0 + np.arange(20))
+
+    t, records = store.between(103, 106)
+    np.testing.assert_array_equal(t, [103, 104, 105, 106])
+    np.testing.assert_array_equal(records["temp"][[0, 2, 3]], [3, 5, 6])
+    t, _ = store.last_seconds(2.5)
+    np.testing.assert_array_equal(t, [117, 118, 119])
+
+    stats = store.window_stats("temp", 102, 107)
+    assert stats == {"count": 5, "mean": (2 + 3 + 5 + 6 + 7) / 5, "min": 2.0, "max": 7.0}
+    assert store.window_stats("temp", 200)["count"] == 0
+    assert TelemetryStore().last_seconds(60)[0].size == 0
+
+
+def test_views_are_zero_copy_and_oversized_batches_keep_the_newest(make_records):
+    store = TelemetryStore(capacity=4)
+    store.extend(make_records(3, temp=[1, 2, 3]), t=[1.0, 2.0, 3.0])
+    assert np.shares_memory(store.view(), store._buf)
+    store.extend(make_records(10, temp=np.arange(10, 20)), t=np.arange(10.0, 20.0))
+    assert store.total == 13 and store.first_index == 9
+    np.testing.assert_array_equal(store.field("temp"), [16, 17, 18, 19])
+    np.testing.assert_array_equal(store.times(), [16, 17, 18, 19])
+    store.clear()
+    assert len(store) == 0 and store.latest() is None and store.latest_time() is None